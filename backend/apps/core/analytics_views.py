@@ -6,7 +6,6 @@ Public analytics and statistics endpoints
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from django.db.models import Count, Q
 from apps.orders.models import Job, JobTimeline
 from apps.users.models import User
 
@@ -27,15 +26,15 @@ class PublicStatsView(APIView):
         
         # Completed deliveries (jobs with DELIVERED status)
         completed_deliveries = Job.objects.filter(
-            timeline__status=JobTimeline.Status.DELIVERED,
-            timeline__is_current=True
+            current_status=JobTimeline.Status.DELIVERED
         ).count()
         
         # Active orders (in transit + out for delivery)
         active_orders = Job.objects.filter(
-            Q(timeline__status=JobTimeline.Status.IN_TRANSIT) |
-            Q(timeline__status=JobTimeline.Status.OUT_FOR_DELIVERY),
-            timeline__is_current=True
+            current_status__in=[
+                JobTimeline.Status.IN_TRANSIT,
+                JobTimeline.Status.OUT_FOR_DELIVERY,
+            ]
         ).count()
         
         # Calculate on-time rate (mock for now - would need delivery date tracking)
@@ -0,0 +1,35 @@
+# apps/core/checks.py
+"""
+Deployment checks for settings that only work in a single process.
+
+Tracking responses (apps/orders/tracking.py) and idempotency replays are
+cached, and invalidated on commit. With the default per-process memory
+cache an invalidation only reaches the worker that made the change, so
+the others serve stale tracking (and 304s) until TRACKING_CACHE_TTL
+expires. Production with more than one worker needs a shared CACHE_URL:
+``manage.py check --deploy`` warns, and gunicorn.conf.py refuses to start
+several workers without one.
+"""
+
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+PROCESS_LOCAL_CACHES = {
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+}
+
+
+def uses_process_local_cache():
+    return settings.CACHES['default']['BACKEND'] in PROCESS_LOCAL_CACHES
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    if not uses_process_local_cache():
+        return []
+    return [Warning(
+        'The default cache is local to each process.',
+        hint='Set CACHE_URL (e.g. rediscache://redis:6379/1) so cache invalidations reach every worker.',
+        id='core.W001',
+    )]
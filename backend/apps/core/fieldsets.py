@@ -0,0 +1,123 @@
+# apps/core/fieldsets.py
+"""
+Sparse fieldsets for read endpoints.
+
+    GET /api/v1/jobs/?fields=id,job_number,status
+    GET /api/v1/jobs/?expand=customer,timeline
+    GET /api/v1/transportation/shipments/?fields=id,status,job_number&expand=driver
+
+Without either parameter responses are unchanged. Once a client uses the
+contract:
+
+- ``fields`` limits the top-level keys to the ones listed.
+- Nested objects named in a serializer's ``Meta.expandable_fields`` are
+  left out unless listed in ``expand``.
+- List actions switch to the view's compact ``list_serializer_class``.
+- The list queryset only joins/prefetches what the output needs, using the
+  view's ``field_select_related`` / ``field_prefetch_related`` maps. A
+  ``parent.child`` key there applies when ``parent`` is rendered and the
+  nested ``child`` is expanded (e.g. ``?expand=job,customer``).
+"""
+
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.serializers import ListSerializer
+
+FIELDS_QUERY_PARAM = 'fields'
+EXPAND_QUERY_PARAM = 'expand'
+
+
+def _split(value):
+    return {name.strip() for name in value.split(',') if name.strip()}
+
+
+def get_sparse_fieldset(request):
+    """
+    Return ``(fields, expand)`` from the query string. ``fields`` is None when
+    not given (all fields); the result is ``(None, None)`` when the client
+    is not using the contract at all.
+    """
+    if request is None or request.method not in SAFE_METHODS:
+        return None, None
+    params = request.query_params
+    if FIELDS_QUERY_PARAM not in params and EXPAND_QUERY_PARAM not in params:
+        return None, None
+    fields = _split(params[FIELDS_QUERY_PARAM]) if FIELDS_QUERY_PARAM in params else None
+    return fields, _split(params.get(EXPAND_QUERY_PARAM, ''))
+
+
+def is_sparse_request(request):
+    return get_sparse_fieldset(request) != (None, None)
+
+
+def renders_field(name, fields, expand, expandable_fields):
+    """Whether ``name`` appears in a sparse response."""
+    if name in expandable_fields:
+        return name in expand
+    return fields is None or name in fields
+
+
+class SparseFieldsetMixin:
+    """
+    Serializer mixin implementing ``?fields=`` / ``?expand=``. Nested
+    serializers declared in ``Meta.expandable_fields`` are only rendered
+    when expanded; ``fields`` applies to the top-level serializer only.
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        requested, expand = get_sparse_fieldset(self.context.get('request'))
+        if requested is None and expand is None:
+            return fields
+
+        expandable = getattr(self.Meta, 'expandable_fields', ())
+        top_level = self.parent is None or (
+            isinstance(self.parent, ListSerializer) and self.parent.parent is None
+        )
+        return {
+            name: field for name, field in fields.items()
+            if (name not in expandable or name in expand)
+            and (not top_level or renders_field(name, requested, expand, expandable))
+        }
+
+
+class SparseFieldsetViewMixin:
+    """
+    View mixin pairing with SparseFieldsetMixin. For list requests using the
+    contract it swaps in ``list_serializer_class`` and rebuilds the
+    queryset's joins from the fields that will actually be rendered.
+    """
+    list_serializer_class = None
+    # {output field name (or "parent.child"): [select_related / prefetch_related paths it needs]}
+    field_select_related = {}
+    field_prefetch_related = {}
+
+    def _sparse_list_request(self):
+        return self.action == 'list' and is_sparse_request(self.request)
+
+    def get_serializer_class(self):
+        if self.list_serializer_class is not None and self._sparse_list_request():
+            return self.list_serializer_class
+        return super().get_serializer_class()
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if not self._sparse_list_request():
+            return queryset
+
+        fields, expand = get_sparse_fieldset(self.request)
+        expandable = getattr(self.get_serializer_class().Meta, 'expandable_fields', ())
+
+        def rendered(name):
+            top, *nested = name.split('.')
+            return renders_field(top, fields, expand, expandable) and all(child in expand for child in nested)
+
+        def paths(mapping):
+            return sorted({path for name, related in mapping.items() if rendered(name) for path in related})
+
+        queryset = queryset.select_related(None).prefetch_related(None)
+        select, prefetch = paths(self.field_select_related), paths(self.field_prefetch_related)
+        if select:
+            queryset = queryset.select_related(*select)
+        if prefetch:
+            queryset = queryset.prefetch_related(*prefetch)
+        return queryset
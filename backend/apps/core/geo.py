@@ -0,0 +1,203 @@
+# apps/core/geo.py
+"""
+Offline locations and distances, for pricing, ETAs and planning that must
+not wait on (or pay for) a maps API.
+
+Places come from a gazetteer shipped with the code (data/gazetteer.csv):
+city centroids, other names for them, and ZIP / Canadian postal code
+prefixes within them. Free-text cities and addresses ("Toronto, ON",
+"St. Louis MO 63101", "Montréal") are normalized and matched by city name
+first, then by postal code; two places in the same city are treated as
+next to each other. Road distance is the great-circle distance times
+``ROAD_FACTOR``.
+
+The gazetteer is loaded once per process into sorted name lists and
+parallel coordinate arrays (looked up by bisection). Resolved names and
+lane distances are memoized in LRU caches, so repeated lanes cost a dict
+lookup.
+"""
+
+import re
+import unicodedata
+from array import array
+from bisect import bisect_left
+from functools import lru_cache
+from math import asin, cos, radians, sin, sqrt
+from pathlib import Path
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_MILE = 1.609344
+# Roads are rarely straight; typical ratio of road to great-circle distance
+ROAD_FACTOR = 1.25
+
+DATA_FILE = Path(__file__).resolve().parent / 'data' / 'gazetteer.csv'
+PLACE_CACHE_SIZE = 8192
+LANE_CACHE_SIZE = 8192
+
+# "m5v 2t6" (Canada: the first three characters), "63101" or "63101-1234" (US: the first three digits)
+POSTAL_CODE = re.compile(r'\b([a-z]\d[a-z]) ?\d[a-z]\d\b|\b(\d{3})\d{2}(?:-\d{4})?\b')
+# Trailing state, province or country after a city name, as in "Toronto ON"
+REGIONS = frozenset(
+    'al ak az ar ca co ct de dc fl ga hi id il in ia ks ky la me md ma mi mn ms mo mt ne nv nh nj nm ny '
+    'nc nd oh ok or pa ri sc sd tn tx ut vt va wa wv wi wy '
+    'ab bc mb nb nl ns nt nu on pe qc sk yt '
+    'us usa canada'.split()
+)
+
+
+def normalize_place(text):
+    """
+    Lower-case ASCII words of a place name: accents, dots and apostrophes
+    dropped, other punctuation as spaces, and "saint" as "st".
+    """
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(char for char in text if not unicodedata.combining(char)).lower()
+    text = re.sub(r"[.'’]", '', text)
+    words = re.sub(r'[^a-z0-9]+', ' ', text).split()
+    return ' '.join('st' if word == 'saint' else word for word in words)
+
+
+def _city_part(part):
+    """A comma-separated part of an address with postal code and trailing regions removed."""
+    words = normalize_place(POSTAL_CODE.sub(' ', part)).split()
+    while len(words) > 1 and words[-1] in REGIONS:
+        words.pop()
+    return ' '.join(words)
+
+
+class Gazetteer:
+    """
+    Place names and postal prefixes, each in a sorted list with a parallel
+    array of slots into the coordinate arrays.
+    """
+
+    def __init__(self, cities, aliases=(), postal=()):
+        """``cities``: ``(name, lat, lng)``; ``aliases`` and ``postal``: ``(name or prefix, city)``."""
+        cities = sorted((normalize_place(name), lat, lng) for name, lat, lng in cities)
+        self.cities = [name for name, _, _ in cities]
+        self.lat = array('d', (lat for _, lat, _ in cities))
+        self.lng = array('d', (lng for _, _, lng in cities))
+        slot_of = {name: slot for slot, name in enumerate(self.cities)}
+
+        names = sorted(
+            [(name, slot) for slot, name in enumerate(self.cities)]
+            + [(normalize_place(alias), slot_of[normalize_place(city)]) for alias, city in aliases]
+        )
+        self.names = [name for name, _ in names]
+        self.name_slots = array('H', (slot for _, slot in names))
+
+        prefixes = sorted((prefix.lower(), slot_of[normalize_place(city)]) for prefix, city in postal)
+        self.prefixes = [prefix for prefix, _ in prefixes]
+        self.prefix_slots = array('H', (slot for _, slot in prefixes))
+
+    @classmethod
+    def from_file(cls, path):
+        cities, aliases, postal = [], [], []
+        with open(path, encoding='utf-8') as rows:
+            for line in rows:
+                line = line.strip()
+                if not line or line.startswith('#'):
+                    continue
+                kind, *values = line.split(',')
+                if kind == 'city':
+                    cities.append((values[0], float(values[1]), float(values[2])))
+                elif kind == 'alias':
+                    aliases.append(tuple(values))
+                elif kind == 'postal':
+                    postal.append(tuple(values))
+        return cls(cities, aliases, postal)
+
+    def __len__(self):
+        return len(self.cities)
+
+    @staticmethod
+    def _find(keys, slots, key):
+        index = bisect_left(keys, key)
+        if index < len(keys) and keys[index] == key:
+            return slots[index]
+        return None
+
+    def find_name(self, name):
+        """Slot of a normalized city name or alias, or None."""
+        return self._find(self.names, self.name_slots, name)
+
+    def find_postal(self, code):
+        """Slot of the longest known prefix of a postal code (lower case, no space), or None."""
+        for length in range(len(code), 0, -1):
+            slot = self._find(self.prefixes, self.prefix_slots, code[:length])
+            if slot is not None:
+                return slot
+        return None
+
+    def resolve(self, text):
+        """Slot of the city ``text`` (a city or an address) is in, or None."""
+        text = (text or '').lower()
+        for part in text.split(','):
+            slot = self.find_name(_city_part(part))
+            if slot is not None:
+                return slot
+        for canadian, us in POSTAL_CODE.findall(text):
+            slot = self.find_postal(canadian or us)
+            if slot is not None:
+                return slot
+        return None
+
+    def coordinates(self, slot):
+        return self.lat[slot], self.lng[slot]
+
+
+@lru_cache(maxsize=None)
+def gazetteer():
+    """The gazetteer in DATA_FILE, loaded on first use."""
+    return Gazetteer.from_file(DATA_FILE)
+
+
+@lru_cache(maxsize=PLACE_CACHE_SIZE)
+def _slot(text):
+    return gazetteer().resolve(text)
+
+
+def locate_city(name):
+    """``(lat, lng)`` of the city ``name`` is in, or None if it cannot be found."""
+    slot = _slot(name or '')
+    return None if slot is None else gazetteer().coordinates(slot)
+
+
+def place_key(name):
+    """The gazetteer's name for the city ``name`` is in, or else ``name`` normalized; for grouping."""
+    slot = _slot(name or '')
+    return normalize_place(name) if slot is None else gazetteer().cities[slot]
+
+
+def haversine_km(origin, destination):
+    """Great-circle distance between two ``(lat, lng)`` points."""
+    lat1, lng1 = map(radians, origin)
+    lat2, lng2 = map(radians, destination)
+    a = sin((lat2 - lat1) / 2) ** 2 + cos(lat1) * cos(lat2) * sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * asin(sqrt(a))
+
+
+def road_distance_km(origin, destination):
+    return haversine_km(origin, destination) * ROAD_FACTOR
+
+
+@lru_cache(maxsize=LANE_CACHE_SIZE)
+def _lane_km(first, second):
+    places = gazetteer()
+    return road_distance_km(places.coordinates(first), places.coordinates(second))
+
+
+def lane_distance_km(origin, destination):
+    """Road km between the cities of two places, or None if either cannot be found."""
+    first, second = _slot(origin or ''), _slot(destination or '')
+    if first is None or second is None:
+        return None
+    if first == second:
+        return 0.0
+    # Lanes are cached once whichever way they are driven
+    return _lane_km(min(first, second), max(first, second))
+
+
+def lane_distance_miles(origin, destination):
+    km = lane_distance_km(origin, destination)
+    return None if km is None else km / KM_PER_MILE
@@ -0,0 +1,221 @@
+# apps/core/idempotency.py
+"""
+``Idempotency-Key`` support for create endpoints.
+
+    POST /api/v1/book/
+    Idempotency-Key: 5f0c6a1e-...
+
+The first request with a key runs normally and its response is stored
+(IdempotencyKey table, plus an in-process LRU in front of it). Retries with
+the same key get that response back, marked ``Idempotent-Replayed: true``,
+without running the view again. A retry that arrives while the first
+request is still running waits for it to finish.
+
+Keys are scoped per user and endpoint. Reusing a key with a different
+request body is rejected with 422; server errors are not stored, so the
+client may retry them.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.http.request import RawPostDataException
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.utils import json
+from rest_framework.utils.encoders import JSONEncoder
+
+from .models import IdempotencyKey
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+MAX_KEY_LENGTH = 255
+# How often a waiting retry re-checks a request running in another process
+POLL_INTERVAL = 0.1
+
+
+class ResponseLRU:
+    """Thread-safe LRU of completed responses: key -> (hash, status, body)."""
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+response_cache = ResponseLRU(settings.IDEMPOTENCY_CACHE_SIZE)
+
+# Requests running in this process, so local retries wake up as soon as
+# they finish instead of polling the database
+_in_flight = {}
+_in_flight_lock = threading.Lock()
+
+
+def request_fingerprint(request):
+    try:
+        body = request.body
+    except RawPostDataException:
+        body = json.dumps(request.data, cls=JSONEncoder, sort_keys=True).encode()
+    digest = hashlib.sha256()
+    digest.update(f'{request.method} {request.path}\n'.encode())
+    digest.update(body)
+    return digest.hexdigest()
+
+
+def _ttl():
+    return timedelta(hours=settings.IDEMPOTENCY_KEY_TTL_HOURS)
+
+
+def _claim(user, scope, key, fingerprint):
+    """
+    Insert the in-progress record for ``key``. Returns ``(record, created)``;
+    ``record`` is None when an existing record vanished before it was read.
+    """
+    IdempotencyKey.objects.filter(
+        user=user, scope=scope, key=key, expires_at__lte=timezone.now()
+    ).delete()
+    try:
+        with transaction.atomic():
+            record = IdempotencyKey.objects.create(
+                user=user, scope=scope, key=key, request_hash=fingerprint,
+                expires_at=timezone.now() + _ttl(),
+            )
+        return record, True
+    except IntegrityError:
+        return IdempotencyKey.objects.filter(user=user, scope=scope, key=key).first(), False
+
+
+def _replay(stored, fingerprint):
+    request_hash, status_code, body = stored
+    if request_hash != fingerprint:
+        return Response(
+            {'detail': f'This {IDEMPOTENCY_HEADER} was already used for a different request.'},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        )
+    return Response(body, status=status_code, headers={REPLAYED_HEADER: 'true'})
+
+
+def _wait(cache_key, seconds):
+    with _in_flight_lock:
+        event = _in_flight.get(cache_key)
+    if event is not None:
+        event.wait(seconds)
+    else:
+        time.sleep(seconds)
+
+
+def _store(record, cache_key, response):
+    if response.status_code >= 500:
+        record.delete()
+        return
+    body = json.loads(json.dumps(response.data, cls=JSONEncoder))
+    record.response_status = response.status_code
+    record.response_body = body
+    record.save(update_fields=['response_status', 'response_body', 'updated_at'])
+    response_cache.set(
+        cache_key, (record.request_hash, record.response_status, body), _ttl().total_seconds()
+    )
+
+
+def run_idempotent(request, scope, handler):
+    """
+    Run ``handler()`` (which returns a DRF Response) at most once per
+    ``Idempotency-Key``; requests without the header just run it.
+    """
+    key = request.headers.get(IDEMPOTENCY_HEADER)
+    if key is None:
+        return handler()
+    key = key.strip()
+    if not key or len(key) > MAX_KEY_LENGTH:
+        return Response(
+            {'detail': f'{IDEMPOTENCY_HEADER} must be 1-{MAX_KEY_LENGTH} characters.'},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    user = request.user if request.user.is_authenticated else None
+    fingerprint = request_fingerprint(request)
+    cache_key = (user.pk if user else None, scope, key)
+    deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_SECONDS
+
+    while True:
+        stored = response_cache.get(cache_key)
+        if stored is not None:
+            return _replay(stored, fingerprint)
+
+        record, created = _claim(user, scope, key, fingerprint)
+        if created:
+            break
+        if record is None:
+            continue
+        if record.is_complete:
+            stored = (record.request_hash, record.response_status, record.response_body)
+            response_cache.set(cache_key, stored, (record.expires_at - timezone.now()).total_seconds())
+            return _replay(stored, fingerprint)
+        if record.request_hash != fingerprint:
+            return _replay((record.request_hash, None, None), fingerprint)
+
+        # The first request is still running: wait for it rather than race it
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return Response(
+                {'detail': 'A request with this Idempotency-Key is still being processed.'},
+                status=status.HTTP_409_CONFLICT,
+            )
+        _wait(cache_key, min(remaining, POLL_INTERVAL))
+
+    event = threading.Event()
+    with _in_flight_lock:
+        _in_flight[cache_key] = event
+    try:
+        try:
+            response = handler()
+        except Exception:
+            record.delete()
+            raise
+        _store(record, cache_key, response)
+        return response
+    finally:
+        with _in_flight_lock:
+            _in_flight.pop(cache_key, None)
+        event.set()
+
+
+class IdempotentCreateMixin:
+    """
+    Honour ``Idempotency-Key`` on ``create`` (CreateModelMixin views).
+    ``idempotency_scope`` names the endpoint the keys belong to.
+    """
+    idempotency_scope = None
+
+    def create(self, request, *args, **kwargs):
+        scope = self.idempotency_scope or type(self).__name__
+        handler = super().create
+        return run_idempotent(request, scope, lambda: handler(request, *args, **kwargs))
@@ -0,0 +1,253 @@
+# apps/core/live.py
+"""
+Server-push events over Server-Sent Events.
+
+Views stream events to clients instead of being polled:
+
+    subscription = subscribe('job:<id>')
+    return event_stream_response(subscription, initial=[...])
+
+Every process has one EventHub that fans events out to the streams it is
+serving. Events are published through a broker (``LIVE_EVENTS_BROKER``):
+
+- ``InMemoryBroker`` delivers straight to the local hub. Enough for a
+  single worker, development and tests.
+- ``PostgresBroker`` sends events with ``pg_notify`` and every worker
+  LISTENs, so a change made by one worker reaches streams held by all of
+  them.
+
+Streams need an ASGI server (see asgi.py); under WSGI each open stream
+holds a worker thread.
+"""
+
+import asyncio
+import logging
+import select
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connection, connections
+from django.http import StreamingHttpResponse
+from django.utils.module_loading import import_string
+from rest_framework.utils import json
+from rest_framework.utils.encoders import JSONEncoder
+
+logger = logging.getLogger(__name__)
+
+# Events buffered per stream; a client that falls further behind loses the
+# oldest ones (each event is a full snapshot, so only the latest matters)
+QUEUE_SIZE = 100
+# Milliseconds EventSource clients wait before reconnecting
+RETRY_MS = 3000
+
+
+def encode_event(event):
+    return json.dumps(event, cls=JSONEncoder, separators=(',', ':'))
+
+
+class Subscription:
+    """One stream's queue of events on a channel, read from its event loop."""
+
+    def __init__(self, hub, channel):
+        self.hub = hub
+        self.channel = channel
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(QUEUE_SIZE)
+
+    def put(self, event):
+        # Called from any thread
+        self.loop.call_soon_threadsafe(self._put, event)
+
+    def _put(self, event):
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(event)
+
+    async def get(self, timeout):
+        """The next event, or None if none arrives within ``timeout`` seconds."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self.hub.unsubscribe(self)
+
+
+class EventHub:
+    """In-process fan-out of channel events to subscribed streams."""
+
+    def __init__(self):
+        self._subscriptions = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, channel):
+        subscription = Subscription(self, channel)
+        with self._lock:
+            self._subscriptions[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.channel)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.channel]
+
+    def subscriber_count(self, channel):
+        with self._lock:
+            return len(self._subscriptions.get(channel, ()))
+
+    def deliver(self, channel, event):
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(channel, ()))
+        for subscription in subscriptions:
+            try:
+                subscription.put(event)
+            except RuntimeError:
+                # The stream's event loop has shut down
+                self.unsubscribe(subscription)
+
+
+class Broker:
+    """Carries published events to the EventHub of every process."""
+
+    def __init__(self, hub):
+        self.hub = hub
+
+    def publish(self, channel, event):
+        raise NotImplementedError
+
+    def start(self):
+        """Begin receiving events from other processes; called per subscription."""
+
+
+class InMemoryBroker(Broker):
+    """Single-process broker: publishing delivers to the local hub."""
+
+    def publish(self, channel, event):
+        self.hub.deliver(channel, event)
+
+
+class PostgresBroker(Broker):
+    """
+    Shares events between processes through PostgreSQL LISTEN/NOTIFY.
+    Notification payloads are limited to 8000 bytes, so events must stay
+    small (tracking snapshots are well under 2 KB).
+    """
+    pg_channel = 'lms_live_events'
+    reconnect_delay = 5
+
+    def __init__(self, hub):
+        super().__init__(hub)
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def publish(self, channel, event):
+        # Inside a transaction the notification is sent on commit
+        payload = encode_event({'channel': channel, 'event': event})
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_notify(%s, %s)', [self.pg_channel, payload])
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._listen_forever, name='live-events', daemon=True)
+                self._thread.start()
+
+    def _listen_forever(self):
+        while True:
+            try:
+                self._listen()
+            except Exception:
+                logger.exception('Live event listener failed; reconnecting')
+            time.sleep(self.reconnect_delay)
+
+    def _listen(self):
+        import psycopg2
+
+        db = connections['default']
+        conn = psycopg2.connect(**db.get_connection_params())
+        try:
+            conn.autocommit = True
+            with conn.cursor() as cursor:
+                cursor.execute(f'LISTEN {self.pg_channel}')
+            while True:
+                if select.select([conn], [], [], 60) == ([], [], []):
+                    continue
+                conn.poll()
+                while conn.notifies:
+                    notify = conn.notifies.pop(0)
+                    message = json.loads(notify.payload)
+                    self.hub.deliver(message['channel'], message['event'])
+        finally:
+            conn.close()
+
+
+hub = EventHub()
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    with _broker_lock:
+        if _broker is None:
+            _broker = import_string(settings.LIVE_EVENTS_BROKER)(hub)
+        return _broker
+
+
+def publish(channel, event):
+    """
+    Send ``event`` (a dict with ``type``, ``data`` and optional ``id``) to
+    every stream subscribed to ``channel``, in any process.
+    """
+    get_broker().publish(channel, event)
+
+
+def subscribe(channel):
+    """Start receiving ``channel``'s events; must be called on the stream's event loop."""
+    get_broker().start()
+    return hub.subscribe(channel)
+
+
+# ---------------------------------------------------------------------------
+# Server-Sent Events
+# ---------------------------------------------------------------------------
+
+def format_sse(event):
+    lines = []
+    if event.get('id'):
+        lines.append(f"id: {event['id']}")
+    lines.append(f"event: {event['type']}")
+    lines.append(f"data: {encode_event(event['data'])}")
+    return '\n'.join(lines) + '\n\n'
+
+
+async def _stream(subscription, initial):
+    loop = asyncio.get_running_loop()
+    # Streams end after a while so workers can recycle them; EventSource
+    # reconnects on its own
+    deadline = loop.time() + settings.LIVE_STREAM_MAX_SECONDS
+    try:
+        yield f'retry: {RETRY_MS}\n\n'
+        for event in initial:
+            yield format_sse(event)
+        while (remaining := deadline - loop.time()) > 0:
+            event = await subscription.get(min(settings.LIVE_STREAM_HEARTBEAT_SECONDS, remaining))
+            # Comment lines keep proxies from closing an idle connection
+            yield ': keepalive\n\n' if event is None else format_sse(event)
+    finally:
+        subscription.close()
+
+
+def event_stream_response(subscription, initial=()):
+    """A text/event-stream response sending ``initial`` events, then the subscription's."""
+    response = StreamingHttpResponse(_stream(subscription, list(initial)), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
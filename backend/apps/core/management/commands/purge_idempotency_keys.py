@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from apps.core.models import IdempotencyKey
+
+class Command(BaseCommand):
+    help = 'Deletes stored Idempotency-Key responses that have expired'
+
+    def handle(self, *args, **kwargs):
+        deleted, _ = IdempotencyKey.objects.filter(expires_at__lte=timezone.now()).delete()
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} expired idempotency keys.'))
@@ -1,6 +1,7 @@
 # apps/core/models.py
 
 import uuid
+from django.conf import settings
 from django.db import models
 
 
@@ -17,3 +18,34 @@ class BaseModel(models.Model):
 
     class Meta:
         abstract = True
+
+
+class IdempotencyKey(BaseModel):
+    """
+    Outcome of a request sent with an ``Idempotency-Key`` header, kept for a
+    short time so retries get the original response instead of repeating
+    the work (see apps/core/idempotency.py). ``response_status`` stays
+    empty while the first request is still running.
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, null=True, blank=True,
+        related_name='idempotency_keys'
+    )
+    scope = models.CharField(max_length=100)
+    key = models.CharField(max_length=255)
+    request_hash = models.CharField(max_length=64)
+    response_status = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_body = models.JSONField(null=True, blank=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'scope', 'key'], name='core_idempotency_key_unique'),
+        ]
+
+    @property
+    def is_complete(self):
+        return self.response_status is not None
+
+    def __str__(self):
+        return f"{self.scope}: {self.key}"
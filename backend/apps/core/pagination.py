@@ -0,0 +1,232 @@
+# apps/core/pagination.py
+"""
+Pagination classes shared by the list endpoints.
+
+- StandardPagination is the project default: page numbers, plus an
+  optional ``?count=approximate`` that swaps the exact COUNT(*) for the
+  planner's row estimate on Postgres.
+- KeysetPagination adds an opt-in cursor mode (``?pagination=cursor``)
+  for large tables. Pages are fetched with a WHERE on the ordering columns
+  instead of an OFFSET, so page 10,000 costs the same as page one. Views
+  choose the key with ``keyset_ordering`` (default ``-created_at, -id``);
+  the last column must be unique and none of them nullable.
+"""
+
+import base64
+import datetime
+import json
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator as DjangoPaginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+# Below this many (estimated) rows an exact count is cheap and more useful
+APPROXIMATE_COUNT_THRESHOLD = 10000
+
+
+def estimate_count(queryset):
+    """
+    Row count for ``queryset``, estimated by the Postgres planner when the
+    table is large. Other databases (and small results) get an exact count.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return queryset.count()
+
+    with connection.cursor() as cursor:
+        if not queryset.query.where:
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                [queryset.model._meta.db_table],
+            )
+            row = cursor.fetchone()
+            estimate = row[0] if row else -1
+        else:
+            sql, params = queryset.order_by().query.sql_with_params()
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+            plan = cursor.fetchone()[0]
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            estimate = plan[0]['Plan']['Plan Rows']
+
+    # reltuples is -1 for tables that have never been analyzed
+    if estimate < APPROXIMATE_COUNT_THRESHOLD:
+        return queryset.count()
+    return int(estimate)
+
+
+class ApproximateCountPaginator(DjangoPaginator):
+    """Django paginator whose ``count`` comes from ``estimate_count``."""
+
+    @cached_property
+    def count(self):
+        return estimate_count(self.object_list)
+
+
+class StandardPagination(PageNumberPagination):
+    """
+    Page-number pagination. ``?count=approximate`` trades an exact total for
+    a planner estimate, which is what dashboards over big tables want.
+    """
+    count_query_param = 'count'
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count_is_approximate = request.query_params.get(self.count_query_param) == 'approximate'
+        if self.count_is_approximate:
+            self.django_paginator_class = ApproximateCountPaginator
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        if self.count_is_approximate:
+            response.data['count_is_approximate'] = True
+        return response
+
+
+def _encode_value(value):
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        # Keep full microsecond precision so no row is skipped or repeated
+        return value.isoformat()
+    if isinstance(value, (int, float, bool)) or value is None:
+        return value
+    return str(value)
+
+
+class KeysetPagination(StandardPagination):
+    """
+    StandardPagination with an opt-in keyset (cursor) mode:
+
+        GET /api/v1/jobs/?pagination=cursor
+        -> {"next": "...?cursor=...", "previous": null, "results": [...]}
+
+    In cursor mode the view's ``keyset_ordering`` decides the order and any
+    ``?ordering=`` parameter is ignored. There is no total count.
+    """
+    mode_query_param = 'pagination'
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+    keyset_ordering = ('-created_at', '-id')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_mode = (
+            request.query_params.get(self.mode_query_param) == 'cursor'
+            or self.cursor_query_param in request.query_params
+        )
+        if not self.cursor_mode:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering = tuple(getattr(view, 'keyset_ordering', self.keyset_ordering))
+        values, reverse = self.decode_cursor(request, queryset.model)
+
+        ordering = self._invert(self.ordering) if reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+        if values is not None:
+            queryset = queryset.filter(self._after(values, ordering))
+
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, values is not None
+
+        self.page = rows
+        return rows
+
+    def get_paginated_response(self, data):
+        if not self.cursor_mode:
+            return super().get_paginated_response(data)
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_next_link(self):
+        if not self.cursor_mode:
+            return super().get_next_link()
+        if not (self.has_next and self.page):
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.cursor_mode:
+            return super().get_previous_link()
+        if not (self.has_previous and self.page):
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def decode_cursor(self, request, model):
+        """
+        ``(values, reverse)`` from the request's cursor, with each value
+        converted by its ordering field; ``(None, False)`` without one.
+        """
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+            values, reverse = payload['v'], bool(payload.get('r'))
+            if not isinstance(values, list) or len(values) != len(self.ordering):
+                raise ValueError
+            # Ordering columns are never null, so neither is a cursor value
+            if any(value is None for value in values):
+                raise ValueError
+            values = [
+                self._model_field(model, self._field_name(field)).to_python(value)
+                for field, value in zip(self.ordering, values)
+            ]
+        except (TypeError, ValueError, KeyError, UnicodeEncodeError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        return values, reverse
+
+    def encode_cursor(self, row, reverse):
+        values = [_encode_value(getattr(row, self._field_name(f))) for f in self.ordering]
+        payload = json.dumps({'v': values, 'r': reverse}, separators=(',', ':'))
+        encoded = base64.urlsafe_b64encode(payload.encode('ascii')).decode('ascii')
+        url = remove_query_param(self.request.build_absolute_uri(), 'page')
+        url = replace_query_param(url, self.mode_query_param, 'cursor')
+        return replace_query_param(url, self.cursor_query_param, encoded)
+
+    @staticmethod
+    def _field_name(ordering_field):
+        return ordering_field.lstrip('-')
+
+    @staticmethod
+    def _model_field(model, name):
+        """The model field ``name`` (which may follow relations with ``__``) refers to."""
+        *relations, name = name.split('__')
+        for relation in relations:
+            model = model._meta.get_field(relation).related_model
+        return model._meta.get_field(name)
+
+    @staticmethod
+    def _invert(ordering):
+        return tuple(f[1:] if f.startswith('-') else f'-{f}' for f in ordering)
+
+    def _after(self, values, ordering):
+        """
+        Rows strictly after ``values`` in ``ordering``:
+        (a > x) OR (a = x AND b > y) OR ... with < for descending columns.
+        """
+        condition = Q()
+        for i, field in enumerate(ordering):
+            name = self._field_name(field)
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            term = Q(**{f'{name}__{lookup}': values[i]})
+            for prior, value in zip(ordering[:i], values[:i]):
+                term &= Q(**{self._field_name(prior): value})
+            condition |= term
+        return condition
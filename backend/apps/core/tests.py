@@ -1,3 +1,304 @@
-from django.test import TestCase
+import asyncio
+import base64
+import json
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from apps.orders.models import Job
+from apps.orders.tracking import estimated_delivery
+
+from . import geo
+from .checks import check_shared_cache
+from .idempotency import response_cache
+from .live import EventHub, InMemoryBroker, format_sse
+from .models import IdempotencyKey
+
+User = get_user_model()
+
+
+class KeysetPaginationTests(APITestCase):
+    def setUp(self):
+        self.manager = User.objects.create_user(
+            username='manager', email='manager@example.com', password='pw', role='MANAGER'
+        )
+        self.client.force_authenticate(user=self.manager)
+        created = timezone.now()
+        self.jobs = []
+        for i in range(5):
+            job = Job.objects.create(
+                cargo_description=f'Load {i}',
+                pickup_address='1 King St', pickup_city='Toronto',
+                pickup_contact_person='Sam', pickup_contact_phone='555-0100',
+                delivery_address='2 Queen St', delivery_city='Ottawa',
+                delivery_contact_person='Alex', delivery_contact_phone='555-0101',
+                requested_pickup_date=created,
+            )
+            self.jobs.append(job)
+        # Two jobs share a timestamp so the id tie-breaker matters
+        Job.objects.filter(pk__in=[self.jobs[1].pk, self.jobs[2].pk]).update(created_at=created)
+        for i, job in enumerate(self.jobs):
+            if i not in (1, 2):
+                Job.objects.filter(pk=job.pk).update(created_at=created + timedelta(minutes=i))
+
+    def test_cursor_pages_walk_every_job_once_in_both_directions(self):
+        url = reverse('api:job-list')
+        response = self.client.get(url, {'pagination': 'cursor', 'page_size': 2})
+        self.assertNotIn('count', response.data)
+        self.assertIsNone(response.data['previous'])
+
+        pages = [[job['id'] for job in response.data['results']]]
+        while response.data['next']:
+            response = self.client.get(response.data['next'])
+            pages.append([job['id'] for job in response.data['results']])
+
+        expected = [
+            str(job.pk) for job in Job.objects.order_by('-created_at', '-id')
+        ]
+        self.assertEqual([pk for page in pages for pk in page], expected)
+        self.assertEqual([len(page) for page in pages], [2, 2, 1])
+
+        previous = self.client.get(response.data['previous'])
+        self.assertEqual([job['id'] for job in previous.data['results']], pages[1])
+
+    def test_invalid_cursor_is_rejected(self):
+        response = self.client.get(reverse('api:job-list'), {'cursor': 'garbage'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_cursor_with_bad_values_is_rejected(self):
+        for values in (['not-a-date', 'x'], [None, None], [False, 1], ['2026-01-01T00:00:00+00:00']):
+            payload = json.dumps({'v': values, 'r': False}).encode()
+            cursor = base64.urlsafe_b64encode(payload).decode()
+            response = self.client.get(reverse('api:job-list'), {'cursor': cursor})
+            self.assertEqual(response.status_code, 404, values)
+
+    def test_page_numbers_remain_the_default(self):
+        response = self.client.get(reverse('api:job-list'), {'count': 'approximate'})
+        self.assertEqual(response.data['count'], 5)
+        self.assertTrue(response.data['count_is_approximate'])
+
+
+class IdempotencyKeyTests(APITestCase):
+    def setUp(self):
+        self.customer = User.objects.create_user(
+            username='booker', email='booker@example.com', password='pw'
+        )
+        self.client.force_authenticate(user=self.customer)
+        self.payload = {
+            'service_type': 'PALLET_DELIVERY',
+            'cargo_description': 'Two pallets of tiles',
+            'pickup_address': '1 King St', 'pickup_city': 'Toronto',
+            'pickup_contact_person': 'Sam', 'pickup_contact_phone': '555-0100',
+            'delivery_address': '2 Queen St', 'delivery_city': 'Ottawa',
+            'delivery_contact_person': 'Alex', 'delivery_contact_phone': '555-0101',
+            'requested_pickup_date': (timezone.now() + timedelta(days=2)).isoformat(),
+        }
+        response_cache.clear()
+
+    def book(self, key, payload=None):
+        return self.client.post(
+            reverse('api:customer-booking'), payload or self.payload, format='json',
+            HTTP_IDEMPOTENCY_KEY=key,
+        )
+
+    def test_retry_replays_original_response_without_new_job(self):
+        first = self.book('booking-1')
+        retry = self.book('booking-1')
+        response_cache.clear()
+        from_db = self.book('booking-1')
+
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(retry.data, json.loads(first.content))
+        self.assertEqual(from_db.data['id'], first.data['id'])
+        self.assertEqual(Job.objects.count(), 1)
+
+    def test_key_reused_with_different_body_is_rejected(self):
+        self.book('booking-1')
+
+        response = self.book('booking-1', dict(self.payload, pickup_city='Ottawa'))
+
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(Job.objects.count(), 1)
+
+    def start_in_progress(self, key):
+        # As left by a first request that is still running
+        return IdempotencyKey.objects.create(
+            user=self.customer, scope='jobs.booking', key=key, request_hash='same-request',
+            expires_at=timezone.now() + timedelta(hours=1),
+        )
+
+    @mock.patch('apps.core.idempotency.request_fingerprint', return_value='same-request')
+    def test_retry_waits_for_request_in_progress(self, _):
+        record = self.start_in_progress('booking-1')
+
+        def first_request_finishes(seconds):
+            IdempotencyKey.objects.filter(pk=record.pk).update(
+                response_status=201, response_body={'id': 'original'}
+            )
+
+        with mock.patch('apps.core.idempotency.time.sleep', side_effect=first_request_finishes):
+            response = self.book('booking-1')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data, {'id': 'original'})
+        self.assertEqual(Job.objects.count(), 0)
+
+    @override_settings(IDEMPOTENCY_WAIT_SECONDS=0)
+    @mock.patch('apps.core.idempotency.request_fingerprint', return_value='same-request')
+    def test_gives_up_waiting_with_conflict(self, _):
+        self.start_in_progress('booking-1')
+
+        response = self.book('booking-1')
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(Job.objects.count(), 0)
+
+    def test_job_create_endpoint_is_idempotent_too(self):
+        manager = User.objects.create_user(
+            username='manager', email='manager@example.com', password='pw', role='MANAGER'
+        )
+        self.client.force_authenticate(user=manager)
+        url = reverse('api:job-list')
+
+        for _ in range(2):
+            response = self.client.post(url, self.payload, format='json', HTTP_IDEMPOTENCY_KEY='k')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Job.objects.count(), 1)
+
+
+class EventHubTests(SimpleTestCase):
+    async def test_broker_fans_out_to_channel_subscribers(self):
+        hub = EventHub()
+        broker = InMemoryBroker(hub)
+        first, second = hub.subscribe('job:1'), hub.subscribe('job:1')
+        other = hub.subscribe('job:2')
+
+        broker.publish('job:1', {'type': 'tracking', 'data': {'status': 'IN_TRANSIT'}})
+
+        self.assertEqual((await first.get(1))['data'], {'status': 'IN_TRANSIT'})
+        self.assertEqual((await second.get(1))['data'], {'status': 'IN_TRANSIT'})
+        self.assertIsNone(await other.get(0.01))
+
+    async def test_closed_subscription_is_dropped(self):
+        hub = EventHub()
+        subscription = hub.subscribe('jobs')
+        subscription.close()
+
+        InMemoryBroker(hub).publish('jobs', {'type': 'tracking', 'data': {}})
+
+        self.assertEqual(hub.subscriber_count('jobs'), 0)
+        self.assertTrue(subscription.queue.empty())
+
+    async def test_publishing_from_another_thread(self):
+        hub = EventHub()
+        subscription = hub.subscribe('jobs')
+
+        await asyncio.to_thread(hub.deliver, 'jobs', {'type': 'tracking', 'data': 1})
+
+        self.assertEqual((await subscription.get(1))['data'], 1)
+
+    def test_format_sse(self):
+        event = {'type': 'tracking', 'id': 'abc', 'data': {'status': 'DELIVERED'}}
+        self.assertEqual(format_sse(event), 'id: abc\nevent: tracking\ndata: {"status":"DELIVERED"}\n\n')
+
+
+class GeoTests(SimpleTestCase):
+    def test_places_are_normalized_before_lookup(self):
+        toronto = geo.locate_city('Toronto')
+        for spelling in ('  toronto ', 'Toronto, ON', 'Toronto ON', '1 King St W, Toronto, ON M5V 2T6', 'Etobicoke'):
+            self.assertEqual(geo.locate_city(spelling), toronto, spelling)
+        self.assertEqual(geo.place_key('Montréal, QC'), 'montreal')
+        self.assertEqual(geo.place_key('Saint John NB'), 'st john')
+        self.assertEqual(geo.place_key("St. John's, NL"), 'st johns')
+        self.assertEqual(geo.place_key('Trois-Rivières'), 'trois rivieres')
+
+    def test_postal_codes_locate_unknown_cities(self):
+        self.assertEqual(geo.place_key('Somewhere, IL 60614'), 'chicago')
+        self.assertEqual(geo.place_key('K1A 0B1'), 'ottawa')
+        # The longest matching prefix wins: H7 is Laval, other H codes Montreal
+        self.assertEqual(geo.place_key('H7N 1A1'), 'laval')
+        self.assertEqual(geo.place_key('H2X 1Y4'), 'montreal')
+
+    def test_unknown_places(self):
+        self.assertIsNone(geo.locate_city('Nowhere'))
+        self.assertIsNone(geo.locate_city(''))
+        self.assertIsNone(geo.lane_distance_km('Nowhere', 'Toronto'))
+        self.assertEqual(geo.place_key(' Nowhere  Town '), 'nowhere town')
+
+    def test_lane_distance(self):
+        km = geo.lane_distance_km('Toronto', 'Ottawa')
+        # About 350 km as the crow flies
+        self.assertAlmostEqual(km, 352 * geo.ROAD_FACTOR, delta=5)
+        self.assertEqual(geo.lane_distance_km('Ottawa, ON', 'toronto'), km)
+        self.assertEqual(geo.lane_distance_km('Toronto', 'Toronto ON M5V 2T6'), 0.0)
+        self.assertAlmostEqual(geo.lane_distance_miles('Toronto', 'Ottawa'), km / geo.KM_PER_MILE)
+
+    def test_lanes_are_cached_whichever_way_they_are_driven(self):
+        geo._lane_km.cache_clear()
+        geo.lane_distance_km('Boston', 'Chicago')
+        geo.lane_distance_km('Chicago, IL', 'Boston, MA')
+        info = geo._lane_km.cache_info()
+        self.assertEqual((info.misses, info.hits), (1, 1))
+
+    @override_settings(TRANSIT_KM_PER_DAY=800)
+    def test_delivery_estimate_follows_the_lane(self):
+        pickup = timezone.now()
+
+        def eta(pickup_city, delivery_city):
+            job = SimpleNamespace(requested_pickup_date=pickup, pickup_city=pickup_city, delivery_city=delivery_city)
+            return (estimated_delivery(job) - pickup).days
+
+        self.assertEqual(eta('Toronto', 'Ottawa'), 1)
+        self.assertEqual(eta('Toronto', 'Vancouver'), 6)
+        self.assertEqual(eta('Toronto', 'Nowhere'), 3)
+
+
+class QuoteDistanceTests(APITestCase):
+    def test_quotes_use_road_distance(self):
+        response = self.client.post(reverse('api:calculate_quote'), {
+            'origin': 'Toronto, ON',
+            'destination': 'Ottawa, ON',
+            'service_type': 'PALLET_DELIVERY',
+        }, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['distance'], '273.00')
+
+    def test_instant_estimate_uses_road_distance(self):
+        response = self.client.post(reverse('api:instant-quote'), {
+            'origin': 'New York, NY',
+            'destination': 'Los Angeles, CA',
+            'packageType': 'small',
+            'weight': '10',
+        }, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['distance'], 3057)
+
+    @override_settings(QUOTE_UNLOCATED_MILES=500)
+    def test_unknown_places_are_quoted_at_the_default_distance(self):
+        response = self.client.post(reverse('api:calculate_quote'), {
+            'origin': 'Nowhere',
+            'destination': 'Ottawa',
+            'service_type': 'PALLET_DELIVERY',
+        }, format='json')
+
+        self.assertEqual(response.data['distance'], '500.00')
+
+
+class SharedCacheCheckTests(SimpleTestCase):
+    def test_process_local_cache_is_flagged_for_deploys(self):
+        self.assertEqual([w.id for w in check_shared_cache(None)], ['core.W001'])
+
+        shared = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://cache'}}
+        with override_settings(CACHES=shared):
+            self.assertEqual(check_shared_cache(None), [])
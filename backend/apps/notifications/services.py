@@ -38,3 +38,33 @@ def send_sms(to_number, body):
     except Exception as e:
         logger.error(f"Failed to send SMS to {to_number}: {e}")
         return None
+
+
+def send_push(token, title, body, data=None):
+    """
+    Sends a push notification through Firebase Cloud Messaging.
+
+    :param token: The device's FCM registration token.
+    :param title: The notification title.
+    :param body: The notification text.
+    :param data: Optional dict of string values delivered to the app.
+    :return: The message ID on success, None on failure or when Firebase is not set up.
+    """
+    import firebase_admin
+    from firebase_admin import messaging
+
+    if not token or not firebase_admin._apps:
+        return None
+
+    try:
+        message = messaging.Message(
+            token=token,
+            notification=messaging.Notification(title=title, body=body),
+            data={key: str(value) for key, value in (data or {}).items()},
+        )
+        message_id = messaging.send(message)
+        logger.info(f"Push notification sent. ID: {message_id}")
+        return message_id
+    except Exception as e:
+        logger.error(f"Failed to send push notification: {e}")
+        return None
@@ -1,7 +1,13 @@
 # apps/orders/admin.py
 
 from django.contrib import admin
+from django.contrib.admin.views.main import ORDER_VAR, ChangeList
+from django.db import transaction
+from django.utils import timezone
 from .models import Job, JobTimeline
+from .search import SEARCH_RANK_ANNOTATION, is_ranked, search_jobs
+from .services import create_job_records
+from apps.core.pagination import ApproximateCountPaginator
 from apps.transportation.models import Shipment
 
 class ShipmentInline(admin.StackedInline):
@@ -11,6 +17,10 @@ class ShipmentInline(admin.StackedInline):
     readonly_fields = ('proof_of_delivery_image',) # View POD in admin
     fields = ('driver', 'vehicle', 'status', 'proof_of_delivery_image')
 
+    def get_max_num(self, request, obj=None, **kwargs):
+        # New jobs get their shipment from create_job_records
+        return 0 if obj is None else 1
+
 class JobTimelineInline(admin.TabularInline):
     model = JobTimeline
     extra = 1
@@ -23,6 +33,13 @@ class JobTimelineAdmin(admin.ModelAdmin):
     search_fields = ('job__job_number', 'job__id', 'location', 'description')
     autocomplete_fields = ['job']
 
+class JobChangeList(ChangeList):
+    def get_ordering(self, request, queryset):
+        # Best match first when searching, unless a column was clicked
+        if is_ranked(queryset) and ORDER_VAR not in self.params:
+            return [f'-{SEARCH_RANK_ANNOTATION}', '-pk']
+        return super().get_ordering(request, queryset)
+
 @admin.register(Job)
 class JobAdmin(admin.ModelAdmin):
     """
@@ -34,6 +51,7 @@ class JobAdmin(admin.ModelAdmin):
         'job_number', # Show friendly job number first
         'customer', 
         'service_type',
+        'current_status',
         'pickup_city', 
         'delivery_city',
         'requested_pickup_date',
@@ -42,6 +60,7 @@ class JobAdmin(admin.ModelAdmin):
     )
     
     list_filter = (
+        'current_status',
         'service_type', 
         'pickup_city',
         'delivery_city',
@@ -49,6 +68,8 @@ class JobAdmin(admin.ModelAdmin):
         'created_at'
     )
     
+    # Searches go through the indexed search document (get_search_results);
+    # search_fields stays set so the search box and autocompletes are enabled
     search_fields = (
         'job_number', # Search by simplified ID
         'id', 
@@ -115,4 +136,26 @@ class JobAdmin(admin.ModelAdmin):
     date_hierarchy = 'created_at'
     
     # Show most recent jobs first by default
-    ordering = ('-created_at',)
\ No newline at end of file
+    ordering = ('-created_at',)
+
+    # Large job tables: estimate the changelist total and skip the second
+    # unfiltered COUNT(*)
+    paginator = ApproximateCountPaginator
+    show_full_result_count = False
+
+    def get_search_results(self, request, queryset, search_term):
+        return search_jobs(queryset, search_term), False
+
+    def get_changelist(self, request, **kwargs):
+        return JobChangeList
+
+    def save_model(self, request, obj, form, change):
+        if change:
+            return super().save_model(request, obj, form, change)
+
+        # Same records as the API booking path (apps/orders/services.py)
+        with transaction.atomic():
+            obj.current_status = JobTimeline.Status.ORDER_PLACED
+            obj.current_status_at = timezone.now()
+            super().save_model(request, obj, form, change)
+            create_job_records(obj)
\ No newline at end of file
@@ -1,15 +1,28 @@
 # apps/orders/apps.py
 
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
+
+
+def ensure_search_index(sender, using, **kwargs):
+    # SQLite migrations that rebuild orders_job drop its FTS triggers
+    from django.db import connections
+    from .search import install_search_index
+    connection = connections[using]
+    if 'orders_job' not in connection.introspection.table_names():
+        return
+    with connection.cursor() as cursor:
+        columns = connection.introspection.get_table_description(cursor, 'orders_job')
+    # Not after migrating back past 0013_job_search_document
+    if any(column.name == 'search_document' for column in columns):
+        install_search_index(connection)
+
 
 class OrdersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.orders'
 
     def ready(self):
-        """
-        This method is called when the app is fully loaded.
-        We import our signals here to ensure they are registered.
-        """
-        # The following line is crucial for your signals to work.
-        import apps.orders.signals
\ No newline at end of file
+        post_migrate.connect(ensure_search_index, sender=self)
+        # Tracking read model refresh and cache invalidation
+        import apps.orders.signals
@@ -5,97 +5,88 @@ Customer-facing job/order API views
 
 from rest_framework import viewsets, filters, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from django.db.models import Q
+from django.db.models import Count, Q
+from django.utils.http import parse_etags
 from django_filters.rest_framework import DjangoFilterBackend
 from .models import Job, JobTimeline
-from .serializers import JobSerializer, JobTimelineSerializer
+from .search import JobSearchFilter
+from .tracking import get_tracking, parse_tracking_id
+from .serializers import JobSerializer, JobListSerializer, JobTimelineSerializer
+from apps.core.fieldsets import SparseFieldsetViewMixin
+from apps.core.pagination import KeysetPagination
 
 
-class CustomerJobViewSet(viewsets.ReadOnlyModelViewSet):
+class CustomerJobViewSet(SparseFieldsetViewMixin, viewsets.ReadOnlyModelViewSet):
     """
     Customer job management (read-only for customers)
     GET /api/v1/customers/me/orders/ - List customer's jobs with filtering
+    GET /api/v1/customers/me/orders/?q=toronto - Ranked search
     GET /api/v1/customers/me/orders/{id}/ - Get job detail with timeline
     """
     serializer_class = JobSerializer
     permission_classes = [IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    pagination_class = KeysetPagination
+    list_serializer_class = JobListSerializer
+    field_select_related = {'customer': ['customer'], 'status': ['shipment']}
+    field_prefetch_related = {'timeline': ['timeline']}
+    # ?q= is ranked full-text search over the job's search document
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, JobSearchFilter]
     filterset_fields = ['service_type']
-    search_fields = ['id', 'pickup_address', 'delivery_address', 'pickup_city', 'delivery_city']
     ordering_fields = ['created_at', 'requested_pickup_date']
-    ordering = ['-created_at']
+    ordering = ['-created_at', '-id']
 
     def get_queryset(self):
         # Only return jobs for the current user
-        queryset = Job.objects.filter(customer=self.request.user).prefetch_related('timeline')
+        queryset = Job.objects.filter(customer=self.request.user).select_related(
+            'customer', 'shipment'
+        ).prefetch_related('timeline')
         
         # Filter by status if provided
         status_param = self.request.query_params.get('status', None)
         if status_param:
-            # Filter by timeline status
-            queryset = queryset.filter(timeline__status=status_param, timeline__is_current=True)
+            # Served by the (customer, current_status) index
+            queryset = queryset.filter(current_status=status_param)
         
         return queryset
 
     @action(detail=False, methods=['get'])
     def stats(self, request):
         """Get customer order statistics"""
-        total = self.get_queryset().count()
-        in_transit = self.get_queryset().filter(
-            timeline__status=JobTimeline.Status.IN_TRANSIT,
-            timeline__is_current=True
-        ).count()
-        delivered = self.get_queryset().filter(
-            timeline__status=JobTimeline.Status.DELIVERED,
-            timeline__is_current=True
-        ).count()
+        counts = Job.objects.filter(customer=request.user).aggregate(
+            total=Count('id'),
+            in_transit=Count('id', filter=Q(current_status=JobTimeline.Status.IN_TRANSIT)),
+            delivered=Count('id', filter=Q(current_status=JobTimeline.Status.DELIVERED)),
+        )
         
         return Response({
-            'total': total,
-            'active': in_transit,
-            'completed': delivered,
+            'total': counts['total'],
+            'active': counts['in_transit'],
+            'completed': counts['delivered'],
         })
 
 
-class TrackingViewSet(viewsets.ReadOnlyModelViewSet):
+class TrackingViewSet(viewsets.ViewSet):
     """
     Public tracking endpoint (no auth required)
-    GET /api/v1/tracking/{job_id}/ - Get tracking information
+    GET /api/v1/tracking/{job_id or job_number}/ - Get tracking information
+    Served from the JobTracking read model only, never the job itself;
+    responses are cached and carry an ETag, send If-None-Match to get a 304
+    (see apps/orders/tracking.py).
     """
-    serializer_class = JobSerializer
+    authentication_classes = []  # Public endpoint; skip the user lookup
     permission_classes = []  # Public endpoint
-    lookup_field = 'id'
-
-    def get_queryset(self):
-        return Job.objects.all().prefetch_related('timeline')
 
     def retrieve(self, request, *args, **kwargs):
         """Get tracking details for a specific job"""
-        instance = self.get_object()
-        serializer = self.get_serializer(instance)
-        
-        # Include additional tracking-specific data
-        data = serializer.data
-        
-        # Add current location from most recent timeline entry
-        current_timeline = instance.timeline.filter(is_current=True).first()
-        if current_timeline:
-            data['current_location'] = current_timeline.location
-            data['current_status'] = current_timeline.get_status_display()
-        else:
-            data['current_location'] = instance.pickup_city
-            data['current_status'] = 'Pending'
-        
-        # Add driver info if assigned (this would come from transportation app)
-        # For now, return placeholder
-        data['driver'] = None
-        
-        # Add proof of delivery if exists
-        data['proof'] = {
-            'signature': None,
-            'photo': None
-        }
-        
-        return Response(data)
+        lookup = parse_tracking_id(kwargs.get('id') or kwargs.get('tracking_id'))
+        entry = get_tracking(lookup) if lookup else None
+        if entry is None:
+            raise NotFound('Job not found.')
+
+        headers = {'ETag': entry['etag'], 'Cache-Control': 'no-cache'}
+        if entry['etag'] in parse_etags(request.headers.get('If-None-Match', '')):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response(entry['payload'], headers=headers)
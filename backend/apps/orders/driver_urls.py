@@ -1,10 +1,19 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .driver_views import DriverJobViewSet
+from apps.transportation.views import (
+    DriverLocationView, DriverPushTokenView, DriverRouteView, DriverUploadViewSet,
+)
+from apps.transportation.assignments import assignment_feed
 
 router = DefaultRouter()
 router.register(r'jobs', DriverJobViewSet, basename='driver-job')
+router.register(r'uploads', DriverUploadViewSet, basename='driver-upload')
 
 urlpatterns = [
     path('', include(router.urls)),
+    path('location/', DriverLocationView.as_view(), name='driver-location'),
+    path('assignments/', assignment_feed, name='driver-assignments'),
+    path('push-token/', DriverPushTokenView.as_view(), name='driver-push-token'),
+    path('route/', DriverRouteView.as_view(), name='driver-route'),
 ]
@@ -1,10 +1,14 @@
 from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from django.db import transaction
 from django.utils import timezone
 from .models import Job, JobTimeline
-from .serializers import DriverJobSerializer, DriverJobUpdateSerializer
+from .serializers import DriverJobSerializer, DriverJobUpdateSerializer, DriverSyncSerializer
+from .sync import delta_sync, sync_driver_events
 from apps.users.models import User
+from apps.transportation.media import spool_media
+from apps.transportation.models import MediaStatus
 
 class DriverJobViewSet(viewsets.ReadOnlyModelViewSet):
     """
@@ -19,9 +23,26 @@ class DriverJobViewSet(viewsets.ReadOnlyModelViewSet):
         user = self.request.user
         if user.role == User.Role.DRIVER:
              # Ensure the user has a Driver profile and filter shipments
-             return Job.objects.filter(shipment__driver__user=user).select_related('shipment').order_by('-created_at')
+             return Job.objects.filter(shipment__driver__user=user).select_related(
+                 'customer', 'shipment__driver__user'
+             ).order_by('-created_at')
         return Job.objects.none()
 
+    def list(self, request, *args, **kwargs):
+        """``?since=<watermark>`` returns only what changed (see apps/orders/sync.py)."""
+        if 'since' not in request.query_params:
+            return super().list(request, *args, **kwargs)
+        delta = delta_sync(
+            getattr(request.user, 'driver_profile', None), request.query_params['since'],
+            self.get_queryset(), job_prefix='', shipment_prefix='shipment__',
+        )
+        return Response({
+            'results': self.get_serializer(delta['queryset'], many=True).data,
+            'removed': delta['removed'],
+            'watermark': delta['watermark'],
+            'full': delta['full'],
+        })
+
     @action(detail=True, methods=['post'], serializer_class=DriverJobUpdateSerializer)
     def update_status(self, request, job_number=None, pk=None):
         job = self.get_object()
@@ -32,28 +53,40 @@ class DriverJobViewSet(viewsets.ReadOnlyModelViewSet):
             location = serializer.validated_data.get('location', '')
             description = serializer.validated_data.get('description', '')
 
-            # Create new timeline entry
-            JobTimeline.objects.create(
-                job=job,
-                status=new_status,
-                location=location,
-                description=description,
-                timestamp=timezone.now(),
-                is_current=True
-            )
-            
-            # Auto-update Shipment status if applicable
-            if hasattr(job, 'shipment'):
-                if new_status == 'IN_TRANSIT':
-                    job.shipment.status = 'IN_TRANSIT'
-                elif new_status == 'DELIVERED':
-                    job.shipment.status = 'DELIVERED'
-                job.shipment.save()
+            with transaction.atomic():
+                # Create new timeline entry (also refreshes job.current_status)
+                JobTimeline.objects.create(
+                    job=job,
+                    status=new_status,
+                    location=location,
+                    description=description,
+                    timestamp=timezone.now(),
+                    is_current=True
+                )
+                
+                # Auto-update Shipment status if applicable
+                if hasattr(job, 'shipment'):
+                    if new_status == 'IN_TRANSIT':
+                        job.shipment.status = 'IN_TRANSIT'
+                    elif new_status == 'DELIVERED':
+                        job.shipment.status = 'DELIVERED'
+                    job.shipment.save()
             
             return Response({'status': 'success', 'new_status': new_status})
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    @action(detail=False, methods=['post'], serializer_class=DriverSyncSerializer)
+    def sync(self, request):
+        """
+        Apply status changes queued while offline, all in one request
+        (see apps/orders/sync.py). Returns a result per event, in order.
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        results = sync_driver_events(request.user, serializer.validated_data['events'])
+        return Response({'results': results})
+
     @action(detail=True, methods=['post'], url_path='upload-pod')
     @action(detail=True, methods=['post'], url_path='complete-delivery')
     def complete_delivery(self, request, job_number=None, pk=None):
@@ -62,35 +95,38 @@ class DriverJobViewSet(viewsets.ReadOnlyModelViewSet):
         if not hasattr(job, 'shipment'):
              return Response({'error': 'No shipment associated with this job'}, status=status.HTTP_404_NOT_FOUND)
 
-        # 1. Handle Signature
+        # Files are spooled to disk and uploaded to storage in the background
+        # (see apps/transportation/media.py); shipment, photo and timeline
+        # rows are written together
         signature = request.FILES.get('proof_of_delivery_signature')
-        if signature:
-            job.shipment.proof_of_delivery_signature = signature
-            job.shipment.save()
-
-        # 2. Handle Multiple Photos
         # request.FILES.getlist('photos') handles multiple files with same key
         photos = request.FILES.getlist('photos')
-        for photo in photos:
-            from apps.transportation.models import ShipmentPhoto
-            ShipmentPhoto.objects.create(shipment=job.shipment, image=photo)
 
-        # 3. Update Status to DELIVERED
-        # Note: Frontend calls update_status separately usually, but we can do it here too for atomic completion
-        job.shipment.status = 'DELIVERED'
-        job.shipment.save()
-        
-        # Also update JobTimeline
-        JobTimeline.objects.create(
-            job=job,
-            status='DELIVERED',
-            location='Driver Location',
-            description='Delivery completed with Proof of Delivery',
-            timestamp=timezone.now(),
-            is_current=True
-        )
+        with transaction.atomic():
+            shipment = job.shipment
+            spool_media(shipment, signature=signature, photos=photos)
+            shipment.status = 'DELIVERED'
+            shipment.save()
+            
+            # Also update JobTimeline (and with it job.current_status)
+            JobTimeline.objects.create(
+                job=job,
+                status='DELIVERED',
+                location='Driver Location',
+                description='Delivery completed with Proof of Delivery',
+                timestamp=timezone.now(),
+                is_current=True
+            )
 
-        return Response({'status': 'success', 'message': 'Delivery completed successfully'})
+        return Response(
+            {
+                'status': 'success',
+                'message': 'Delivery completed successfully',
+                # PENDING until the files are in storage
+                'media_status': shipment.media_status,
+            },
+            status=status.HTTP_202_ACCEPTED if shipment.media_status == MediaStatus.PENDING else status.HTTP_200_OK,
+        )
 
     # Keep old endpoint for backwards compatibility if needed, but implementation updated
     @action(detail=True, methods=['post'], url_path='upload-pod')
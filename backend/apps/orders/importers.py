@@ -0,0 +1,170 @@
+# apps/orders/importers.py
+"""
+Bulk job import from CSV or NDJSON.
+
+Rows are parsed lazily from the input, validated with the JobSerializer
+field rules in batches and written with one bulk INSERT per table per
+batch. Each batch commits on its own, so a bad row never discards the rest of the
+file: a batch the database refuses is retried in halves until only the
+rows it refuses are left. Every failure is reported with its row number.
+"""
+
+import codecs
+import csv
+import json
+
+from django.db import DatabaseError
+from rest_framework.exceptions import ValidationError
+
+from .models import Job
+from .serializers import JobSerializer
+from .services import bulk_create_jobs, new_job
+
+CSV = 'csv'
+NDJSON = 'ndjson'
+FORMATS = (CSV, NDJSON)
+DEFAULT_BATCH_SIZE = 1000
+
+
+def detect_format(filename, content_type=''):
+    """Guess the import format from a file name or content type."""
+    name = (filename or '').lower()
+    if name.endswith(('.ndjson', '.jsonl')) or 'ndjson' in content_type:
+        return NDJSON
+    return CSV
+
+
+def decode_lines(byte_lines, encoding='utf-8-sig'):
+    """Decode an iterable of byte lines (e.g. an UploadedFile) lazily."""
+    return codecs.iterdecode(byte_lines, encoding)
+
+
+def iter_rows(lines, fmt):
+    """
+    Yield ``(row_number, data, error)`` for every record in ``lines``.
+    Row numbers are 1-based and count data rows, not the CSV header.
+    """
+    if fmt == CSV:
+        for number, row in enumerate(csv.DictReader(lines), start=1):
+            # Blank cells mean "not provided", so model defaults apply
+            yield number, {k: v for k, v in row.items() if k and v not in ('', None)}, None
+        return
+
+    number = 0
+    for line in lines:
+        if not line.strip():
+            continue
+        number += 1
+        try:
+            data = json.loads(line)
+        except ValueError as e:
+            yield number, None, {'non_field_errors': [f'Invalid JSON: {e}']}
+            continue
+        if not isinstance(data, dict):
+            yield number, None, {'non_field_errors': ['Each line must be a JSON object.']}
+            continue
+        yield number, data, None
+
+
+class JobImportSerializer(JobSerializer):
+    """
+    JobSerializer rules for import rows. The customer is chosen for the whole
+    import, and bol_number uniqueness is checked once per batch by the
+    importer instead of with a query per row.
+    """
+    customer = None
+    customer_id = None
+
+    class Meta(JobSerializer.Meta):
+        fields = [f for f in JobSerializer.Meta.fields if f not in ('customer', 'customer_id')]
+        extra_kwargs = {'bol_number': {'validators': []}}
+
+
+class JobImporter:
+    """
+    Import jobs for ``customer`` from parsed rows.
+
+        report = JobImporter(customer=user).run(iter_rows(lines, CSV))
+    """
+
+    def __init__(self, customer=None, batch_size=DEFAULT_BATCH_SIZE):
+        self.customer = customer
+        self.batch_size = batch_size
+        self.created = 0
+        self.errors = []
+        self._seen_bol_numbers = set()
+        # One serializer validates every row, the way ListSerializer reuses its
+        # child; building the ModelSerializer fields per row dominates otherwise.
+        self._serializer = JobImportSerializer()
+
+    def run(self, rows):
+        batch = []
+        for number, data, error in rows:
+            if error:
+                self.errors.append({'row': number, 'errors': error})
+                continue
+            batch.append((number, data))
+            if len(batch) >= self.batch_size:
+                self._import_batch(batch)
+                batch = []
+        if batch:
+            self._import_batch(batch)
+        return self.report()
+
+    def report(self):
+        return {
+            'created': self.created,
+            'failed': len(self.errors),
+            'errors': sorted(self.errors, key=lambda e: e['row']),
+        }
+
+    def _import_batch(self, batch):
+        valid = []
+        for number, data in batch:
+            try:
+                valid.append((number, self._serializer.run_validation(data)))
+            except ValidationError as e:
+                self.errors.append({'row': number, 'errors': e.detail})
+
+        valid = self._drop_duplicate_bol_numbers(valid)
+        if valid:
+            self._insert(valid)
+
+    def _insert(self, valid):
+        """Insert ``valid`` rows, splitting a refused batch to find the rows at fault."""
+        # Fresh instances each attempt: a failed bulk_create leaves its numbers on them
+        jobs = [new_job(customer=self.customer, **fields) for _, fields in valid]
+        try:
+            bulk_create_jobs(jobs)
+        except DatabaseError as e:
+            if len(valid) == 1:
+                self.errors.append({'row': valid[0][0], 'errors': {'non_field_errors': [str(e)]}})
+                return
+            middle = len(valid) // 2
+            self._insert(valid[:middle])
+            self._insert(valid[middle:])
+            return
+        self.created += len(jobs)
+        # Only once saved, so the rows of a failed insert do not block their BOL numbers
+        self._seen_bol_numbers.update(fields['bol_number'] for _, fields in valid if fields.get('bol_number'))
+
+    def _drop_duplicate_bol_numbers(self, valid):
+        bol_numbers = {fields['bol_number'] for _, fields in valid if fields.get('bol_number')}
+        taken = set(
+            Job.objects.filter(bol_number__in=bol_numbers).values_list('bol_number', flat=True)
+        ) if bol_numbers else set()
+
+        kept = []
+        for number, fields in valid:
+            bol_number = fields.get('bol_number')
+            if bol_number and (bol_number in taken or bol_number in self._seen_bol_numbers):
+                self.errors.append({
+                    'row': number,
+                    'errors': {'bol_number': ['job with this bol number already exists.']},
+                })
+                continue
+            if bol_number:
+                # Earlier rows of the batch; the whole file once the batch is saved (_insert)
+                taken.add(bol_number)
+            kept.append((number, fields))
+        return kept
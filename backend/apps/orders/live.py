@@ -0,0 +1,84 @@
+# apps/orders/live.py
+"""
+Live job updates (Server-Sent Events, see apps/core/live.py).
+
+    GET /api/v1/tracking/<id or job number>/stream/   public, one job
+    GET /api/v1/live/jobs/                            admins and managers, all jobs
+
+Both send the job's tracking snapshot (the same payload as
+``/api/v1/tracking/<id>/``, with its ETag as the event id) as a
+``tracking`` event whenever its status, shipment or proof of delivery
+changes, so pages can stop polling.
+"""
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from rest_framework.exceptions import AuthenticationFailed, PermissionDenied
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from apps.core.live import event_stream_response, publish, subscribe
+from apps.users.models import User
+
+from .tracking import get_tracking, parse_tracking_id
+
+JOBS_CHANNEL = 'jobs'
+
+
+def job_channel(job_id):
+    return f'job:{job_id}'
+
+
+def tracking_event(entry):
+    return {'type': 'tracking', 'id': entry['etag'].strip('"'), 'data': entry['payload']}
+
+
+def publish_tracking(job_id):
+    """Push a job's current tracking snapshot to its streams."""
+    entry = get_tracking({'job_id': job_id})
+    if entry is None:
+        return
+    event = tracking_event(entry)
+    publish(job_channel(job_id), event)
+    publish(JOBS_CHANNEL, event)
+
+
+async def tracking_stream(request, tracking_id):
+    lookup = parse_tracking_id(tracking_id)
+    entry = await sync_to_async(get_tracking)(lookup) if lookup else None
+    if entry is None:
+        return JsonResponse({'detail': 'Job not found.'}, status=404)
+
+    job_id = entry['payload']['id']
+    subscription = subscribe(job_channel(job_id))
+    # Read again now that we are subscribed, so no change can fall in between
+    entry = await sync_to_async(get_tracking)({'job_id': job_id})
+    if entry is None:
+        # Deleted in between
+        subscription.close()
+        return JsonResponse({'detail': 'Job not found.'}, status=404)
+    event = tracking_event(entry)
+    # A reconnecting client that already has this snapshot does not need it again
+    initial = [] if request.headers.get('Last-Event-ID') == event['id'] else [event]
+    return event_stream_response(subscription, initial)
+
+
+def _authenticate_staff(request):
+    """The requesting admin or manager; raises AuthenticationFailed or PermissionDenied."""
+    result = JWTAuthentication().authenticate(request)
+    if result is None:
+        raise AuthenticationFailed('Authentication credentials were not provided.')
+    user = result[0]
+    if user.role not in (User.Role.ADMIN, User.Role.MANAGER):
+        raise PermissionDenied
+    return user
+
+
+async def jobs_stream(request):
+    try:
+        await sync_to_async(_authenticate_staff)(request)
+    except AuthenticationFailed as exc:
+        detail = exc.detail if isinstance(exc.detail, dict) else {'detail': exc.detail}
+        return JsonResponse(detail, status=401)
+    except PermissionDenied as exc:
+        return JsonResponse({'detail': exc.detail}, status=403)
+    return event_stream_response(subscribe(JOBS_CHANNEL))
@@ -0,0 +1,123 @@
+"""
+Base class for chunked backfill commands.
+
+Rows are walked in primary-key order, ``--batch-size`` at a time
+(``WHERE pk > last ORDER BY pk LIMIT n``, so every batch is an index range
+scan). Each batch is changed in memory by ``process_batch`` and written
+with one ``bulk_update`` in its own transaction, together with a checkpoint
+so an interrupted run can continue with ``--resume``. ``--dry-run`` runs
+the same batches but rolls every one of them back.
+
+    class Command(BackfillCommand):
+        help = '...'
+        model = Job
+        update_fields = ['job_number']
+
+        def get_queryset(self):
+            return Job.objects.filter(job_number__isnull=True)
+
+        def process_batch(self, objects):
+            ...
+            return objects
+"""
+
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.orders.models import BackfillCheckpoint
+
+
+class BackfillCommand(BaseCommand):
+    model = None
+    update_fields = []
+    default_batch_size = 1000
+    # Defaults to the command's module name
+    checkpoint_name = None
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=self.default_batch_size)
+        parser.add_argument('--dry-run', action='store_true', help='Process every batch, then roll it back')
+        parser.add_argument('--resume', action='store_true', help='Continue after the last saved checkpoint')
+        parser.add_argument('--pause', type=float, default=0, help='Seconds to sleep between batches')
+
+    # -- Hooks ---------------------------------------------------------------
+
+    def get_queryset(self):
+        """Rows that need backfilling."""
+        return self.model._default_manager.all()
+
+    def process_batch(self, objects):
+        """Change ``objects`` in memory; return the ones to write."""
+        raise NotImplementedError
+
+    # -- Runner --------------------------------------------------------------
+
+    def get_checkpoint_name(self):
+        return self.checkpoint_name or self.__class__.__module__.rsplit('.', 1)[-1]
+
+    def handle(self, *args, **options):
+        self.batch_size = options['batch_size']
+        self.dry_run = options['dry_run']
+        name = self.get_checkpoint_name()
+        pk_field = self.model._meta.pk
+
+        checkpoint = BackfillCheckpoint.objects.filter(name=name).first()
+        last_pk, processed = None, 0
+        if options['resume'] and checkpoint:
+            last_pk, processed = pk_field.to_python(checkpoint.last_pk), checkpoint.processed
+            self.stdout.write(f'Resuming {name} after {last_pk} ({processed} rows already done).')
+        elif checkpoint and not self.dry_run:
+            checkpoint.delete()
+
+        queryset = self.get_queryset().order_by('pk')
+        if last_pk is not None:
+            queryset = queryset.filter(pk__gt=last_pk)
+        total = queryset.count()
+        if not total:
+            self.stdout.write(self.style.SUCCESS('Nothing to backfill.'))
+            return
+
+        prefix = '[dry run] ' if self.dry_run else ''
+        self.stdout.write(f'{prefix}Backfilling {total} rows in batches of {self.batch_size}...')
+
+        started, done, updated = time.monotonic(), 0, 0
+        while True:
+            with transaction.atomic():
+                remaining = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+                batch = list(remaining[:self.batch_size])
+                if not batch:
+                    break
+                changed = self.process_batch(batch)
+                if changed:
+                    self.model._default_manager.bulk_update(changed, self.update_fields)
+                last_pk = batch[-1].pk
+                if self.dry_run:
+                    transaction.set_rollback(True)
+                else:
+                    BackfillCheckpoint.objects.update_or_create(
+                        name=name,
+                        defaults={'last_pk': str(last_pk), 'processed': processed + done + len(batch)},
+                    )
+
+            done += len(batch)
+            updated += len(changed)
+            self.write_progress(done, total, started)
+            if options['pause']:
+                time.sleep(options['pause'])
+
+        if not self.dry_run:
+            BackfillCheckpoint.objects.filter(name=name).delete()
+        verb = 'Would update' if self.dry_run else 'Updated'
+        self.stdout.write(self.style.SUCCESS(f'{prefix}{verb} {updated} of {done} rows.'))
+
+    def write_progress(self, done, total, started):
+        elapsed = time.monotonic() - started
+        rate = done / elapsed if elapsed else 0
+        # Rows can appear or vanish during the run; never report past 100%
+        remaining = max(total - done, 0)
+        eta = timedelta(seconds=round(remaining / rate)) if rate else '?'
+        percent = min(done / total * 100, 100)
+        self.stdout.write(f'  {done}/{total} ({percent:.1f}%) {rate:.0f} rows/s, ETA {eta}')
@@ -1,27 +1,23 @@
-from django.core.management.base import BaseCommand
 from apps.orders.models import Job
+from apps.orders.numbering import job_number_allocator
+from apps.orders.search import build_search_document
+from ._backfill import BackfillCommand
 
-class Command(BaseCommand):
+class Command(BackfillCommand):
     help = 'Backfills missing job_number for existing Jobs'
+    model = Job
+    update_fields = ['job_number', 'search_document']
+    default_batch_size = 500
 
-    def handle(self, *args, **kwargs):
-        jobs_without_number = Job.objects.filter(job_number__isnull=True).order_by('created_at')
-        
-        if not jobs_without_number.exists():
-            self.stdout.write(self.style.SUCCESS('No jobs found with missing job_number.'))
-            return
+    def get_queryset(self):
+        return Job.objects.filter(job_number__isnull=True).select_related('customer')
 
-        count = jobs_without_number.count()
-        self.stdout.write(f'Found {count} jobs without job_number. Starting backfill...')
-
-        # Find the current max job number or start at 1000
-        last_job = Job.objects.order_by('-job_number').first()
-        current_number = last_job.job_number if (last_job and last_job.job_number) else 1000
-
-        for job in jobs_without_number:
-            current_number += 1
-            job.job_number = current_number
-            job.save(update_fields=['job_number'])
-            self.stdout.write(f'Assigned Job #{job.job_number} to Job {job.id}')
-
-        self.stdout.write(self.style.SUCCESS(f'Successfully backfilled {count} jobs.'))
+    def process_batch(self, jobs):
+        if self.dry_run:
+            # Reserving numbers would use them up even if rolled back
+            return jobs
+        # One block of numbers per batch instead of a MAX() scan per job
+        for job, number in zip(jobs, job_number_allocator.allocate(len(jobs))):
+            job.job_number = number
+            job.search_document = build_search_document(job)
+        return jobs
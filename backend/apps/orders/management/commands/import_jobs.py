@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+from apps.orders.importers import FORMATS, DEFAULT_BATCH_SIZE, JobImporter, detect_format, iter_rows
+from apps.users.models import User
+
+class Command(BaseCommand):
+    help = 'Imports jobs from a CSV or NDJSON file (one job per row)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or NDJSON file to import')
+        parser.add_argument('--format', choices=FORMATS, help='Defaults to the file extension')
+        parser.add_argument('--customer', help='Email or username of the customer the jobs belong to')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        customer = None
+        if options['customer']:
+            customer = User.objects.filter(email=options['customer']).first() or \
+                User.objects.filter(username=options['customer']).first()
+            if customer is None:
+                raise CommandError(f"Customer '{options['customer']}' not found.")
+
+        fmt = options['format'] or detect_format(options['path'])
+        importer = JobImporter(customer=customer, batch_size=options['batch_size'])
+
+        try:
+            with open(options['path'], encoding='utf-8-sig', newline='') as lines:
+                report = importer.run(iter_rows(lines, fmt))
+        except OSError as e:
+            raise CommandError(str(e))
+
+        for error in report['errors']:
+            self.stderr.write(f"Row {error['row']}: {error['errors']}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {report['created']} jobs ({report['failed']} rows failed)."
+        ))
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.6 on 2026-10-17 06:55
+
+from django.db import migrations, models
+from django.db.models import Max
+
+FIRST_JOB_NUMBER = 1001
+
+
+def seed_job_number_sequence(apps, schema_editor):
+    Job = apps.get_model("orders", "Job")
+    JobNumberSequence = apps.get_model("orders", "JobNumberSequence")
+    highest = Job.objects.aggregate(highest=Max("job_number"))["highest"]
+    next_value = max((highest or 0) + 1, FIRST_JOB_NUMBER)
+
+    JobNumberSequence.objects.update_or_create(
+        name="job_number", defaults={"next_value": next_value}
+    )
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(
+            "CREATE SEQUENCE IF NOT EXISTS orders_job_number_seq START WITH %s"
+            % int(next_value)
+        )
+
+
+def drop_job_number_sequence(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute("DROP SEQUENCE IF EXISTS orders_job_number_seq")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("orders", "0009_job_bol_number_job_crew_size_job_estimated_items_and_more"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="JobNumberSequence",
+            fields=[
+                (
+                    "name",
+                    models.CharField(max_length=50, primary_key=True, serialize=False),
+                ),
+                ("next_value", models.PositiveBigIntegerField()),
+            ],
+        ),
+        migrations.RunPython(seed_job_number_sequence, drop_job_number_sequence),
+    ]
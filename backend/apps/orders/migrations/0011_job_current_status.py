@@ -0,0 +1,47 @@
+# Generated by Django 5.2.6 on 2026-10-17 06:56
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_current_status(apps, schema_editor):
+    Job = apps.get_model("orders", "Job")
+    JobTimeline = apps.get_model("orders", "JobTimeline")
+    current = JobTimeline.objects.filter(job=OuterRef("pk"), is_current=True).order_by(
+        "-timestamp"
+    )
+    Job.objects.update(
+        current_status=Subquery(current.values("status")[:1]),
+        current_status_at=Subquery(current.values("timestamp")[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("orders", "0010_jobnumbersequence"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="job",
+            name="current_status",
+            field=models.CharField(
+                blank=True, db_index=True, editable=False, max_length=50, null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="job",
+            name="current_status_at",
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="job",
+            index=models.Index(
+                fields=["customer", "current_status"], name="orders_job_cust_status_idx"
+            ),
+        ),
+        migrations.RunPython(backfill_current_status, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.6 on 2026-10-17 07:03
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("orders", "0011_job_current_status"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="job",
+            index=models.Index(
+                fields=["created_at", "id"], name="orders_job_created_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="job",
+            index=models.Index(
+                fields=["customer", "created_at", "id"],
+                name="orders_job_cust_created_idx",
+            ),
+        ),
+    ]
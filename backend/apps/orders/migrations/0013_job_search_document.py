@@ -0,0 +1,49 @@
+# Generated by Django 5.2.6 on 2026-10-17 07:09
+
+from django.db import migrations, models
+
+from apps.orders.search import (
+    build_search_document,
+    install_search_index,
+    uninstall_search_index,
+)
+
+BATCH_SIZE = 1000
+
+
+def backfill_search_document(apps, schema_editor):
+    Job = apps.get_model("orders", "Job")
+    batch = []
+    for job in Job.objects.select_related("customer").iterator(chunk_size=BATCH_SIZE):
+        job.search_document = build_search_document(job)
+        batch.append(job)
+        if len(batch) >= BATCH_SIZE:
+            Job.objects.bulk_update(batch, ["search_document"])
+            batch = []
+    if batch:
+        Job.objects.bulk_update(batch, ["search_document"])
+
+
+def install(apps, schema_editor):
+    install_search_index(schema_editor.connection)
+
+
+def uninstall(apps, schema_editor):
+    uninstall_search_index(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("orders", "0012_job_orders_job_created_idx_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="job",
+            name="search_document",
+            field=models.TextField(blank=True, default="", editable=False),
+        ),
+        migrations.RunPython(backfill_search_document, migrations.RunPython.noop),
+        migrations.RunPython(install, uninstall),
+    ]
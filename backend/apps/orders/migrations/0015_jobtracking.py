@@ -0,0 +1,44 @@
+# Generated by Django 5.2.6 on 2026-10-17 07:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("orders", "0014_backfillcheckpoint"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="JobTracking",
+            fields=[
+                (
+                    "job",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="tracking",
+                        serialize=False,
+                        to="orders.job",
+                    ),
+                ),
+                (
+                    "job_number",
+                    models.PositiveIntegerField(blank=True, null=True, unique=True),
+                ),
+                ("status", models.CharField(max_length=50)),
+                ("status_display", models.CharField(max_length=100)),
+                ("current_location", models.CharField(blank=True, max_length=255)),
+                ("pickup_city", models.CharField(max_length=100)),
+                ("delivery_city", models.CharField(max_length=100)),
+                ("estimated_delivery", models.DateTimeField(blank=True, null=True)),
+                ("delivered_at", models.DateTimeField(blank=True, null=True)),
+                ("timeline", models.JSONField(blank=True, default=list)),
+                ("has_signature", models.BooleanField(default=False)),
+                ("has_photo", models.BooleanField(default=False)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
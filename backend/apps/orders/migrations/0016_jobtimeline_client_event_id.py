@@ -0,0 +1,26 @@
+# Generated by Django 5.2.6 on 2026-10-17 07:36
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("orders", "0015_jobtracking"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="jobtimeline",
+            name="client_event_id",
+            field=models.CharField(
+                blank=True, editable=False, max_length=64, null=True, unique=True
+            ),
+        ),
+        migrations.AlterField(
+            model_name="jobtimeline",
+            name="timestamp",
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.6 on 2026-10-17 07:39
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("orders", "0016_jobtimeline_client_event_id"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="job",
+            index=models.Index(fields=["updated_at"], name="orders_job_updated_idx"),
+        ),
+    ]
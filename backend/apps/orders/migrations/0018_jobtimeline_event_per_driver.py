@@ -0,0 +1,63 @@
+# Generated by Django 5.2.6 on 2026-10-17 08:49
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+BATCH_SIZE = 1000
+
+
+def backfill_synced_by(apps, schema_editor):
+    # Events synced so far came from the driver the job is assigned to
+    JobTimeline = apps.get_model("orders", "JobTimeline")
+    entries = JobTimeline.objects.filter(
+        client_event_id__isnull=False, job__shipment__driver__isnull=False
+    ).select_related("job__shipment__driver")
+    batch = []
+    for entry in entries.iterator(chunk_size=BATCH_SIZE):
+        entry.synced_by_id = entry.job.shipment.driver.user_id
+        batch.append(entry)
+        if len(batch) >= BATCH_SIZE:
+            JobTimeline.objects.bulk_update(batch, ["synced_by"])
+            batch = []
+    if batch:
+        JobTimeline.objects.bulk_update(batch, ["synced_by"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("orders", "0017_job_orders_job_updated_idx"),
+        ("transportation", "0014_trip"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="jobtimeline",
+            name="synced_by",
+            field=models.ForeignKey(
+                blank=True,
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="+",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.RunPython(backfill_synced_by, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="jobtimeline",
+            name="client_event_id",
+            field=models.CharField(
+                blank=True, editable=False, max_length=64, null=True
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="jobtimeline",
+            constraint=models.UniqueConstraint(
+                fields=("synced_by", "client_event_id"),
+                name="orders_timeline_event_uniq",
+            ),
+        ),
+    ]
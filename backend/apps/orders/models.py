@@ -1,8 +1,13 @@
 # apps/orders/models.py
 
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
+from django.utils import timezone
 from apps.core.models import BaseModel
+from .numbering import job_number_allocator
+from .search import SEARCH_DOCUMENT_FIELDS, build_search_document
+
+SEARCH_DOCUMENT_UPDATE_FIELDS = {*SEARCH_DOCUMENT_FIELDS, 'customer'}
 
 class Job(BaseModel):
     """
@@ -77,23 +82,67 @@ class Job(BaseModel):
 
     requested_pickup_date = models.DateTimeField()
 
-
     # --- THE 'status' FIELD HAS BEEN REMOVED FROM THIS MODEL ---
+    # Denormalized copy of the current JobTimeline entry, maintained by
+    # JobTimeline.save so lists and filters never have to join the timeline.
+    current_status = models.CharField(max_length=50, null=True, blank=True, editable=False, db_index=True)
+    current_status_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    # Precomputed text for ?q= search, indexed by the database
+    # (see apps/orders/search.py)
+    search_document = models.TextField(blank=True, default='', editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['customer', 'current_status'], name='orders_job_cust_status_idx'),
+            # Keyset pagination (apps/core/pagination.py)
+            models.Index(fields=['created_at', 'id'], name='orders_job_created_idx'),
+            models.Index(fields=['customer', 'created_at', 'id'], name='orders_job_cust_created_idx'),
+            # Driver delta sync (apps/orders/sync.py)
+            models.Index(fields=['updated_at'], name='orders_job_updated_idx'),
+        ]
 
     def save(self, *args, **kwargs):
         if self.job_number is None:
-            # Get the highest job number and increment
-            last_job = Job.objects.order_by('-job_number').first()
-            if last_job and last_job.job_number:
-                self.job_number = last_job.job_number + 1
-            else:
-                self.job_number = 1001  # Start from 1001
+            # Numbers come from a pre-reserved block, see apps/orders/numbering.py
+            self.job_number = job_number_allocator.next()
+        self.search_document = build_search_document(self)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and set(update_fields) & SEARCH_DOCUMENT_UPDATE_FIELDS:
+            kwargs['update_fields'] = {*update_fields, 'search_document'}
         super().save(*args, **kwargs)
 
     def __str__(self):
         return f"Job #{self.job_number or self.id} for {self.customer.username if self.customer else 'N/A'}"
 
 
+class JobNumberSequence(models.Model):
+    """
+    Counter used to reserve blocks of job numbers on databases without
+    native sequences (SQLite). Postgres uses the orders_job_number_seq
+    sequence instead.
+    """
+    name = models.CharField(max_length=50, primary_key=True)
+    next_value = models.PositiveBigIntegerField()
+
+    def __str__(self):
+        return f"{self.name}: {self.next_value}"
+
+
+class BackfillCheckpoint(models.Model):
+    """
+    Progress of a chunked backfill command, so an interrupted run can pick
+    up where it stopped (see management/commands/_backfill.py).
+    """
+    name = models.CharField(max_length=100, primary_key=True)
+    last_pk = models.CharField(max_length=64)
+    processed = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name}: {self.processed} rows"
+
+
 class JobTimeline(BaseModel):
     """
     Tracks the status history of a job from placement to delivery
@@ -108,14 +157,25 @@ class JobTimeline(BaseModel):
 
     job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='timeline')
     status = models.CharField(max_length=50, choices=Status.choices)
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # When it happened; drivers syncing offline report their own time
+    timestamp = models.DateTimeField(default=timezone.now)
     location = models.CharField(max_length=255)
     description = models.TextField()
     completed = models.BooleanField(default=True)
     is_current = models.BooleanField(default=False)
+    # Set by the driver app so replayed events are applied once (see sync.py);
+    # ids are generated on each device, so they are unique per syncing user
+    client_event_id = models.CharField(max_length=64, null=True, blank=True, editable=False)
+    synced_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, editable=False,
+        related_name='+'
+    )
 
     class Meta:
         ordering = ['timestamp']
+        constraints = [
+            models.UniqueConstraint(fields=['synced_by', 'client_event_id'], name='orders_timeline_event_uniq'),
+        ]
         verbose_name = 'Job Timeline'
         verbose_name_plural = 'Job Timelines'
 
@@ -123,10 +183,49 @@ class JobTimeline(BaseModel):
         return f"{self.job.id} - {self.get_status_display()} at {self.timestamp}"
 
     def save(self,  *args, **kwargs):
-        # Ensure only one current status per job
-        if self.is_current:
-            JobTimeline.objects.filter(
-                job=self.job,
-                is_current=True
-            ).exclude(pk=self.pk).update(is_current=False)
-        super().save(*args, **kwargs)
\ No newline at end of file
+        with transaction.atomic():
+            # Ensure only one current status per job
+            if self.is_current:
+                JobTimeline.objects.filter(
+                    job=self.job,
+                    is_current=True
+                ).exclude(pk=self.pk).update(is_current=False)
+            super().save(*args, **kwargs)
+
+            # Keep the denormalized status on the job in step with the timeline.
+            # updated_at moves too: driver delta sync keys off it.
+            if self.is_current:
+                now = timezone.now()
+                Job.objects.filter(pk=self.job_id).update(
+                    current_status=self.status,
+                    current_status_at=self.timestamp,
+                    updated_at=now,
+                )
+                self.job.current_status = self.status
+                self.job.current_status_at = self.timestamp
+                self.job.updated_at = now
+
+
+class JobTracking(models.Model):
+    """
+    Public tracking read model: one row per job with just what the tracking
+    page shows. Written when the job is created and refreshed whenever its
+    status, shipment or proof of delivery changes (see tracking.py).
+    """
+    job = models.OneToOneField(Job, on_delete=models.CASCADE, primary_key=True, related_name='tracking')
+    job_number = models.PositiveIntegerField(unique=True, null=True, blank=True)
+    status = models.CharField(max_length=50)
+    status_display = models.CharField(max_length=100)
+    current_location = models.CharField(max_length=255, blank=True)
+    pickup_city = models.CharField(max_length=100)
+    delivery_city = models.CharField(max_length=100)
+    estimated_delivery = models.DateTimeField(null=True, blank=True)
+    delivered_at = models.DateTimeField(null=True, blank=True)
+    # [{status, status_display, timestamp, location, description, completed}]
+    timeline = models.JSONField(default=list, blank=True)
+    has_signature = models.BooleanField(default=False)
+    has_photo = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Tracking for Job #{self.job_number or self.job_id}: {self.status}"
@@ -0,0 +1,114 @@
+# apps/orders/numbering.py
+"""
+Job number allocation.
+
+Job numbers are handed out from blocks reserved in the database, so a
+booking normally costs no extra query at all and two workers can never
+hand out the same number.
+
+- On Postgres the blocks come from the native ``orders_job_number_seq``
+  sequence. ``nextval`` is not transactional, so a reserved block stays
+  reserved even if the surrounding request rolls back.
+- On other databases (SQLite in development) the blocks come from the
+  ``JobNumberSequence`` table, bumped with a single atomic UPDATE.
+
+Numbers are unique but not gap-free: a worker that exits with part of a
+block unused simply leaves those numbers behind.
+"""
+
+import threading
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Max
+
+JOB_NUMBER_SEQUENCE = 'orders_job_number_seq'
+JOB_NUMBER_SEQUENCE_NAME = 'job_number'
+FIRST_JOB_NUMBER = 1001
+
+
+def _uses_native_sequence():
+    return connection.vendor == 'postgresql'
+
+
+def _next_free_job_number():
+    """First number above anything already stored on a Job."""
+    from .models import Job
+
+    highest = Job.objects.aggregate(highest=Max('job_number'))['highest']
+    return max((highest or 0) + 1, FIRST_JOB_NUMBER)
+
+
+def _reserve_from_sequence(count):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT nextval(%s) FROM generate_series(1, %s)",
+            [JOB_NUMBER_SEQUENCE, count],
+        )
+        return sorted(row[0] for row in cursor.fetchall())
+
+
+def _reserve_from_table(count):
+    from .models import JobNumberSequence
+
+    counter = JobNumberSequence.objects.filter(name=JOB_NUMBER_SEQUENCE_NAME)
+    with transaction.atomic():
+        # The UPDATE takes the write lock, so the read below sees our own bump
+        if not counter.update(next_value=F('next_value') + count):
+            JobNumberSequence.objects.get_or_create(
+                name=JOB_NUMBER_SEQUENCE_NAME,
+                defaults={'next_value': _next_free_job_number()},
+            )
+            counter.update(next_value=F('next_value') + count)
+        end = counter.values_list('next_value', flat=True).get()
+    return list(range(end - count, end))
+
+
+class JobNumberAllocator:
+    """
+    Hands out job numbers from an in-memory block, reserving a new block
+    from the database only when the current one runs out.
+    """
+
+    def __init__(self, block_size=None):
+        self._block_size = block_size
+        self._numbers = []
+        self._lock = threading.Lock()
+
+    @property
+    def block_size(self):
+        return self._block_size or settings.JOB_NUMBER_BLOCK_SIZE
+
+    def next(self):
+        """Return a single unused job number."""
+        return self.allocate(1)[0]
+
+    def allocate(self, count):
+        """
+        Return ``count`` unused job numbers, in ascending order.
+        Bulk callers should ask for everything they need in one call.
+        """
+        with self._lock:
+            if len(self._numbers) < count:
+                self._numbers.extend(self._reserve(count - len(self._numbers)))
+            numbers, self._numbers = self._numbers[:count], self._numbers[count:]
+        return numbers
+
+    def reset(self):
+        """Drop any numbers held in memory (they are never reused)."""
+        with self._lock:
+            self._numbers = []
+
+    def _reserve(self, needed):
+        if _uses_native_sequence():
+            return _reserve_from_sequence(max(needed, self.block_size))
+
+        # A table reservation made inside an outer transaction is undone if
+        # that transaction rolls back, so only cache spare numbers when the
+        # reservation commits on its own.
+        if connection.in_atomic_block:
+            return _reserve_from_table(needed)
+        return _reserve_from_table(max(needed, self.block_size))
+
+
+job_number_allocator = JobNumberAllocator()
@@ -0,0 +1,238 @@
+# apps/orders/search.py
+"""
+Indexed job search.
+
+Every job carries a precomputed ``search_document`` (job number, id,
+addresses, cities, contact names, BOL number and customer username/email)
+that is refreshed whenever the job is saved. The database indexes it:
+
+- Postgres: a generated ``search_vector`` tsvector column with a GIN index
+  for ranked full-text/prefix matching, plus a pg_trgm GIN index on the
+  document for substring matches (partial emails, street numbers, ...).
+- SQLite: an FTS5 shadow table (``orders_job_fts``) kept in step by
+  triggers, ranked with bm25. It is keyed on ``job_number``: the jobs
+  table's primary key is a UUID, and its implicit rowid may be renumbered
+  by VACUUM, which would point the index at the wrong jobs.
+
+All job lists share one contract, ``?q=toronto king``: every term must
+match (as a word prefix), and results come back best match first unless
+the client asks for an explicit ``?ordering=``.
+"""
+
+import re
+
+from django.db import connections
+from django.db.models import BooleanField, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+from rest_framework.filters import BaseFilterBackend, OrderingFilter
+
+SEARCH_QUERY_PARAM = 'q'
+# Accepted for clients written against the old SearchFilter
+LEGACY_SEARCH_QUERY_PARAM = 'search'
+SEARCH_RANK_ANNOTATION = 'search_rank'
+
+# Fields copied into Job.search_document, in order
+SEARCH_DOCUMENT_FIELDS = (
+    'job_number',
+    'id',
+    'bol_number',
+    'pickup_address',
+    'pickup_city',
+    'pickup_contact_person',
+    'delivery_address',
+    'delivery_city',
+    'delivery_contact_person',
+)
+
+FTS_TABLE = 'orders_job_fts'
+SEARCH_VECTOR_COLUMN = 'search_vector'
+TS_CONFIG = 'simple'
+
+_TERM_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def build_search_document(job):
+    """The text indexed for ``job``; lower-cased and space separated."""
+    parts = [getattr(job, name) for name in SEARCH_DOCUMENT_FIELDS]
+    customer = job.customer if job.customer_id else None
+    if customer is not None:
+        parts.extend([customer.username, customer.email])
+    return ' '.join(str(part) for part in parts if part not in (None, '')).lower()
+
+
+def search_terms(query):
+    """Split a free-text query into index terms."""
+    return [term.lower() for term in _TERM_RE.findall(query or '')]
+
+
+# ---------------------------------------------------------------------------
+# Querying
+# ---------------------------------------------------------------------------
+
+def search_jobs(queryset, query):
+    """
+    Filter a Job queryset to rows matching ``query`` and add a
+    ``search_rank`` (higher is better) to order by. An empty query returns
+    the queryset unchanged.
+    """
+    terms = search_terms(query)
+    if not terms:
+        return queryset
+
+    vendor = connections[queryset.db].vendor
+    table = queryset.model._meta.db_table
+    if vendor == 'postgresql':
+        return _search_postgres(queryset, table, query, terms)
+    if vendor == 'sqlite':
+        return _search_sqlite(queryset, table, terms)
+
+    condition = Q()
+    for term in terms:
+        condition &= Q(search_document__contains=term)
+    return queryset.filter(condition).annotate(
+        **{SEARCH_RANK_ANNOTATION: Value(0.0, output_field=FloatField())}
+    )
+
+
+def is_ranked(queryset):
+    """Whether ``queryset`` came through search_jobs."""
+    query = queryset.query
+    return SEARCH_RANK_ANNOTATION in query.annotations or SEARCH_RANK_ANNOTATION in query.extra_select
+
+
+def _search_postgres(queryset, table, query, terms):
+    tsquery = ' & '.join(f'{term}:*' for term in terms)
+    pattern = '%' + re.sub(r'([\\%_])', r'\\\1', query.strip().lower()) + '%'
+
+    # Both sides of the OR are served by a GIN index (bitmap OR)
+    match = RawSQL(
+        f'("{table}"."{SEARCH_VECTOR_COLUMN}" @@ to_tsquery(%s, %s)'
+        f' OR "{table}"."search_document" LIKE %s)',
+        [TS_CONFIG, tsquery, pattern],
+        output_field=BooleanField(),
+    )
+    rank = RawSQL(
+        f'ts_rank("{table}"."{SEARCH_VECTOR_COLUMN}", to_tsquery(%s, %s))'
+        f' + similarity("{table}"."search_document", %s)',
+        [TS_CONFIG, tsquery, query.strip().lower()],
+        output_field=FloatField(),
+    )
+    return queryset.filter(match).annotate(**{SEARCH_RANK_ANNOTATION: rank})
+
+
+def _fts5_query(terms):
+    # Quote every term so FTS5 operators in user input stay literal
+    return ' '.join('"{}"*'.format(term.replace('"', '""')) for term in terms)
+
+
+def _search_sqlite(queryset, table, terms):
+    # FTS5 can only rank (bm25, lower is better) inside the MATCH query
+    # itself, so the shadow table has to be joined; a correlated subquery
+    # per row costs seconds. extra() is the only way to add the join.
+    return queryset.extra(
+        tables=[FTS_TABLE],
+        where=[f'{FTS_TABLE}.rowid = "{table}".job_number', f'{FTS_TABLE} MATCH %s'],
+        params=[_fts5_query(terms)],
+        select={SEARCH_RANK_ANNOTATION: f'-{FTS_TABLE}.rank'},
+    )
+
+
+class JobSearchFilter(BaseFilterBackend):
+    """
+    ``?q=`` for job list views. Place it after OrderingFilter: results are
+    ranked unless the request has its own ``?ordering=``.
+    """
+
+    def get_search_query(self, request):
+        params = request.query_params
+        return params.get(SEARCH_QUERY_PARAM) or params.get(LEGACY_SEARCH_QUERY_PARAM, '')
+
+    def filter_queryset(self, request, queryset, view):
+        query = self.get_search_query(request)
+        if not search_terms(query):
+            return queryset
+        queryset = search_jobs(queryset, query)
+        if not request.query_params.get(OrderingFilter.ordering_param):
+            queryset = queryset.order_by(f'-{SEARCH_RANK_ANNOTATION}', '-created_at', '-id')
+        return queryset
+
+
+# ---------------------------------------------------------------------------
+# Index maintenance
+# ---------------------------------------------------------------------------
+
+def _sqlite_search_index_installed(cursor):
+    cursor.execute(
+        "SELECT COUNT(*) FROM sqlite_master WHERE type = 'trigger' AND name LIKE %s",
+        [f'{FTS_TABLE}_%'],
+    )
+    if cursor.fetchone()[0] != 3:
+        return False
+    # Indexes created before it was keyed on job_number are rebuilt
+    cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE])
+    row = cursor.fetchone()
+    return row is not None and "content_rowid='job_number'" in row[0]
+
+
+def install_search_index(connection):
+    """
+    Create the database side of job search. Idempotent; on SQLite it also
+    restores the triggers when a migration has rebuilt the jobs table.
+    """
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+            cursor.execute(
+                f'ALTER TABLE orders_job ADD COLUMN IF NOT EXISTS {SEARCH_VECTOR_COLUMN} tsvector'
+                f" GENERATED ALWAYS AS (to_tsvector('{TS_CONFIG}', search_document)) STORED"
+            )
+            cursor.execute(
+                'CREATE INDEX IF NOT EXISTS orders_job_search_vector_idx'
+                f' ON orders_job USING gin ({SEARCH_VECTOR_COLUMN})'
+            )
+            cursor.execute(
+                'CREATE INDEX IF NOT EXISTS orders_job_search_trgm_idx'
+                ' ON orders_job USING gin (search_document gin_trgm_ops)'
+            )
+        elif connection.vendor == 'sqlite':
+            if _sqlite_search_index_installed(cursor):
+                return
+            for suffix in ('ai', 'ad', 'au'):
+                cursor.execute(f'DROP TRIGGER IF EXISTS {FTS_TABLE}_{suffix}')
+            cursor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+            cursor.execute(
+                f'CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5('
+                "search_document, content='orders_job', content_rowid='job_number',"
+                " tokenize='unicode61', prefix='2 3')"
+            )
+            # Jobs without a number (never the case once saved) are not indexed
+            insert_new = (
+                f' INSERT INTO {FTS_TABLE}(rowid, search_document)'
+                ' SELECT new.job_number, new.search_document WHERE new.job_number IS NOT NULL;'
+            )
+            delete_old = (
+                f" INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, search_document)"
+                " SELECT 'delete', old.job_number, old.search_document WHERE old.job_number IS NOT NULL;"
+            )
+            cursor.execute(f'CREATE TRIGGER {FTS_TABLE}_ai AFTER INSERT ON orders_job BEGIN{insert_new} END')
+            cursor.execute(f'CREATE TRIGGER {FTS_TABLE}_ad AFTER DELETE ON orders_job BEGIN{delete_old} END')
+            cursor.execute(
+                f'CREATE TRIGGER {FTS_TABLE}_au AFTER UPDATE OF search_document, job_number ON orders_job'
+                f' BEGIN{delete_old}{insert_new} END'
+            )
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE}(rowid, search_document)'
+                ' SELECT job_number, search_document FROM orders_job WHERE job_number IS NOT NULL'
+            )
+
+
+def uninstall_search_index(connection):
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute('DROP INDEX IF EXISTS orders_job_search_trgm_idx')
+            cursor.execute('DROP INDEX IF EXISTS orders_job_search_vector_idx')
+            cursor.execute(f'ALTER TABLE orders_job DROP COLUMN IF EXISTS {SEARCH_VECTOR_COLUMN}')
+        elif connection.vendor == 'sqlite':
+            for suffix in ('ai', 'ad', 'au'):
+                cursor.execute(f'DROP TRIGGER IF EXISTS {FTS_TABLE}_{suffix}')
+            cursor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
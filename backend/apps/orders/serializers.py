@@ -2,8 +2,11 @@
 
 from rest_framework import serializers
 from .models import Job, JobTimeline
+from .services import create_job
+from .tracking import estimated_delivery
 from apps.users.models import User
 from apps.users.serializers import UserSerializer
+from apps.core.fieldsets import SparseFieldsetMixin
 
 
 class JobTimelineSerializer(serializers.ModelSerializer):
@@ -27,9 +30,10 @@ class JobTimelineSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'timestamp']
 
 
-class JobSerializer(serializers.ModelSerializer):
+class JobSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """
     Serializer for the Job model.
+    Supports ?fields= / ?expand= (see apps/core/fieldsets.py).
     """
     customer = UserSerializer(read_only=True)
     customer_id = serializers.PrimaryKeyRelatedField(
@@ -86,33 +90,61 @@ class JobSerializer(serializers.ModelSerializer):
             'updated_at',
         ]
         read_only_fields = ['status', 'estimated_delivery', 'timeline', 'created_at', 'updated_at', 'job_number']
+        expandable_fields = ['customer', 'timeline']
+
+    def create(self, validated_data):
+        # One transaction for the job, its shipment, invoice and timeline
+        return create_job(**validated_data)
 
     def get_status(self, obj):
         """
-        Get status from current timeline entry or shipment
+        Get status from the job's current timeline entry (denormalized onto
+        the job) or, for jobs without a timeline, from the shipment
         """
-        try:
-            # First check if there's a current timeline entry
-            current_timeline = obj.timeline.filter(is_current=True).first()
-            if current_timeline:
-                return current_timeline.status
-            
-            # Fall back to shipment status if available
-            if hasattr(obj, 'shipment') and obj.shipment:
-                return obj.shipment.status
-            return 'PENDING'
-        except Exception:
-            return 'PENDING'
+        if obj.current_status:
+            return obj.current_status
+
+        # Fall back to shipment status if available
+        shipment = getattr(obj, 'shipment', None)
+        if shipment:
+            return shipment.status
+        return 'PENDING'
     
     def get_estimated_delivery(self, obj):
         """
-        Calculate estimated delivery based on pickup date
+        Estimate delivery from the pickup date and the lane's distance
         """
-        from datetime import timedelta
-        if obj.requested_pickup_date:
-            # Add 2-3 days for standard delivery
-            return obj.requested_pickup_date + timedelta(days=3)
-        return None
+        return estimated_delivery(obj)
+
+
+class JobListSerializer(JobSerializer):
+    """
+    Compact job representation for list endpoints using ?fields= / ?expand=.
+    The customer and timeline are only nested when expanded.
+    """
+    customer_id = serializers.UUIDField(read_only=True)
+
+    class Meta(JobSerializer.Meta):
+        fields = [
+            'id',
+            'job_number',
+            'customer_id',
+            'customer',
+            'status',
+            'job_type',
+            'service_type',
+            'pallet_count',
+            'weight_lbs',
+            'pickup_address',
+            'pickup_city',
+            'delivery_address',
+            'delivery_city',
+            'requested_pickup_date',
+            'estimated_delivery',
+            'timeline',
+            'created_at',
+            'updated_at',
+        ]
 
 
 class DriverJobSerializer(serializers.ModelSerializer):
@@ -123,6 +155,7 @@ class DriverJobSerializer(serializers.ModelSerializer):
     customer_phone = serializers.CharField(source='customer.phone_number', read_only=True)
     status = serializers.SerializerMethodField()
     proof_of_delivery_image = serializers.SerializerMethodField()
+    media_status = serializers.SerializerMethodField()
     assigned_driver = serializers.SerializerMethodField()
     # Alias job_number to job_id to match frontend JobDetail interface
     job_id = serializers.IntegerField(source='job_number', read_only=True)
@@ -147,13 +180,13 @@ class DriverJobSerializer(serializers.ModelSerializer):
             'customer_name',
             'customer_phone',
             'proof_of_delivery_image',
+            'media_status',
             'assigned_driver',
         ]
 
     def get_status(self, obj):
-        # Helper to get status from current timeline
-        timeline = obj.timeline.filter(is_current=True).first()
-        return timeline.status if timeline else 'PENDING'
+        # Current timeline status is denormalized onto the job
+        return obj.current_status or 'PENDING'
 
     def get_proof_of_delivery_image(self, obj):
         # Safely access the shipment's POD image
@@ -161,6 +194,12 @@ class DriverJobSerializer(serializers.ModelSerializer):
             return obj.shipment.proof_of_delivery_image.url
         return None
 
+    def get_media_status(self, obj):
+        # PENDING while proof-of-delivery files are still uploading
+        if hasattr(obj, 'shipment'):
+            return obj.shipment.media_status
+        return None
+
     def get_assigned_driver(self, obj):
         # Safely access the shipment's driver name
         if hasattr(obj, 'shipment') and obj.shipment.driver:
@@ -176,5 +215,29 @@ class DriverJobUpdateSerializer(serializers.Serializer):
     location = serializers.CharField(max_length=255, required=False, allow_blank=True)
     description = serializers.CharField(max_length=500, required=False, allow_blank=True)
 
+class DriverSyncEventSerializer(serializers.Serializer):
+    """
+    One queued driver status change (see sync.py); ``id`` is generated by
+    the app and makes replays idempotent.
+    """
+    id = serializers.CharField(max_length=64)
+    job_number = serializers.IntegerField()
+    status = serializers.ChoiceField(choices=JobTimeline.Status.choices)
+    location = serializers.CharField(max_length=255, required=False, allow_blank=True, default='')
+    description = serializers.CharField(max_length=500, required=False, allow_blank=True, default='')
+    timestamp = serializers.DateTimeField()
+
+
+class DriverSyncSerializer(serializers.Serializer):
+    """
+    A batch of queued status changes from the driver app
+    """
+    # Validated one by one in sync_driver_events, so a bad event only
+    # rejects itself
+    events = serializers.ListField(
+        child=serializers.DictField(), allow_empty=False, max_length=500
+    )
+
+
 class DriverPODUploadSerializer(serializers.Serializer):
     proof_of_delivery_image = serializers.ImageField()
\ No newline at end of file
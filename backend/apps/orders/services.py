@@ -0,0 +1,128 @@
+# apps/orders/services.py
+"""
+Job creation pipeline.
+
+Every new Job needs a Shipment (PENDING, unassigned), a DRAFT Invoice, an
+initial ORDER_PLACED timeline entry and its public tracking row. All of them are written here, in
+one transaction, with one INSERT per table (one bulk INSERT per table for
+imports).
+"""
+
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Job, JobTimeline, JobTracking
+from .numbering import job_number_allocator
+from .search import build_search_document
+from .tracking import build_job_tracking
+
+# Flat booking fee plus a surcharge per legacy service type
+BASE_INVOICE_AMOUNT = Decimal('50.00')
+SERVICE_TYPE_SURCHARGES = {
+    'RESIDENTIAL_MOVING': Decimal('250.00'),
+    'OFFICE_RELOCATION': Decimal('400.00'),
+    'PALLET_DELIVERY': Decimal('100.00'),
+}
+INVOICE_DUE_DAYS = 14
+
+
+def initial_invoice_amount(job):
+    return BASE_INVOICE_AMOUNT + SERVICE_TYPE_SURCHARGES.get(job.service_type, Decimal('0.00'))
+
+
+def build_job_records(job):
+    """
+    Return the unsaved (Shipment, Invoice, JobTimeline) every new job starts
+    with.
+    """
+    from apps.billing.models import Invoice
+    from apps.transportation.models import Shipment
+
+    shipment = Shipment(
+        job=job,
+        driver=None,
+        vehicle=None,
+        status=Shipment.ShipmentStatus.PENDING,
+    )
+    # bulk_create skips Shipment.save, which normally fills this in
+    shipment.set_booking()
+    invoice = Invoice(
+        job=job,
+        total_amount=initial_invoice_amount(job),
+        due_date=date.today() + timedelta(days=INVOICE_DUE_DAYS),
+        status=Invoice.InvoiceStatus.DRAFT,
+    )
+    timeline = JobTimeline(
+        job=job,
+        status=JobTimeline.Status.ORDER_PLACED,
+        location=job.pickup_city,
+        description='Order placed',
+        is_current=True,
+    )
+    return shipment, invoice, timeline
+
+
+def create_job_records(job):
+    """
+    Create the Shipment, Invoice, ORDER_PLACED timeline entry and tracking
+    row for a job that has just been inserted. Must be called inside a transaction.
+    """
+    shipment, invoice, timeline = build_job_records(job)
+    shipment.save(force_insert=True)
+    invoice.save(force_insert=True)
+    # bulk_create skips JobTimeline.save: there is no earlier entry to
+    # demote and the job already carries ORDER_PLACED as its current status.
+    JobTimeline.objects.bulk_create([timeline])
+    build_job_tracking(job, [timeline], shipment).save(force_insert=True)
+
+
+def new_job(**fields):
+    """An unsaved Job in its initial ORDER_PLACED state."""
+    return Job(
+        current_status=JobTimeline.Status.ORDER_PLACED,
+        current_status_at=timezone.now(),
+        **fields,
+    )
+
+
+def create_job(**fields):
+    """
+    Create a Job together with its Shipment, Invoice and initial timeline
+    entry. ``fields`` are Job model fields (e.g. serializer validated_data).
+    """
+    with transaction.atomic():
+        job = new_job(**fields)
+        job.save(force_insert=True)
+        create_job_records(job)
+    return job
+
+
+def bulk_create_jobs(jobs, batch_size=None):
+    """
+    Insert many unsaved jobs (see ``new_job``) and their records with one
+    bulk INSERT per table. Job numbers are reserved in a single block.
+    """
+    from apps.billing.models import Invoice
+    from apps.transportation.models import Shipment
+
+    unnumbered = [job for job in jobs if job.job_number is None]
+    for job, number in zip(unnumbered, job_number_allocator.allocate(len(unnumbered))):
+        job.job_number = number
+    for job in jobs:
+        # bulk_create skips Job.save, which normally fills this in
+        job.search_document = build_search_document(job)
+
+    records = [build_job_records(job) for job in jobs]
+    with transaction.atomic():
+        Job.objects.bulk_create(jobs, batch_size=batch_size)
+        Shipment.objects.bulk_create([r[0] for r in records], batch_size=batch_size)
+        Invoice.objects.bulk_create([r[1] for r in records], batch_size=batch_size)
+        JobTimeline.objects.bulk_create([r[2] for r in records], batch_size=batch_size)
+        JobTracking.objects.bulk_create(
+            [build_job_tracking(job, [r[2]], r[0]) for job, r in zip(jobs, records)],
+            batch_size=batch_size,
+        )
+    return jobs
@@ -1,40 +1,72 @@
 # apps/orders/signals.py
 
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
-from .models import Job
-from apps.transportation.models import Shipment
+from .models import Job, JobTimeline
+from .live import publish_tracking
+from .tracking import invalidate_tracking, refresh_tracking
+from apps.transportation.availability import rebook_job
+from apps.transportation.models import DriverJobTombstone, Shipment, ShipmentPhoto
+
+
+def _refresh(job_id):
+    if refresh_tracking(job_id) is not None:
+        publish_tracking(job_id)
+
+
+def refresh_tracking_on_commit(job_id):
+    # Bulk writes skip the receivers below and call this themselves.
+    # After commit, so the read model, live streams and a concurrent poll
+    # re-caching the response only ever see committed state. robust: a
+    # failed refresh must not stop the other on_commit callbacks.
+    transaction.on_commit(lambda: _refresh(job_id), robust=True)
+
 
 @receiver(post_save, sender=Job)
-def create_or_update_shipment_for_job(sender, instance, created, **kwargs):
-    """
-    Ensures a Shipment record exists for a Job and is in the correct
-    initial state. This is robust against multiple signal triggers.
-    """
-    # This signal should only run when a new Job is first created.
+def job_saved(sender, instance, created, **kwargs):
+    # New jobs get their tracking row from the creation pipeline
+    # (services.py); they only need announcing to live streams
+    if created:
+        transaction.on_commit(lambda: publish_tracking(instance.pk), robust=True)
+    else:
+        refresh_tracking_on_commit(instance.pk)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'requested_pickup_date' in update_fields:
+            # The shipment's driver and vehicle booking follows the pickup date
+            rebook_job(instance)
+
+
+@receiver(post_delete, sender=Job)
+def job_deleted(sender, instance, **kwargs):
+    transaction.on_commit(lambda: invalidate_tracking(instance.pk))
+
+
+@receiver([post_save, post_delete], sender=JobTimeline)
+def timeline_changed(sender, instance, **kwargs):
+    refresh_tracking_on_commit(instance.job_id)
+
+
+@receiver([post_save, post_delete], sender=Shipment)
+def shipment_changed(sender, instance, created=False, **kwargs):
+    """ETA, delivery time and signature show up in the tracking response."""
     if not created:
-        return
-
-    try:
-        # Step 1: Use get_or_create.
-        # This will either find an existing shipment (created by a ghost signal)
-        # or create a new one. `shipment_created` will be True only if it's new.
-        shipment, shipment_created = Shipment.objects.get_or_create(job=instance)
-
-        # Step 2: Enforce the correct initial state.
-        # This is the most important part. Whether the shipment was just found
-        # or just created, we explicitly set its fields to the correct
-        # unassigned state.
-        shipment.driver = None
-        shipment.vehicle = None
-        shipment.status = Shipment.ShipmentStatus.PENDING
-        shipment.save()
-
-        if shipment_created:
-            print(f"SUCCESS: Created and reset initial shipment for job {instance.id}")
-        else:
-            print(f"WARNING: Shipment for job {instance.id} already existed. Resetting to initial state.")
-
-    except Exception as e:
-        # Log any unexpected errors during this process.
-        print(f"CRITICAL ERROR in shipment signal for job {instance.id}: {e}")
\ No newline at end of file
+        refresh_tracking_on_commit(instance.job_id)
+
+
+@receiver([post_save, post_delete], sender=ShipmentPhoto)
+def shipment_photo_changed(sender, instance, **kwargs):
+    """POD photos set the tracking response's proof flag."""
+    job_id = Shipment.objects.filter(pk=instance.shipment_id).values_list('job_id', flat=True).first()
+    if job_id is not None:
+        refresh_tracking_on_commit(job_id)
+
+
+@receiver(post_delete, sender=Shipment)
+def shipment_deleted(sender, instance, **kwargs):
+    """The job leaves its driver's list (reassignments: Shipment.save)."""
+    if instance.driver_id is not None:
+        job_number = Job.objects.filter(pk=instance.job_id).values_list('job_number', flat=True).first()
+        DriverJobTombstone.objects.create(
+            driver_id=instance.driver_id, job_id=instance.job_id, job_number=job_number
+        )
@@ -0,0 +1,234 @@
+# apps/orders/sync.py
+"""
+Offline sync for the driver app: batch upload of queued status events and
+``?since=`` delta downloads of the driver's job list.
+
+    POST /api/v1/driver/jobs/sync/
+    {"events": [{"id": "<client uuid>", "job_number": 1042,
+                 "status": "PICKED_UP", "location": "...",
+                 "description": "...", "timestamp": "2026-01-01T08:02:00Z"}, ...]}
+
+A driver coming back online sends every queued status change in one
+request instead of one ``update_status`` call each. Events are applied in
+one transaction with a fixed number of queries however many there are:
+one read of the driver's jobs, one of already-seen event ids, then one
+bulk INSERT of timeline entries and one bulk UPDATE each for jobs and
+shipments.
+
+Every event gets a result:
+
+- ``applied``
+- ``duplicate``: its id was synced before by the same user (retries are
+  safe; ids from other devices may collide)
+- ``rejected``: with ``errors``; the rest of the batch still applies
+
+Timeline entries keep the device's timestamps. A job's current status is
+its newest event, so an old event arriving late (e.g. from a second queue
+flushed after the first) is recorded as history without rolling the job
+back.
+
+Delta sync
+----------
+
+    GET /api/v1/driver/jobs/?since=<watermark>
+    GET /api/v1/transportation/drivers/me/jobs/?since=<watermark>
+
+returns ``{"results": [changed items], "removed": [job numbers],
+"watermark": "...", "full": false}``. The client upserts ``results``,
+drops ``removed`` and sends ``watermark`` back next time. ``since=`` (empty)
+or a watermark older than the kept tombstones gives the full list with
+``full: true``. Changes are found through the indexed ``updated_at`` of
+jobs and shipments; status changes bump the job's.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import ValidationError
+
+from apps.transportation.models import DriverJobTombstone, Shipment
+
+from .models import Job, JobTimeline
+from .serializers import DriverSyncEventSerializer
+from .signals import refresh_tracking_on_commit
+
+APPLIED, DUPLICATE, REJECTED = 'applied', 'duplicate', 'rejected'
+# Tries at applying a batch that races other syncs of the same driver
+SYNC_ATTEMPTS = 5
+
+# Same mapping as DriverJobViewSet.update_status
+SHIPMENT_STATUS_FOR = {
+    JobTimeline.Status.IN_TRANSIT: Shipment.ShipmentStatus.IN_TRANSIT,
+    JobTimeline.Status.DELIVERED: Shipment.ShipmentStatus.DELIVERED,
+}
+
+
+def _validate(raw_events):
+    """``(results, valid)``: a result slot per event and the events that parsed."""
+    results, valid, seen = [], [], set()
+    for raw in raw_events:
+        serializer = DriverSyncEventSerializer(data=raw)
+        event_id = raw.get('id')
+        if not serializer.is_valid():
+            results.append({'id': event_id, 'status': REJECTED, 'errors': serializer.errors})
+            continue
+        event = serializer.validated_data
+        if event['id'] in seen:
+            results.append({'id': event['id'], 'status': DUPLICATE})
+            continue
+        seen.add(event['id'])
+        result = {'id': event['id'], 'status': APPLIED}
+        results.append(result)
+        valid.append((event, result))
+    return results, valid
+
+
+def _apply(user, valid):
+    jobs = {
+        job.job_number: job
+        for job in Job.objects.filter(
+            job_number__in={event['job_number'] for event, _ in valid},
+            shipment__driver__user=user,
+        ).select_related('shipment')
+    }
+    synced = set(
+        JobTimeline.objects.filter(synced_by=user, client_event_id__in=[event['id'] for event, _ in valid])
+        .values_list('client_event_id', flat=True)
+    )
+
+    entries, newest = [], {}
+    for event, result in valid:
+        job = jobs.get(event['job_number'])
+        if event['id'] in synced:
+            result['status'] = DUPLICATE
+            continue
+        if job is None:
+            result.update(status=REJECTED, errors={'job_number': ['Not one of your jobs.']})
+            continue
+        entry = JobTimeline(
+            job=job,
+            status=event['status'],
+            location=event['location'],
+            description=event['description'],
+            timestamp=event['timestamp'],
+            client_event_id=event['id'],
+            synced_by=user,
+        )
+        entries.append(entry)
+        latest = newest.get(job.pk)
+        if latest is None or entry.timestamp >= latest.timestamp:
+            newest[job.pk] = entry
+
+    # Only events newer than what the job already shows become current. A
+    # job that is merely placed always takes the driver's status, so device
+    # clock skew cannot hide it behind the server-stamped ORDER_PLACED.
+    changed_jobs, changed_shipments = [], []
+    for job_pk, entry in newest.items():
+        job = entry.job
+        if (
+            job.current_status != JobTimeline.Status.ORDER_PLACED
+            and job.current_status_at is not None
+            and entry.timestamp < job.current_status_at
+        ):
+            continue
+        entry.is_current = True
+        job.current_status, job.current_status_at = entry.status, entry.timestamp
+        changed_jobs.append(job)
+        shipment_status = SHIPMENT_STATUS_FOR.get(entry.status)
+        shipment = getattr(job, 'shipment', None)
+        if shipment_status and shipment is not None and shipment.status != shipment_status:
+            shipment.status = shipment_status
+            changed_shipments.append(shipment)
+
+    # bulk_update leaves auto_now alone; delta sync needs updated_at to move
+    now = timezone.now()
+    for record in (*changed_jobs, *changed_shipments):
+        record.updated_at = now
+
+    if changed_jobs:
+        JobTimeline.objects.filter(job__in=changed_jobs, is_current=True).update(is_current=False)
+    JobTimeline.objects.bulk_create(entries)
+    if changed_jobs:
+        Job.objects.bulk_update(changed_jobs, ['current_status', 'current_status_at', 'updated_at'])
+    if changed_shipments:
+        Shipment.objects.bulk_update(changed_shipments, ['status', 'updated_at'])
+
+    # Bulk writes skip the model signals that keep tracking current
+    for job_pk in {entry.job_id for entry in entries}:
+        refresh_tracking_on_commit(job_pk)
+
+
+def sync_driver_events(user, raw_events):
+    """Apply a driver's queued events; returns one result per event, in order."""
+    results, valid = _validate(raw_events)
+    if not valid:
+        return results
+
+    for attempt in range(SYNC_ATTEMPTS):
+        try:
+            with transaction.atomic():
+                _apply(user, valid)
+            return results
+        except IntegrityError:
+            # A concurrent sync of the same driver inserted some of the
+            # same event ids first; start over so they are reported as
+            # duplicates
+            if attempt == SYNC_ATTEMPTS - 1:
+                raise
+            for event, result in valid:
+                result.clear()
+                result.update(id=event['id'], status=APPLIED)
+
+
+# ---------------------------------------------------------------------------
+# Delta sync
+# ---------------------------------------------------------------------------
+
+# A transaction still running when a watermark is issued can commit rows
+# stamped earlier than it; re-sending this much of the past is cheap
+WATERMARK_OVERLAP = timedelta(seconds=30)
+
+
+def parse_watermark(value):
+    """The datetime in ``?since=``, or None for a full sync. Raises ValidationError."""
+    if value in (None, '', '0'):
+        return None
+    since = parse_datetime(value)
+    if since is None:
+        raise ValidationError({'since': 'Expected a watermark returned by an earlier sync.'})
+    if timezone.is_naive(since):
+        since = timezone.make_aware(since)
+    return since
+
+
+def delta_sync(driver, since_param, queryset, job_prefix, shipment_prefix):
+    """
+    The driver's ``queryset`` (jobs or shipments) narrowed to what changed
+    since the ``?since=`` watermark, with the job numbers that left the
+    driver's list. ``job_prefix``/``shipment_prefix`` lead from the
+    queryset's model to the Job and Shipment (e.g. ``''`` and
+    ``'shipment__'`` for jobs).
+    """
+    watermark = timezone.now()
+    since = parse_watermark(since_param)
+    full = since is None or since < watermark - timedelta(days=settings.DRIVER_SYNC_TOMBSTONE_DAYS)
+
+    removed = []
+    if not full:
+        cutoff = since - WATERMARK_OVERLAP
+        queryset = queryset.filter(
+            Q(**{f'{job_prefix}updated_at__gt': cutoff}) | Q(**{f'{shipment_prefix}updated_at__gt': cutoff})
+        )
+        if driver is not None:
+            removed = list(
+                DriverJobTombstone.objects.filter(driver=driver, removed_at__gt=cutoff)
+                # Reassigned back to this driver since
+                .exclude(job_id__in=Shipment.objects.filter(driver=driver).values('job_id'))
+                .exclude(job_number=None)
+                .values_list('job_number', flat=True).distinct()
+            )
+    return {'queryset': queryset, 'removed': removed, 'watermark': watermark, 'full': full}
@@ -0,0 +1,751 @@
+import asyncio
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import DatabaseError, connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from apps.core.live import hub
+from apps.transportation.models import Driver, Shipment, ShipmentPhoto
+
+from .importers import CSV, NDJSON, JobImporter, iter_rows
+from .live import job_channel
+from .models import BackfillCheckpoint, Job, JobNumberSequence, JobTimeline, JobTracking
+from .numbering import JobNumberAllocator, job_number_allocator
+from .services import bulk_create_jobs, create_job, new_job
+from .tracking import get_tracking
+
+User = get_user_model()
+
+# SAVEPOINT/RELEASE around the pipeline and the job number reservation
+# (SAVEPOINT, UPDATE, SELECT, RELEASE) plus one INSERT per table.
+JOB_CREATION_QUERY_COUNT = 2 + 4 + 5
+
+
+def make_job(customer=None, **overrides):
+    fields = {
+        'customer': customer,
+        'cargo_description': 'Pallets',
+        'pickup_address': '1 King St',
+        'pickup_city': 'Toronto',
+        'pickup_contact_person': 'Sam',
+        'pickup_contact_phone': '555-0100',
+        'delivery_address': '2 Queen St',
+        'delivery_city': 'Ottawa',
+        'delivery_contact_person': 'Alex',
+        'delivery_contact_phone': '555-0101',
+        'requested_pickup_date': timezone.now() + timedelta(days=1),
+    }
+    fields.update(overrides)
+    return Job.objects.create(**fields)
+
+
+class JobNumberAllocatorTests(TestCase):
+    def setUp(self):
+        job_number_allocator.reset()
+
+    def test_jobs_get_sequential_unique_numbers(self):
+        first = make_job()
+        second = make_job()
+        self.assertIsNotNone(first.job_number)
+        self.assertEqual(second.job_number, first.job_number + 1)
+
+    def test_allocate_reserves_block_in_one_bump(self):
+        allocator = JobNumberAllocator(block_size=5)
+        start = JobNumberSequence.objects.get(name='job_number').next_value
+
+        numbers = allocator.allocate(3)
+
+        self.assertEqual(numbers, [start, start + 1, start + 2])
+        self.assertEqual(
+            JobNumberSequence.objects.get(name='job_number').next_value, start + 3
+        )
+
+    def test_missing_counter_row_is_seeded_above_existing_jobs(self):
+        job = make_job()
+        JobNumberSequence.objects.all().delete()
+
+        self.assertEqual(JobNumberAllocator().next(), job.job_number + 1)
+
+    def test_backfill_assigns_numbers_to_unnumbered_jobs(self):
+        job = make_job()
+        Job.objects.filter(pk=job.pk).update(job_number=None)
+
+        call_command('backfill_job_numbers', stdout=StringIO())
+
+        job.refresh_from_db()
+        self.assertIsNotNone(job.job_number)
+        self.assertFalse(BackfillCheckpoint.objects.exists())
+
+    def unnumbered_jobs(self, count):
+        jobs = sorted((make_job() for _ in range(count)), key=lambda job: job.pk)
+        Job.objects.filter(pk__in=[job.pk for job in jobs]).update(job_number=None)
+        return jobs
+
+    def test_backfill_dry_run_writes_nothing(self):
+        self.unnumbered_jobs(3)
+        out = StringIO()
+
+        call_command('backfill_job_numbers', '--dry-run', '--batch-size', '2', stdout=out)
+
+        self.assertEqual(Job.objects.filter(job_number__isnull=True).count(), 3)
+        self.assertIn('Would update 3 of 3 rows', out.getvalue())
+        self.assertIn('ETA', out.getvalue())
+
+    def test_backfill_resumes_after_checkpoint(self):
+        first, *rest = self.unnumbered_jobs(3)
+        BackfillCheckpoint.objects.create(
+            name='backfill_job_numbers', last_pk=str(first.pk), processed=1
+        )
+
+        call_command('backfill_job_numbers', '--resume', '--batch-size', '1', stdout=StringIO())
+
+        self.assertEqual(
+            set(Job.objects.filter(job_number__isnull=True).values_list('pk', flat=True)), {first.pk}
+        )
+
+
+class JobCurrentStatusTests(APITestCase):
+    def setUp(self):
+        self.customer = User.objects.create_user(
+            username='customer', email='customer@example.com', password='pw'
+        )
+
+    def add_status(self, job, status):
+        return JobTimeline.objects.create(
+            job=job, status=status, location='Toronto', description='', is_current=True
+        )
+
+    def test_current_timeline_entry_is_copied_onto_job(self):
+        job = make_job(self.customer)
+        self.add_status(job, JobTimeline.Status.ORDER_PLACED)
+        entry = self.add_status(job, JobTimeline.Status.IN_TRANSIT)
+
+        job.refresh_from_db()
+        self.assertEqual(job.current_status, JobTimeline.Status.IN_TRANSIT)
+        self.assertEqual(job.current_status_at, entry.timestamp)
+        self.assertEqual(job.timeline.filter(is_current=True).count(), 1)
+
+    def test_customer_job_list_query_count_is_constant(self):
+        for _ in range(3):
+            self.add_status(make_job(self.customer), JobTimeline.Status.IN_TRANSIT)
+        self.client.force_authenticate(user=self.customer)
+        url = reverse('api:customer-job-list')
+
+        with CaptureQueriesContext(connection) as small_page:
+            self.client.get(url, {'status': JobTimeline.Status.IN_TRANSIT})
+        for _ in range(3):
+            self.add_status(make_job(self.customer), JobTimeline.Status.IN_TRANSIT)
+        with self.assertNumQueries(len(small_page)):
+            response = self.client.get(url, {'status': JobTimeline.Status.IN_TRANSIT})
+
+        self.assertEqual(response.data['count'], 6)
+
+
+class JobCreationPipelineTests(APITestCase):
+    def setUp(self):
+        self.customer = User.objects.create_user(
+            username='booker', email='booker@example.com', password='pw'
+        )
+        self.payload = dict(
+            self.job_fields(),
+            requested_pickup_date=(timezone.now() + timedelta(days=2)).isoformat(),
+        )
+
+    @classmethod
+    def job_fields(cls):
+        return {
+            'service_type': 'PALLET_DELIVERY',
+            'cargo_description': 'Two pallets of tiles',
+            'pickup_address': '1 King St',
+            'pickup_city': 'Toronto',
+            'pickup_contact_person': 'Sam',
+            'pickup_contact_phone': '555-0100',
+            'delivery_address': '2 Queen St',
+            'delivery_city': 'Ottawa',
+            'delivery_contact_person': 'Alex',
+            'delivery_contact_phone': '555-0101',
+            'requested_pickup_date': timezone.now() + timedelta(days=2),
+        }
+
+    def test_create_job_writes_one_row_per_table(self):
+        fields = self.job_fields()
+        with CaptureQueriesContext(connection) as ctx:
+            job = create_job(customer=self.customer, **fields)
+
+        inserts = [q['sql'] for q in ctx.captured_queries if q['sql'].startswith('INSERT')]
+        self.assertEqual(len(inserts), 5)
+        # Besides the inserts, only the job number reservation touches the DB
+        self.assertEqual(len(ctx.captured_queries), JOB_CREATION_QUERY_COUNT)
+
+        self.assertEqual(job.shipment.status, 'PENDING')
+        self.assertEqual(job.invoice.total_amount, Decimal('150.00'))
+        self.assertEqual(job.current_status, JobTimeline.Status.ORDER_PLACED)
+        self.assertEqual(job.timeline.get().is_current, True)
+
+    def test_booking_creates_job_for_requesting_customer(self):
+        self.client.force_authenticate(user=self.customer)
+
+        response = self.client.post(reverse('api:customer-booking'), self.payload, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        job = Job.objects.get(pk=response.data['id'])
+        self.assertEqual(job.customer, self.customer)
+        self.assertEqual(response.data['status'], JobTimeline.Status.ORDER_PLACED)
+        self.assertTrue(hasattr(job, 'shipment'))
+        self.assertTrue(hasattr(job, 'invoice'))
+
+
+class JobImportTests(APITestCase):
+    header = (
+        'service_type,cargo_description,pickup_address,pickup_city,pickup_contact_person,'
+        'pickup_contact_phone,delivery_address,delivery_city,delivery_contact_person,'
+        'delivery_contact_phone,requested_pickup_date,bol_number,pallet_count\n'
+    )
+    row = (
+        'PALLET_DELIVERY,Tiles,1 King St,Toronto,Sam,555-0100,2 Queen St,Ottawa,Alex,'
+        '555-0101,2030-01-0{day}T09:00:00Z,{bol},{pallets}\n'
+    )
+
+    def setUp(self):
+        self.manager = User.objects.create_user(
+            username='manager', email='manager@example.com', password='pw', role='MANAGER'
+        )
+        self.customer = User.objects.create_user(
+            username='shipper', email='shipper@example.com', password='pw'
+        )
+        self.client.force_authenticate(user=self.manager)
+
+    def test_csv_import_creates_valid_rows_and_reports_bad_ones(self):
+        content = self.header + ''.join([
+            self.row.format(day=1, bol='BOL-1', pallets=2),
+            self.row.format(day=2, bol='BOL-2', pallets='lots'),
+            self.row.format(day=3, bol='BOL-1', pallets=4),
+            self.row.format(day=4, bol='', pallets=''),
+        ])
+        upload = SimpleUploadedFile('jobs.csv', content.encode(), content_type='text/csv')
+
+        response = self.client.post(
+            reverse('api:job-import-jobs'),
+            {'file': upload, 'customer_id': str(self.customer.pk)},
+            format='multipart',
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual([e['row'] for e in response.data['errors']], [2, 3])
+        self.assertIn('pallet_count', response.data['errors'][0]['errors'])
+        self.assertIn('bol_number', response.data['errors'][1]['errors'])
+
+        jobs = Job.objects.filter(customer=self.customer)
+        self.assertEqual(jobs.count(), 2)
+        self.assertEqual(len(set(jobs.values_list('job_number', flat=True))), 2)
+        for job in jobs:
+            self.assertEqual(job.current_status, JobTimeline.Status.ORDER_PLACED)
+            self.assertEqual(job.shipment.status, 'PENDING')
+            self.assertEqual(job.invoice.total_amount, Decimal('150.00'))
+
+    def test_bad_customer_id_is_a_validation_error(self):
+        for customer_id, message in (('not-a-uuid', 'Must be a valid UUID.'), (str(uuid.uuid4()), 'Customer not found.')):
+            upload = SimpleUploadedFile('jobs.csv', self.header.encode(), content_type='text/csv')
+            response = self.client.post(
+                reverse('api:job-import-jobs'), {'file': upload, 'customer_id': customer_id}, format='multipart'
+            )
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response.data, {'customer_id': [message]})
+
+    def test_rows_the_database_refuses_fail_alone(self):
+        def refuse_sevens(jobs):
+            if any(job.pallet_count == 7 for job in jobs):
+                raise DatabaseError('value refused')
+            return bulk_create_jobs(jobs)
+
+        content = self.header + ''.join([
+            self.row.format(day=1, bol='BOL-1', pallets=2),
+            self.row.format(day=2, bol='BOL-2', pallets=7),
+            self.row.format(day=3, bol='BOL-3', pallets=3),
+        ]) + self.row.format(day=4, bol='BOL-2', pallets=1)
+
+        with mock.patch('apps.orders.importers.bulk_create_jobs', refuse_sevens):
+            report = JobImporter(customer=self.customer, batch_size=3).run(iter_rows(StringIO(content), CSV))
+
+        # Only the refused row fails, and its BOL number is free for a later row
+        self.assertEqual(report['created'], 3)
+        self.assertEqual([e['row'] for e in report['errors']], [2])
+        self.assertEqual(
+            set(Job.objects.values_list('bol_number', flat=True)), {'BOL-1', 'BOL-2', 'BOL-3'}
+        )
+
+    def test_ndjson_rows_are_parsed_line_by_line(self):
+        rows = list(iter_rows(['{"pickup_city": "Toronto"}\n', '\n', 'not json\n', '[1]\n'], NDJSON))
+
+        self.assertEqual(rows[0], (1, {'pickup_city': 'Toronto'}, None))
+        self.assertEqual([r[0] for r in rows], [1, 2, 3])
+        self.assertIsNotNone(rows[1][2])
+        self.assertIsNotNone(rows[2][2])
+
+
+class SparseFieldsetTests(APITestCase):
+    def setUp(self):
+        self.manager = User.objects.create_user(
+            username='manager', email='manager@example.com', password='pw', role='MANAGER'
+        )
+        self.customer = User.objects.create_user(
+            username='shipper', email='shipper@example.com', password='pw'
+        )
+        self.client.force_authenticate(user=self.manager)
+        for _ in range(3):
+            create_job(customer=self.customer, **JobCreationPipelineTests.job_fields())
+
+    def test_fields_limits_top_level_keys(self):
+        response = self.client.get(reverse('api:job-list'), {'fields': 'id,job_number,status'})
+
+        self.assertEqual(set(response.data['results'][0]), {'id', 'job_number', 'status'})
+        self.assertEqual(response.data['results'][0]['status'], JobTimeline.Status.ORDER_PLACED)
+
+    def test_nested_objects_only_when_expanded(self):
+        url = reverse('api:job-list')
+        compact = self.client.get(url, {'expand': ''}).data['results'][0]
+        expanded = self.client.get(url, {'expand': 'customer'}).data['results'][0]
+
+        self.assertNotIn('customer', compact)
+        self.assertNotIn('timeline', compact)
+        self.assertEqual(compact['customer_id'], str(self.customer.pk))
+        self.assertEqual(expanded['customer']['email'], self.customer.email)
+
+    def test_shipment_list_query_count_does_not_grow_with_rows(self):
+        url = reverse('api:shipment-list')
+        params = {'fields': 'id,status,job_number,driver_name', 'expand': 'job'}
+        with CaptureQueriesContext(connection) as three_rows:
+            self.client.get(url, params)
+        create_job(customer=self.customer, **JobCreationPipelineTests.job_fields())
+
+        with self.assertNumQueries(len(three_rows)):
+            response = self.client.get(url, params)
+
+        row = response.data['results'][0]
+        self.assertEqual(set(row), {'id', 'status', 'job_number', 'driver_name', 'job'})
+        self.assertNotIn('customer', row['job'])
+
+    def test_nested_expansion_is_joined_not_queried_per_row(self):
+        url = reverse('api:shipment-list')
+        params = {'fields': 'id,job', 'expand': 'job,customer,timeline'}
+        with CaptureQueriesContext(connection) as three_rows:
+            self.client.get(url, params)
+        create_job(customer=self.customer, **JobCreationPipelineTests.job_fields())
+
+        with self.assertNumQueries(len(three_rows)):
+            response = self.client.get(url, params)
+
+        job = response.data['results'][0]['job']
+        self.assertEqual(job['customer']['email'], self.customer.email)
+        self.assertEqual(len(job['timeline']), 1)
+
+
+class JobSearchTests(APITestCase):
+    def setUp(self):
+        self.manager = User.objects.create_user(
+            username='manager', email='manager@example.com', password='pw', role='MANAGER'
+        )
+        self.customer = User.objects.create_user(
+            username='shipper', email='shipper@acme.example', password='pw'
+        )
+        fields = JobCreationPipelineTests.job_fields()
+        self.toronto = create_job(customer=self.customer, **fields)
+        self.montreal = create_job(customer=self.customer, **dict(
+            fields, pickup_city='Montreal', pickup_address='9 Rue Peel', delivery_city='Toronto',
+        ))
+        self.client.force_authenticate(user=self.manager)
+
+    def search(self, url_name, q, **params):
+        response = self.client.get(reverse(url_name), {'q': q, **params})
+        self.assertEqual(response.status_code, 200)
+        return [row['job_number'] for row in response.data['results']]
+
+    def test_every_term_must_match_as_prefix(self):
+        self.assertEqual(self.search('api:job-list', 'rue pee'), [self.montreal.job_number])
+        self.assertEqual(
+            sorted(self.search('api:job-list', 'toront')),
+            sorted([self.toronto.job_number, self.montreal.job_number]),
+        )
+        self.assertEqual(self.search('api:job-list', 'montreal nowhere'), [])
+
+    def test_matches_job_number_and_customer_email(self):
+        self.assertEqual(
+            self.search('api:job-list', str(self.montreal.job_number)), [self.montreal.job_number]
+        )
+        self.assertEqual(len(self.search('api:job-list', 'shipper@acme.example')), 2)
+
+    def test_customer_list_uses_same_contract(self):
+        self.client.force_authenticate(user=self.customer)
+
+        self.assertEqual(self.search('api:customer-job-list', 'peel'), [self.montreal.job_number])
+        # Clients of the old SearchFilter keep working
+        response = self.client.get(reverse('api:customer-job-list'), {'search': 'peel'})
+        self.assertEqual([r['job_number'] for r in response.data['results']], [self.montreal.job_number])
+
+    def test_document_follows_edits_and_bulk_creates(self):
+        self.toronto.pickup_city = 'Halifax'
+        self.toronto.save(update_fields=['pickup_city'])
+        bulk = bulk_create_jobs([new_job(
+            customer=self.customer, **dict(JobCreationPipelineTests.job_fields(), pickup_city='Halifax')
+        )])
+
+        self.assertEqual(
+            sorted(self.search('api:job-list', 'halifax')),
+            sorted([self.toronto.job_number, bulk[0].job_number]),
+        )
+
+    def test_index_is_keyed_on_job_number(self):
+        # The jobs table's own rowid is not stable (VACUUM may renumber it)
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT rowid FROM orders_job_fts WHERE orders_job_fts MATCH 'peel'")
+            self.assertEqual(cursor.fetchall(), [(self.montreal.job_number,)])
+
+        self.toronto.delete()
+        self.assertEqual(self.search('api:job-list', 'toronto'), [self.montreal.job_number])
+
+    def test_fts_operators_in_query_are_literal(self):
+        self.assertEqual(self.search('api:job-list', 'toronto OR "NEAR(' ), [])
+
+    def test_admin_changelist_searches_the_index(self):
+        admin_user = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pw'
+        )
+        self.client.force_login(admin_user)
+
+        response = self.client.get(reverse('admin:orders_job_changelist'), {'q': 'rue peel'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [job.pk for job in response.context['cl'].result_list], [self.montreal.pk]
+        )
+
+
+class TrackingCacheTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.customer = User.objects.create_user(
+            username='shipper', email='shipper@example.com', password='pw'
+        )
+        self.job = create_job(customer=self.customer, **JobCreationPipelineTests.job_fields())
+        self.url = reverse('api:tracking-detail', kwargs={'id': self.job.id})
+
+    def test_repeated_polls_are_served_from_cache(self):
+        first = self.client.get(self.url)
+
+        with self.assertNumQueries(0):
+            second = self.client.get(self.url)
+            by_number = self.client.get(f'/api/v1/tracking/{self.job.job_number}/')
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(second.json(), first.json())
+        self.assertEqual(by_number.json()['id'], str(self.job.id))
+        self.assertEqual(second['ETag'], first['ETag'])
+
+    def test_matching_etag_gets_304(self):
+        etag = self.client.get(self.url)['ETag']
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+    def test_status_change_invalidates_cached_response(self):
+        before = self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            JobTimeline.objects.create(
+                job=self.job, status=JobTimeline.Status.IN_TRANSIT, location='Kingston',
+                description='On the road', is_current=True,
+            )
+
+        after = self.client.get(self.url, HTTP_IF_NONE_MATCH=before['ETag'])
+
+        self.assertEqual(after.status_code, 200)
+        self.assertEqual(after.json()['status'], JobTimeline.Status.IN_TRANSIT)
+        self.assertEqual(after.json()['current_location'], 'Kingston')
+
+    def test_response_comes_from_tracking_row(self):
+        payload = self.client.get(self.url).json()
+
+        self.assertEqual(payload['status'], JobTimeline.Status.ORDER_PLACED)
+        self.assertEqual(payload['status_display'], 'Order Placed')
+        self.assertEqual(payload['current_location'], 'Toronto')
+        self.assertEqual(payload['proof'], {'signature': False, 'photo': False})
+        self.assertEqual([entry['status'] for entry in payload['timeline']], ['ORDER_PLACED'])
+        # Only the tracking page's fields; no customer, addresses or contacts
+        self.assertNotIn('customer', payload)
+        self.assertNotIn('pickup_address', payload)
+
+    def test_pod_photo_sets_proof_flag(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            ShipmentPhoto.objects.create(
+                shipment=self.job.shipment,
+                image='proof_of_delivery/pod.jpg',
+            )
+
+        self.assertTrue(JobTracking.objects.get(pk=self.job.pk).has_photo)
+        self.assertTrue(self.client.get(self.url).json()['proof']['photo'])
+
+    def test_job_without_tracking_row_gets_one_on_first_poll(self):
+        JobTracking.objects.filter(pk=self.job.pk).delete()
+
+        response = self.client.get(f'/api/v1/tracking/{self.job.job_number}/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(JobTracking.objects.filter(pk=self.job.pk).exists())
+
+    def test_unknown_job_is_404(self):
+        self.assertEqual(self.client.get('/api/v1/tracking/999999999/').status_code, 404)
+        self.assertEqual(self.client.get('/api/v1/tracking/not-a-job/').status_code, 404)
+
+
+class LiveTrackingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.customer = User.objects.create_user(
+            username='shipper', email='shipper@example.com', password='pw'
+        )
+        self.manager = User.objects.create_user(
+            username='manager', email='manager@example.com', password='pw', role='MANAGER'
+        )
+        self.job = create_job(customer=self.customer, **JobCreationPipelineTests.job_fields())
+
+    def move_job(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            JobTimeline.objects.create(
+                job=self.job, status=JobTimeline.Status.IN_TRANSIT, location='Kingston',
+                description='On the road', is_current=True,
+            )
+
+    def bearer(self, user):
+        return f'Bearer {RefreshToken.for_user(user).access_token}'
+
+    async def test_tracking_stream_sends_snapshot_then_changes(self):
+        response = await self.async_client.get(f'/api/v1/tracking/{self.job.job_number}/stream/')
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        stream = aiter(response.streaming_content)
+        try:
+            self.assertEqual(await anext(stream), b'retry: 3000\n\n')
+            snapshot = await anext(stream)
+            self.assertIn(b'event: tracking', snapshot)
+            self.assertIn(b'"status":"ORDER_PLACED"', snapshot)
+
+            await sync_to_async(self.move_job)()
+
+            update = await asyncio.wait_for(anext(stream), 5)
+            self.assertIn(b'"status":"IN_TRANSIT"', update)
+            self.assertIn(b'"current_location":"Kingston"', update)
+        finally:
+            await stream.aclose()
+
+    async def test_tracking_stream_for_unknown_job_is_404(self):
+        response = await self.async_client.get('/api/v1/tracking/999999999/stream/')
+        self.assertEqual(response.status_code, 404)
+
+    async def test_job_gone_once_subscribed_is_404(self):
+        entry = await sync_to_async(get_tracking)({'job_id': self.job.pk})
+        with mock.patch('apps.orders.live.get_tracking', side_effect=[entry, None]):
+            response = await self.async_client.get(f'/api/v1/tracking/{self.job.job_number}/stream/')
+
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(hub.subscriber_count(job_channel(self.job.pk)), 0)
+
+    async def test_jobs_stream_is_for_staff_only(self):
+        anonymous = await self.async_client.get(reverse('api:live-jobs'))
+        customer = await self.async_client.get(
+            reverse('api:live-jobs'), headers={'Authorization': self.bearer(self.customer)}
+        )
+        self.assertEqual(anonymous.status_code, 401)
+        self.assertEqual(customer.status_code, 403)
+
+    async def test_jobs_stream_receives_every_jobs_changes(self):
+        response = await self.async_client.get(
+            reverse('api:live-jobs'), headers={'Authorization': self.bearer(self.manager)}
+        )
+        stream = aiter(response.streaming_content)
+        try:
+            await anext(stream)  # retry
+
+            await sync_to_async(self.move_job)()
+
+            update = await asyncio.wait_for(anext(stream), 5)
+            self.assertIn(str(self.job.id).encode(), update)
+        finally:
+            await stream.aclose()
+
+
+class DriverSyncTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='driver', email='driver@example.com', password='pw', role='DRIVER'
+        )
+        driver = Driver.objects.create(user=self.user, license_number='D-1', phone_number='555-0199')
+        customer = User.objects.create_user(username='shipper', email='shipper@example.com', password='pw')
+        self.jobs = [create_job(customer=customer, **JobCreationPipelineTests.job_fields()) for _ in range(2)]
+        for job in self.jobs:
+            job.shipment.driver = driver
+            job.shipment.save()
+        self.other_job = create_job(customer=customer, **JobCreationPipelineTests.job_fields())
+        self.url = reverse('api:driver-job-sync')
+        self.client.force_authenticate(user=self.user)
+
+    def event(self, event_id, job, status, minutes_ago):
+        return {
+            'id': event_id,
+            'job_number': job.job_number,
+            'status': status,
+            'location': 'Kingston',
+            'timestamp': (timezone.now() - timedelta(minutes=minutes_ago)).isoformat(),
+        }
+
+    def test_batch_applies_in_constant_queries(self):
+        first, second = self.jobs
+        events = [
+            self.event('e1', first, 'PICKED_UP', 30),
+            self.event('e2', first, 'IN_TRANSIT', 20),
+            self.event('e3', second, 'PICKED_UP', 25),
+            self.event('e4', second, 'IN_TRANSIT', 15),
+            self.event('e5', second, 'DELIVERED', 5),
+        ]
+
+        # jobs, seen ids, demote current, insert, job update, shipment update
+        # (plus the savepoint around them)
+        with self.assertNumQueries(8):
+            response = self.client.post(self.url, {'events': events}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([r['status'] for r in response.data['results']], ['applied'] * 5)
+        second.refresh_from_db()
+        self.assertEqual(second.current_status, 'DELIVERED')
+        self.assertEqual(second.shipment.status, 'DELIVERED')
+        self.assertEqual(second.timeline.get(is_current=True).status, 'DELIVERED')
+        self.assertEqual(second.timeline.count(), 4)
+
+    def test_replayed_events_are_duplicates(self):
+        events = [self.event('e1', self.jobs[0], 'PICKED_UP', 10)]
+        self.client.post(self.url, {'events': events}, format='json')
+
+        response = self.client.post(self.url, {'events': events + events}, format='json')
+
+        self.assertEqual([r['status'] for r in response.data['results']], ['duplicate', 'duplicate'])
+        self.assertEqual(self.jobs[0].timeline.count(), 2)
+
+    def test_event_ids_are_per_driver(self):
+        other = User.objects.create_user(username='other', email='other@example.com', password='pw', role='DRIVER')
+        other_driver = Driver.objects.create(user=other, license_number='D-2', phone_number='555-0198')
+        self.other_job.shipment.driver = other_driver
+        self.other_job.shipment.save()
+        self.client.post(self.url, {'events': [self.event('e1', self.jobs[0], 'PICKED_UP', 10)]}, format='json')
+
+        self.client.force_authenticate(user=other)
+        response = self.client.post(self.url, {'events': [self.event('e1', self.other_job, 'PICKED_UP', 5)]}, format='json')
+
+        self.assertEqual([r['status'] for r in response.data['results']], ['applied'])
+        self.assertEqual(self.other_job.timeline.get(client_event_id='e1').synced_by, other)
+
+    def test_late_old_event_does_not_roll_status_back(self):
+        job = self.jobs[0]
+        self.client.post(self.url, {'events': [self.event('new', job, 'IN_TRANSIT', 5)]}, format='json')
+        self.client.post(self.url, {'events': [self.event('old', job, 'PICKED_UP', 50)]}, format='json')
+
+        job.refresh_from_db()
+        self.assertEqual(job.current_status, 'IN_TRANSIT')
+        self.assertFalse(job.timeline.get(client_event_id='old').is_current)
+        self.assertTrue(job.timeline.get(client_event_id='new').is_current)
+
+    def test_bad_events_are_rejected_individually(self):
+        events = [
+            self.event('mine', self.jobs[0], 'PICKED_UP', 10),
+            self.event('theirs', self.other_job, 'PICKED_UP', 10),
+            {'id': 'broken', 'job_number': self.jobs[0].job_number, 'status': 'TELEPORTED'},
+        ]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(self.url, {'events': events}, format='json')
+
+        self.assertEqual([r['status'] for r in response.data['results']], ['applied', 'rejected', 'rejected'])
+        self.assertEqual(self.other_job.timeline.count(), 1)
+        # The tracking read model follows bulk-applied events
+        self.assertEqual(self.client.get(f'/api/v1/tracking/{self.jobs[0].job_number}/').data['status'], 'PICKED_UP')
+
+
+class DriverDeltaSyncTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='driver', email='driver@example.com', password='pw', role='DRIVER'
+        )
+        self.driver = Driver.objects.create(user=self.user, license_number='D-1', phone_number='555-0199')
+        other_user = User.objects.create_user(username='other', email='other@example.com', password='pw', role='DRIVER')
+        self.other_driver = Driver.objects.create(user=other_user, license_number='D-2', phone_number='555-0198')
+        customer = User.objects.create_user(username='shipper', email='shipper@example.com', password='pw')
+        self.jobs = [create_job(customer=customer, **JobCreationPipelineTests.job_fields()) for _ in range(3)]
+        for job in self.jobs:
+            job.shipment.driver = self.driver
+            job.shipment.save()
+        self.url = reverse('api:driver-job-list')
+        self.client.force_authenticate(user=self.user)
+
+    def sync(self, since):
+        return self.client.get(self.url, {'since': since}).data
+
+    def age_everything(self):
+        # Pretend the initial sync happened well before the changes below
+        old = timezone.now() - timedelta(hours=1)
+        Job.objects.update(updated_at=old)
+        Shipment.objects.update(updated_at=old)
+
+    def test_empty_since_is_a_full_sync(self):
+        data = self.sync('')
+
+        self.assertTrue(data['full'])
+        self.assertEqual(len(data['results']), 3)
+        self.assertIsNotNone(data['watermark'])
+
+    def test_only_changes_and_unassignments_since_watermark(self):
+        self.age_everything()
+        watermark = (timezone.now() - timedelta(minutes=10)).isoformat()
+        moved, unassigned, untouched = self.jobs
+        JobTimeline.objects.create(
+            job=moved, status=JobTimeline.Status.PICKED_UP, location='Toronto',
+            description='Picked up', is_current=True,
+        )
+        unassigned.shipment.driver = self.other_driver
+        unassigned.shipment.save()
+
+        with self.assertNumQueries(2):
+            data = self.sync(watermark)
+
+        self.assertFalse(data['full'])
+        self.assertEqual([job['job_id'] for job in data['results']], [moved.job_number])
+        self.assertEqual(data['results'][0]['status'], 'PICKED_UP')
+        self.assertEqual(data['removed'], [unassigned.job_number])
+
+    def test_my_jobs_supports_since(self):
+        self.age_everything()
+        watermark = (timezone.now() - timedelta(minutes=10)).isoformat()
+        job = self.jobs[0]
+        job.shipment.status = Shipment.ShipmentStatus.IN_TRANSIT
+        job.shipment.save()
+
+        data = self.client.get(reverse('api:driver-my-jobs'), {'since': watermark}).data
+
+        self.assertEqual([shipment['job_id'] for shipment in data['results']], [job.job_number])
+
+    def test_invalid_watermark_is_400(self):
+        self.assertEqual(self.client.get(self.url, {'since': 'yesterday'}).status_code, 400)
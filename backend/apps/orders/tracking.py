@@ -0,0 +1,206 @@
+# apps/orders/tracking.py
+"""
+Public tracking.
+
+``/api/v1/tracking/<id or job number>/`` is served from JobTracking, a
+one-row-per-job read model holding only what the tracking page shows
+(status, location, ETA, timeline summary and proof-of-delivery flags).
+It is written with the job (services.py) and refreshed after every status,
+shipment or POD change (signals.py), so a poll is one primary-key (or
+unique job number) lookup.
+
+On top of that the rendered payload is cached per job (plus a job number ->
+id alias) with an ETag, so repeated polls, and ``If-None-Match``
+revalidations, never reach the database. A refresh drops the cached entry;
+``TRACKING_CACHE_TTL`` only bounds how long a missed invalidation can
+linger.
+"""
+
+import hashlib
+import math
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.utils import json
+from rest_framework.utils.encoders import JSONEncoder
+
+from apps.core.geo import lane_distance_km
+
+from .models import Job, JobTimeline, JobTracking
+
+CACHE_PREFIX = 'tracking:v2'
+# Transit time for lanes the gazetteer cannot place
+STANDARD_TRANSIT_DAYS = 3
+
+
+def _job_key(job_id):
+    return f'{CACHE_PREFIX}:job:{job_id}'
+
+
+def _number_key(job_number):
+    return f'{CACHE_PREFIX}:number:{job_number}'
+
+
+def parse_tracking_id(value):
+    """
+    ``{'job_number': n}`` or ``{'job_id': uuid}`` for a tracking id from
+    the URL, or None if it can be neither.
+    """
+    value = str(value).strip()
+    if value.isdigit():
+        return {'job_number': int(value)}
+    try:
+        return {'job_id': uuid.UUID(value)}
+    except ValueError:
+        return None
+
+
+# ---------------------------------------------------------------------------
+# Read model
+# ---------------------------------------------------------------------------
+
+def estimated_delivery(job):
+    """
+    Requested pickup plus a day per ``TRANSIT_KM_PER_DAY`` of the lane's
+    road distance (at least one); also JobSerializer's estimate.
+    """
+    if not job.requested_pickup_date:
+        return None
+    km = lane_distance_km(job.pickup_city, job.delivery_city)
+    days = STANDARD_TRANSIT_DAYS if km is None else max(1, math.ceil(km / settings.TRANSIT_KM_PER_DAY))
+    return job.requested_pickup_date + timedelta(days=days)
+
+
+def _status_display(status):
+    try:
+        return JobTimeline.Status(status).label
+    except ValueError:
+        return status.replace('_', ' ').title()
+
+
+def build_job_tracking(job, timeline, shipment=None, has_pod_photos=False):
+    """An unsaved JobTracking for ``job`` from its timeline entries and shipment."""
+    timeline = sorted(timeline, key=lambda entry: entry.timestamp)
+    current = next((entry for entry in reversed(timeline) if entry.is_current), None)
+
+    if current is not None:
+        status, location = current.status, current.location
+    else:
+        status = job.current_status or (shipment.status if shipment else 'PENDING')
+        location = job.pickup_city
+
+    eta = shipment.estimated_arrival if shipment else None
+    if eta is None:
+        eta = estimated_delivery(job)
+
+    return JobTracking(
+        job=job,
+        job_number=job.job_number,
+        status=status,
+        status_display=_status_display(status),
+        current_location=location or '',
+        pickup_city=job.pickup_city,
+        delivery_city=job.delivery_city,
+        estimated_delivery=eta,
+        delivered_at=shipment.actual_arrival if shipment else None,
+        # Stored in the DRF encoder's JSON form (ISO timestamps)
+        timeline=json.loads(json.dumps([
+            {
+                'status': entry.status,
+                'status_display': entry.get_status_display(),
+                'timestamp': entry.timestamp,
+                'location': entry.location,
+                'description': entry.description,
+                'completed': entry.completed,
+            }
+            for entry in timeline
+        ], cls=JSONEncoder)),
+        has_signature=bool(shipment and shipment.proof_of_delivery_signature),
+        has_photo=bool(shipment and shipment.proof_of_delivery_image) or has_pod_photos,
+    )
+
+
+def refresh_tracking(job_id):
+    """Rebuild the JobTracking row for a job from the database."""
+    from apps.transportation.models import ShipmentPhoto
+
+    job = Job.objects.select_related('shipment').prefetch_related('timeline').filter(pk=job_id).first()
+    if job is None:
+        return None
+    shipment = getattr(job, 'shipment', None)
+    has_pod_photos = shipment is not None and ShipmentPhoto.objects.filter(
+        shipment=shipment, photo_type=ShipmentPhoto.PhotoType.POD
+    ).exists()
+
+    tracking = build_job_tracking(job, job.timeline.all(), shipment, has_pod_photos)
+    tracking.save()
+    invalidate_tracking(job_id)
+    return tracking
+
+
+def tracking_payload(tracking):
+    return {
+        'id': str(tracking.job_id),
+        'job_number': tracking.job_number,
+        'status': tracking.status,
+        'status_display': tracking.status_display,
+        'current_location': tracking.current_location,
+        'pickup_city': tracking.pickup_city,
+        'delivery_city': tracking.delivery_city,
+        'estimated_delivery': tracking.estimated_delivery,
+        'delivered_at': tracking.delivered_at,
+        'timeline': tracking.timeline,
+        # Driver details are not exposed publicly yet
+        'driver': None,
+        'proof': {
+            'signature': tracking.has_signature,
+            'photo': tracking.has_photo,
+        },
+        'updated_at': tracking.updated_at,
+    }
+
+
+# ---------------------------------------------------------------------------
+# Response cache
+# ---------------------------------------------------------------------------
+
+def get_tracking(lookup):
+    """
+    ``{'payload': ..., 'etag': ...}`` for ``lookup`` (from
+    ``parse_tracking_id``), from the cache when possible. None if there is
+    no such job.
+    """
+    job_id = lookup.get('job_id')
+    if job_id is None:
+        job_id = cache.get(_number_key(lookup['job_number']))
+    if job_id is not None:
+        entry = cache.get(_job_key(job_id))
+        if entry is not None:
+            return entry
+
+    tracking = JobTracking.objects.filter(**lookup).first()
+    if tracking is None:
+        # Jobs created before the read model existed get their row on first use
+        job = Job.objects.filter(**{k.replace('job_id', 'pk'): v for k, v in lookup.items()}).first()
+        if job is None:
+            return None
+        tracking = refresh_tracking(job.pk)
+
+    # Store the JSON form, so cache hits render exactly like misses
+    content = json.dumps(tracking_payload(tracking), cls=JSONEncoder, sort_keys=True)
+    entry = {
+        'payload': json.loads(content),
+        'etag': '"{}"'.format(hashlib.sha1(content.encode()).hexdigest()),
+    }
+    values = {_job_key(tracking.job_id): entry}
+    if tracking.job_number is not None:
+        values[_number_key(tracking.job_number)] = str(tracking.job_id)
+    cache.set_many(values, settings.TRACKING_CACHE_TTL)
+    return entry
+
+
+def invalidate_tracking(job_id):
+    # The number -> id alias never changes, so only the payload goes
+    cache.delete(_job_key(job_id))
@@ -1,22 +1,43 @@
 # apps/orders/views.py
-from rest_framework import viewsets, generics
+import uuid
+from rest_framework import viewsets, generics, status
+from rest_framework.decorators import action
+from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from django_filters.rest_framework import DjangoFilterBackend
 from .models import Job
-from .serializers import JobSerializer
+from .search import JobSearchFilter
+from .serializers import JobSerializer, JobListSerializer
+from .importers import FORMATS, JobImporter, decode_lines, detect_format, iter_rows
+from apps.users.models import User
 # Import the custom permissions, including the new object-level one
 from apps.core.permissions import IsAdminOrManagerUser, IsOwnerOrAssignedDriverOrAdmin
-from apps.transportation.models import Shipment
-from apps.billing.models import Invoice
-from datetime import date, timedelta
+from apps.core.pagination import KeysetPagination
+from apps.core.fieldsets import SparseFieldsetViewMixin
+from apps.core.idempotency import IdempotentCreateMixin
 
-class JobViewSet(viewsets.ModelViewSet):
+class JobViewSet(IdempotentCreateMixin, SparseFieldsetViewMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing Job records.
-    It automatically creates a corresponding Shipment and Invoice upon job creation.
+    Creating a job also creates its Shipment, Invoice and initial timeline
+    entry (see apps/orders/services.py). Creates accept an Idempotency-Key
+    header (see apps/core/idempotency.py).
     """
     # Use select_related for necessary lookups for efficient retrieval and permission checks
-    queryset = Job.objects.all().select_related('customer', 'shipment__driver__user').order_by('-created_at')
+    queryset = Job.objects.all().select_related(
+        'customer', 'shipment__driver__user'
+    ).prefetch_related('timeline').order_by('-created_at', '-id')
     serializer_class = JobSerializer
+    pagination_class = KeysetPagination
+    idempotency_scope = 'jobs.create'
+    # ?q= ranked search (apps/orders/search.py)
+    filter_backends = [DjangoFilterBackend, JobSearchFilter]
+
+    # ?fields= / ?expand= on the list (apps/core/fieldsets.py)
+    list_serializer_class = JobListSerializer
+    field_select_related = {'customer': ['customer'], 'status': ['shipment']}
+    field_prefetch_related = {'timeline': ['timeline']}
     
     # -----------------------------------------------------------------------
     # 🛑 FIX: Use get_permissions to define permissions per action
@@ -25,7 +46,7 @@ class JobViewSet(viewsets.ModelViewSet):
         """
         Instantiates and returns the list of permissions that this view requires.
         """
-        if self.action == 'list' or self.action == 'create':
+        if self.action in ['list', 'create', 'import_jobs']:
             # Only Admin or Manager can list all jobs or create new ones via the admin endpoint
             self.permission_classes = [IsAdminOrManagerUser]
         elif self.action in ['retrieve', 'update', 'partial_update', 'destroy']:
@@ -37,59 +58,56 @@ class JobViewSet(viewsets.ModelViewSet):
             
         return [permission() for permission in self.permission_classes]
 
-    def perform_create(self, serializer):
+    @action(
+        detail=False,
+        methods=['post'],
+        url_path='import',
+        parser_classes=[MultiPartParser, FormParser],
+    )
+    def import_jobs(self, request):
         """
-        Custom logic to run after a new job is created.
-        1. Saves the Job instance.
-        2. Creates an associated Shipment record (set to PENDING).
-        3. Creates an associated Invoice record (set to DRAFT) with a 14-day due date.
+        Bulk import jobs from an uploaded CSV or NDJSON file.
+        POST /api/v1/jobs/import/  (multipart: file, optional file_format, customer_id)
+        Rows are imported independently; the response lists every failed row.
         """
-        # First, save the Job instance
-        job_instance = serializer.save()
-
-        # Now, create the associated Shipment record
-        Shipment.objects.get_or_create(
-            job=job_instance,
-            defaults={
-                'driver': None,
-                'vehicle': None,
-                'status': Shipment.ShipmentStatus.PENDING
-            }
-        )
-
-        # --- Logic to create the Invoice ---
-        total_amount = 50.00
+        upload = request.FILES.get('file')
+        if not upload:
+            return Response({"error": "No file provided."}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Adjust price based on service type
-        if job_instance.service_type == Job.ServiceType.RESIDENTIAL_MOVING:
-            total_amount += 250.00
-        elif job_instance.service_type == Job.ServiceType.OFFICE_RELOCATION:
-            total_amount += 400.00
-        elif job_instance.service_type == Job.ServiceType.PALLET_DELIVERY:
-            total_amount += 100.00
+        fmt = request.data.get('file_format') or detect_format(upload.name, upload.content_type or '')
+        if fmt not in FORMATS:
+            return Response(
+                {"error": f"Unsupported file_format '{fmt}'. Use one of: {', '.join(FORMATS)}."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
-        # Create the Invoice for this Job
-        Invoice.objects.create(
-            job=job_instance,
-            total_amount=total_amount,
-            # Set due date 14 days from today
-            due_date=date.today() + timedelta(days=14),
-            status=Invoice.InvoiceStatus.DRAFT  # Starts as a draft
-        )
+        customer = None
+        customer_id = request.data.get('customer_id')
+        if customer_id:
+            try:
+                customer_id = uuid.UUID(str(customer_id))
+            except ValueError:
+                return Response({"customer_id": ["Must be a valid UUID."]}, status=status.HTTP_400_BAD_REQUEST)
+            customer = User.objects.filter(pk=customer_id).first()
+            if customer is None:
+                return Response({"customer_id": ["Customer not found."]}, status=status.HTTP_400_BAD_REQUEST)
 
-        print(f"SUCCESS: Shipment and Invoice created for new job {job_instance.id}.")
+        report = JobImporter(customer=customer).run(iter_rows(decode_lines(upload), fmt))
+        return Response(report, status=status.HTTP_200_OK)
 
 
 # -----------------------------------------------------------------------
 # --- NEW VIEW: BookingView ---
 # -----------------------------------------------------------------------
 
-class BookingView(generics.CreateAPIView):
+class BookingView(IdempotentCreateMixin, generics.CreateAPIView):
     """
     A public-facing view for authenticated customers to create a new job booking.
     It ensures that the customer creating the job is the one on the record.
+    Retries sent with the same Idempotency-Key return the original booking.
     """
     queryset = Job.objects.all()
+    idempotency_scope = 'jobs.booking'
     serializer_class = JobSerializer
     permission_classes = [IsAuthenticated] # ANY logged-in user can access this
 
@@ -100,31 +118,6 @@ class BookingView(generics.CreateAPIView):
         """
         # We ignore any 'customer_id' sent in the request body and force
         # it to be the currently authenticated user.
-        job_instance = serializer.save(customer=self.request.user)
-
-        # Replicate Shipment creation logic
-        Shipment.objects.get_or_create(
-            job=job_instance,
-            defaults={
-                'driver': None,
-                'vehicle': None,
-                'status': Shipment.ShipmentStatus.PENDING
-            }
-        )
-
-        # Replicate Invoice creation logic
-        total_amount = 50.00
-        if job_instance.service_type == 'RESIDENTIAL_MOVING':
-            total_amount += 250.00
-        elif job_instance.service_type == 'OFFICE_RELOCATION':
-            total_amount += 400.00
-        elif job_instance.service_type == 'PALLET_DELIVERY':
-            total_amount += 100.00
-
-        Invoice.objects.create(
-            job=job_instance,
-            total_amount=total_amount,
-            due_date=date.today() + timedelta(days=14),
-            status=Invoice.InvoiceStatus.DRAFT
-        )
-        print(f"SUCCESS: Shipment and Invoice created for new job {job_instance.id} from BookingView.")
\ No newline at end of file
+        # Shipment, Invoice and the initial timeline entry are created by
+        # JobSerializer.create (see apps/orders/services.py).
+        serializer.save(customer=self.request.user)
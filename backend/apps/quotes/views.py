@@ -5,6 +5,10 @@ from rest_framework.permissions import AllowAny, IsAdminUser
 from decimal import Decimal
 import math
 
+from django.conf import settings
+
+from apps.core.geo import lane_distance_miles
+
 from .models import QuoteCalculatorConfig
 from .permissions import IsAdminRole
 from .serializers import (
@@ -16,12 +20,13 @@ from .serializers import (
 
 def estimate_distance(origin: str, destination: str) -> Decimal:
     """
-    Simplified distance estimation.
-    In production, integrate with Google Maps Distance Matrix API or similar.
+    Road miles between origin and destination from the offline gazetteer
+    (apps/core/geo.py), or QUOTE_UNLOCATED_MILES when either cannot be found.
     """
-    # For now, return a placeholder based on string length difference (demo purposes)
-    base_distance = abs(len(origin) - len(destination)) * 10
-    return Decimal(str(max(base_distance, 50)))  # Minimum 50 miles
+    miles = lane_distance_miles(origin, destination)
+    if miles is None:
+        miles = settings.QUOTE_UNLOCATED_MILES
+    return Decimal(str(max(round(miles), 50)))  # Minimum 50 miles
 
 
 def estimate_delivery_days(distance: Decimal) -> str:
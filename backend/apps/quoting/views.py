@@ -4,6 +4,8 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from decimal import Decimal
+from django.conf import settings
+from apps.core.geo import lane_distance_miles
 from .serializers import QuoteRequestSerializer, QuoteResponseSerializer
 from .models import QuoteRequest
 
@@ -35,7 +37,6 @@ class InstantQuoteView(APIView):
         # Estimate delivery days based on distance (simplified)
         estimated_days = self.estimate_delivery_days(data['origin'], data['destination'])
         
-        # Mock distance (in production, use Google Distance Matrix API)
         distance = self.estimate_distance(data['origin'], data['destination'])
         
         # Save quote request for analytics (optional)
@@ -83,7 +84,7 @@ class InstantQuoteView(APIView):
         }
         multiplier = package_multipliers.get(package_type, Decimal('1.0'))
         
-        # Distance-based cost (mock calculation)
+        # Distance-based cost
         distance = self.estimate_distance(origin, destination)
         distance_cost = Decimal(str(distance)) * Decimal('0.15')
         
@@ -95,7 +96,6 @@ class InstantQuoteView(APIView):
     def estimate_delivery_days(self, origin, destination):
         """
         Estimate delivery days based on distance
-        In production, use real distance calculation
         """
         distance = self.estimate_distance(origin, destination)
         
@@ -110,12 +110,10 @@ class InstantQuoteView(APIView):
     
     def estimate_distance(self, origin, destination):
         """
-        Mock distance calculation
-        In production, integrate with Google Distance Matrix API
+        Road miles from the offline gazetteer (apps/core/geo.py), shared
+        with the quote calculator; QUOTE_UNLOCATED_MILES when a city is unknown
         """
-        # Simple hash-based mock for consistent results
-        combined = f"{origin}{destination}".lower()
-        hash_value = sum(ord(c) for c in combined)
-        
-        # Return value between 100 and 3000 miles
-        return (hash_value % 2900) + 100
+        miles = lane_distance_miles(origin, destination)
+        if miles is None:
+            return settings.QUOTE_UNLOCATED_MILES
+        return round(miles)
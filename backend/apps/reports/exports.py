@@ -0,0 +1,141 @@
+# apps/reports/exports.py
+"""
+Streaming CSV / NDJSON exports.
+
+Rows are read with ``values_list`` through ``.iterator(chunk_size=...)``
+(a server-side cursor on Postgres) and written to the response as they
+arrive, so memory use does not depend on how many rows are exported.
+"""
+
+import csv
+import json
+
+import django_filters
+from django.core.serializers.json import DjangoJSONEncoder
+
+from apps.billing.models import Invoice
+from apps.orders.models import Job
+from apps.transportation.filters import ShipmentFilter
+
+CSV = 'csv'
+NDJSON = 'ndjson'
+FORMATS = (CSV, NDJSON)
+CHUNK_SIZE = 2000
+
+# (column header, queryset lookup)
+JOB_COLUMNS = [
+    ('id', 'id'),
+    ('job_number', 'job_number'),
+    ('customer_email', 'customer__email'),
+    ('job_type', 'job_type'),
+    ('service_type', 'service_type'),
+    ('status', 'current_status'),
+    ('pickup_address', 'pickup_address'),
+    ('pickup_city', 'pickup_city'),
+    ('delivery_address', 'delivery_address'),
+    ('delivery_city', 'delivery_city'),
+    ('requested_pickup_date', 'requested_pickup_date'),
+    ('pallet_count', 'pallet_count'),
+    ('weight_lbs', 'weight_lbs'),
+    ('bol_number', 'bol_number'),
+    ('created_at', 'created_at'),
+    ('shipment_status', 'shipment__status'),
+    ('driver_email', 'shipment__driver__user__email'),
+    ('vehicle_plate', 'shipment__vehicle__license_plate'),
+    ('actual_departure', 'shipment__actual_departure'),
+    ('actual_arrival', 'shipment__actual_arrival'),
+    ('invoice_status', 'invoice__status'),
+    ('invoice_total', 'invoice__total_amount'),
+    ('invoice_due_date', 'invoice__due_date'),
+]
+
+SHIPMENT_COLUMNS = [
+    ('id', 'id'),
+    ('job_id', 'job_id'),
+    ('job_number', 'job__job_number'),
+    ('status', 'status'),
+    ('driver_email', 'driver__user__email'),
+    ('vehicle_plate', 'vehicle__license_plate'),
+    ('pickup_city', 'job__pickup_city'),
+    ('delivery_city', 'job__delivery_city'),
+    ('estimated_departure', 'estimated_departure'),
+    ('actual_departure', 'actual_departure'),
+    ('estimated_arrival', 'estimated_arrival'),
+    ('actual_arrival', 'actual_arrival'),
+    ('created_at', 'created_at'),
+]
+
+INVOICE_COLUMNS = [
+    ('id', 'id'),
+    ('job_id', 'job_id'),
+    ('job_number', 'job__job_number'),
+    ('customer_email', 'job__customer__email'),
+    ('status', 'status'),
+    ('subtotal', 'subtotal'),
+    ('tax_amount', 'tax_amount'),
+    ('total_amount', 'total_amount'),
+    ('due_date', 'due_date'),
+    ('payment_method', 'payment_method'),
+    ('created_at', 'created_at'),
+]
+
+
+class CreatedRangeFilterSet(django_filters.FilterSet):
+    """Period filters shared by every export."""
+    created_after = django_filters.IsoDateTimeFilter(field_name='created_at', lookup_expr='gte')
+    created_before = django_filters.IsoDateTimeFilter(field_name='created_at', lookup_expr='lt')
+
+
+class JobExportFilter(CreatedRangeFilterSet):
+    # Same parameters as the job list endpoints
+    status = django_filters.CharFilter(field_name='current_status')
+    customer_id = django_filters.UUIDFilter(field_name='customer_id')
+
+    class Meta:
+        model = Job
+        fields = ['service_type', 'job_type', 'status', 'customer_id']
+
+
+class ShipmentExportFilter(CreatedRangeFilterSet, ShipmentFilter):
+    class Meta(ShipmentFilter.Meta):
+        fields = ['job_id', 'status']
+
+
+class InvoiceExportFilter(CreatedRangeFilterSet):
+    due_after = django_filters.DateFilter(field_name='due_date', lookup_expr='gte')
+    due_before = django_filters.DateFilter(field_name='due_date', lookup_expr='lte')
+
+    class Meta:
+        model = Invoice
+        fields = ['status', 'payment_method']
+
+
+class _Echo:
+    """File-like object whose write() hands the line back to csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+def _iter_values(queryset, columns):
+    lookups = [lookup for _, lookup in columns]
+    return queryset.values_list(*lookups).iterator(chunk_size=CHUNK_SIZE)
+
+
+def stream_csv(queryset, columns):
+    writer = csv.writer(_Echo())
+    yield writer.writerow([header for header, _ in columns])
+    for row in _iter_values(queryset, columns):
+        yield writer.writerow(row)
+
+
+def stream_ndjson(queryset, columns):
+    headers = [header for header, _ in columns]
+    for row in _iter_values(queryset, columns):
+        yield json.dumps(dict(zip(headers, row)), cls=DjangoJSONEncoder) + '\n'
+
+
+def stream_rows(queryset, columns, fmt):
+    if fmt == NDJSON:
+        return stream_ndjson(queryset, columns)
+    return stream_csv(queryset, columns)
@@ -0,0 +1,97 @@
+import csv
+import json
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from apps.orders.services import create_job
+
+User = get_user_model()
+
+
+class StreamingExportTests(APITestCase):
+    def setUp(self):
+        self.manager = User.objects.create_user(
+            username='manager', email='manager@example.com', password='pw', role='MANAGER'
+        )
+        self.customer = User.objects.create_user(
+            username='customer', email='customer@example.com', password='pw', role='CUSTOMER'
+        )
+        fields = {
+            'customer': self.customer,
+            'service_type': 'PALLET_DELIVERY',
+            'cargo_description': 'Two pallets of tiles',
+            'pickup_address': '1 King St',
+            'pickup_city': 'Toronto',
+            'pickup_contact_person': 'Sam',
+            'pickup_contact_phone': '555-0100',
+            'delivery_address': '2 Queen St',
+            'delivery_city': 'Ottawa',
+            'delivery_contact_person': 'Alex',
+            'delivery_contact_phone': '555-0101',
+            'requested_pickup_date': timezone.now() + timedelta(days=2),
+        }
+        self.first = create_job(**fields)
+        self.second = create_job(**dict(fields, service_type='OFFICE_RELOCATION'))
+        self.client.force_authenticate(user=self.manager)
+
+    @staticmethod
+    def read(response):
+        return b''.join(response.streaming_content).decode()
+
+    def test_job_csv_includes_shipment_and_invoice_columns(self):
+        response = self.client.get(reverse('api:export-jobs'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        rows = list(csv.DictReader(StringIO(self.read(response))))
+        self.assertEqual([r['job_number'] for r in rows],
+                         [str(self.first.job_number), str(self.second.job_number)])
+        self.assertEqual(rows[0]['shipment_status'], 'PENDING')
+        self.assertEqual(rows[0]['invoice_status'], 'DRAFT')
+        self.assertEqual(rows[0]['customer_email'], 'customer@example.com')
+
+    def test_job_export_applies_filters(self):
+        response = self.client.get(reverse('api:export-jobs'), {
+            'file_format': 'ndjson',
+            'service_type': 'OFFICE_RELOCATION',
+            'status': 'ORDER_PLACED',
+        })
+
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = [json.loads(line) for line in self.read(response).splitlines()]
+        self.assertEqual([r['job_number'] for r in rows], [self.second.job_number])
+        self.assertEqual(rows[0]['invoice_total'], '450.00')
+
+    def test_shipment_and_invoice_exports(self):
+        tomorrow = (timezone.now() + timedelta(days=1)).isoformat()
+        shipments = self.read(self.client.get(
+            reverse('api:export-shipments'),
+            {'file_format': 'ndjson', 'job_id': self.first.id, 'created_before': tomorrow},
+        )).splitlines()
+        invoices = list(csv.DictReader(StringIO(self.read(
+            self.client.get(reverse('api:export-invoices'), {'status': 'DRAFT'})
+        ))))
+
+        self.assertEqual(len(shipments), 1)
+        self.assertEqual(json.loads(shipments[0])['job_number'], self.first.job_number)
+        self.assertEqual(len(invoices), 2)
+
+    def test_invalid_parameters_are_rejected(self):
+        bad_format = self.client.get(reverse('api:export-jobs'), {'file_format': 'xlsx'})
+        bad_filter = self.client.get(reverse('api:export-jobs'), {'created_after': 'yesterday'})
+
+        self.assertEqual(bad_format.status_code, 400)
+        self.assertEqual(bad_filter.status_code, 400)
+
+    def test_customers_cannot_export(self):
+        self.client.force_authenticate(user=self.customer)
+
+        response = self.client.get(reverse('api:export-jobs'))
+
+        self.assertEqual(response.status_code, 403)
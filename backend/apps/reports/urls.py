@@ -4,7 +4,10 @@ from django.urls import path
 from .views import (
     DashboardSummaryView, 
     RecentJobsChartView, 
-    JobStatusReportView
+    JobStatusReportView,
+    JobExportView,
+    ShipmentExportView,
+    InvoiceExportView,
 )
 
 urlpatterns = [
@@ -16,4 +19,9 @@ urlpatterns = [
     
     # Endpoint for an aggregate report (e.g., total revenue per job status)
     path('job-status-report/', JobStatusReportView.as_view(), name='job-status-report'),
-]
\ No newline at end of file
+
+    # Streaming CSV / NDJSON exports (same filters as the list endpoints)
+    path('export/jobs/', JobExportView.as_view(), name='export-jobs'),
+    path('export/shipments/', ShipmentExportView.as_view(), name='export-shipments'),
+    path('export/invoices/', InvoiceExportView.as_view(), name='export-invoices'),
+]
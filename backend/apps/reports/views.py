@@ -1,14 +1,19 @@
 from rest_framework import views, status
 from rest_framework.response import Response
 from django.db.models import Count, Sum
+from django.http import StreamingHttpResponse
+from django.utils import timezone
 from django.db.models.functions import TruncDate
 from datetime import datetime, timedelta
 
+from apps.billing.models import Invoice
 from apps.core.permissions import IsAdminOrManagerUser
 from apps.orders.models import Job
 from apps.transportation.models import Shipment
 from apps.users.models import User
 
+from . import exports
+
 class DashboardSummaryView(views.APIView):
     """
     Provides a high-level summary of key metrics for the dashboard.
@@ -93,4 +98,65 @@ class JobStatusReportView(views.APIView):
             total_revenue=Sum('invoice__total_amount')
         ).order_by('shipment__status')
 
-        return Response(jobs_by_status, status=status.HTTP_200_OK)
\ No newline at end of file
+        return Response(jobs_by_status, status=status.HTTP_200_OK)
+
+
+class StreamingExportView(views.APIView):
+    """
+    Base view for streaming exports.
+
+        GET /api/v1/reports/export/jobs/?file_format=ndjson&created_after=2025-01-01
+
+    ``file_format`` is ``csv`` (default) or ``ndjson``; every other query
+    parameter is handled by ``filterset_class``.
+    """
+    permission_classes = [IsAdminOrManagerUser]
+    queryset = None
+    filterset_class = None
+    columns = []
+    export_name = None
+
+    def get(self, request, *args, **kwargs):
+        fmt = request.query_params.get('file_format', exports.CSV).lower()
+        if fmt not in exports.FORMATS:
+            return Response(
+                {'file_format': [f"Must be one of: {', '.join(exports.FORMATS)}."]},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        filterset = self.filterset_class(request.query_params, queryset=self.queryset.all())
+        if not filterset.is_valid():
+            return Response(filterset.errors, status=status.HTTP_400_BAD_REQUEST)
+        # A stable order keeps repeated exports of the same period comparable
+        queryset = filterset.qs.order_by('created_at', 'id')
+
+        content_type = 'application/x-ndjson' if fmt == exports.NDJSON else 'text/csv'
+        response = StreamingHttpResponse(
+            exports.stream_rows(queryset, self.columns, fmt),
+            content_type=content_type,
+        )
+        filename = f"{self.export_name}-{timezone.now():%Y%m%d-%H%M%S}.{fmt}"
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+
+class JobExportView(StreamingExportView):
+    """Jobs with their shipment and invoice columns."""
+    queryset = Job.objects.all()
+    filterset_class = exports.JobExportFilter
+    columns = exports.JOB_COLUMNS
+    export_name = 'jobs'
+
+
+class ShipmentExportView(StreamingExportView):
+    queryset = Shipment.objects.all()
+    filterset_class = exports.ShipmentExportFilter
+    columns = exports.SHIPMENT_COLUMNS
+    export_name = 'shipments'
+
+
+class InvoiceExportView(StreamingExportView):
+    queryset = Invoice.objects.all()
+    filterset_class = exports.InvoiceExportFilter
+    columns = exports.INVOICE_COLUMNS
+    export_name = 'invoices'
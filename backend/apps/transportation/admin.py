@@ -1,6 +1,7 @@
 from django.contrib import admin
 from django.utils.safestring import mark_safe
-from .models import Vehicle, Driver, Shipment, MaintenanceLog, ShipmentPhoto
+from .images import variant_urls
+from .models import Vehicle, Driver, Shipment, MaintenanceLog, ShipmentPhoto, Trip
 
 
 @admin.register(Vehicle)
@@ -94,7 +95,7 @@ class ShipmentAdmin(admin.ModelAdmin):
         'driver__user__username',
         'vehicle__license_plate'
     )
-    readonly_fields = ('created_at', 'updated_at', 'proof_of_delivery_preview', 'signature_preview')
+    readonly_fields = ('created_at', 'updated_at', 'proof_of_delivery_preview', 'signature_preview', 'trip')
     raw_id_fields = ('job', 'driver', 'vehicle')
     
     # inlines is populated via get_inlines to avoid circular reference issues if defined after
@@ -107,7 +108,8 @@ class ShipmentAdmin(admin.ModelAdmin):
                 'job',
                 'driver',
                 'vehicle',
-                'status'
+                'status',
+                'trip'
             )
         }),
         ('Schedule - Estimated', {
@@ -138,7 +140,9 @@ class ShipmentAdmin(admin.ModelAdmin):
 
     def proof_of_delivery_preview(self, obj):
         if obj.proof_of_delivery_image:
-            return mark_safe(f'<img src="{obj.proof_of_delivery_image.url}" style="max-height: 200px; max-width: 300px;" />')
+            variants = variant_urls(obj.proof_of_delivery_image, obj.proof_of_delivery_variants)
+            url = variants.get('preview') or obj.proof_of_delivery_image.url
+            return mark_safe(f'<img src="{url}" style="max-height: 200px; max-width: 300px;" />')
         return "No proof of delivery image uploaded"
     
     proof_of_delivery_preview.short_description = "Legacy POD Preview"
@@ -163,16 +167,51 @@ class ShipmentAdmin(admin.ModelAdmin):
 class ShipmentPhotoInline(admin.TabularInline):
     model = ShipmentPhoto # Need to make sure ShipmentPhoto is imported
     extra = 0
-    fields = ('photo_type', 'image', 'image_preview')
-    readonly_fields = ('image_preview',)
+    fields = ('photo_type', 'image', 'media_status', 'image_preview')
+    readonly_fields = ('media_status', 'image_preview')
 
     def image_preview(self, obj):
         if obj.image:
-             return mark_safe(f'<img src="{obj.image.url}" style="max-height: 100px; max-width: 100px;" />')
+            # The stored thumbnail when there is one, not the full photo
+            url = variant_urls(obj.image, obj.variants).get('thumb') or obj.image.url
+            return mark_safe(f'<img src="{url}" style="max-height: 100px; max-width: 100px;" />')
         return ""
 
 
 
+class TripShipmentInline(admin.TabularInline):
+    model = Shipment
+    fk_name = 'trip'
+    extra = 0
+    can_delete = False
+    fields = ('job', 'status', 'driver', 'vehicle')
+    readonly_fields = fields
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(Trip)
+class TripAdmin(admin.ModelAdmin):
+    """Consolidated loads; created by consolidate_loads, changed through the API."""
+    list_display = (
+        'pickup_city',
+        'delivery_city',
+        'departs_at',
+        'vehicle',
+        'driver',
+        'load_kg',
+        'status'
+    )
+    list_filter = ('status', 'departs_at')
+    search_fields = ('pickup_city', 'delivery_city', 'vehicle__license_plate', 'driver__user__username')
+    readonly_fields = (
+        'pickup_city', 'delivery_city', 'vehicle', 'driver', 'status',
+        'departs_at', 'arrives_at', 'load_kg', 'created_at', 'updated_at'
+    )
+    inlines = [TripShipmentInline]
+
+
 @admin.register(MaintenanceLog)
 class MaintenanceLogAdmin(admin.ModelAdmin):
     list_display = (
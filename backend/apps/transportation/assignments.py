@@ -0,0 +1,160 @@
+# apps/transportation/assignments.py
+"""
+New-assignment feed for the driver app.
+
+    GET /api/v1/driver/assignments/?since=<watermark>&timeout=25
+
+Long poll: the request is held until a shipment is assigned to the driver
+or ``timeout`` seconds pass (at most ``DRIVER_ASSIGNMENT_POLL_SECONDS``),
+then returns ``{"results": [shipments assigned since], "watermark": "..."}``
+in the ``my_jobs`` format. The app sends ``watermark`` back on its next
+poll; without ``since`` the call returns a watermark at once. An idle driver
+costs one held request per timeout instead of a ``my_jobs`` refresh loop.
+
+Assigning a driver (``ShipmentSerializer.update``) wakes their poll through
+the live event broker (apps/core/live.py) and, when Firebase is configured
+and the app registered a ``push_token``, also sends an FCM notification so
+a backgrounded app learns of it.
+
+``assigned_at`` is stamped again once the assignment commits
+(``stamp_assigned_on_commit``), before the wake-up is published. A
+shipment assigned in a transaction that was still open when a poll read
+and answered would otherwise carry an ``assigned_at`` older than the
+watermark it got, and no later poll would return it.
+
+The feed only reports new assignments; the app still runs a ``?since=``
+delta sync of ``my_jobs`` when it resumes to pick up edits and removals.
+"""
+
+import logging
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from rest_framework.exceptions import AuthenticationFailed, PermissionDenied, ValidationError
+from rest_framework.utils import json
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from apps.core.live import publish, subscribe
+from apps.notifications.services import send_push
+from apps.orders.sync import parse_watermark
+
+from .models import Driver, Shipment
+from .serializers import MyJobsShipmentSerializer
+
+logger = logging.getLogger(__name__)
+
+
+def driver_channel(driver_id):
+    return f'driver:{driver_id}'
+
+
+def notify_assignment(shipment):
+    """Wake the assigned driver's feed and push to their app."""
+    driver = shipment.driver
+    publish(driver_channel(driver.pk), {'type': 'assignment', 'data': {'shipment_id': str(shipment.pk)}})
+    if driver.push_token:
+        job = shipment.job
+        send_push(
+            driver.push_token,
+            'New job assigned',
+            f'Job #{job.job_number}: {job.pickup_city} to {job.delivery_city}',
+            data={'type': 'assignment', 'shipment_id': shipment.pk, 'job_number': job.job_number},
+        )
+
+
+def stamp_assigned_on_commit(shipment_ids):
+    """Set the shipments' ``assigned_at`` to the time the current transaction commits."""
+    shipment_ids = list(shipment_ids)
+    transaction.on_commit(
+        lambda: Shipment.objects.filter(pk__in=shipment_ids).update(assigned_at=timezone.now())
+    )
+
+
+def notify_assignment_on_commit(shipment):
+    # Only once the assignment is visible to the driver's next read
+    transaction.on_commit(lambda: notify_assignment(shipment), robust=True)
+
+
+def assignments_since(driver, since, shipment_ids=()):
+    """
+    The driver's shipments assigned after ``since``, plus ``shipment_ids``
+    (from wake-up events).
+    """
+    assigned = Shipment.objects.filter(driver=driver, assigned_at__gt=since)
+    if shipment_ids:
+        assigned = assigned | Shipment.objects.filter(driver=driver, pk__in=shipment_ids)
+    assigned = assigned.select_related('job__customer').order_by('assigned_at')
+    return MyJobsShipmentSerializer(assigned, many=True).data
+
+
+def _authenticate_driver(request):
+    """The requesting user's Driver; raises AuthenticationFailed or PermissionDenied."""
+    result = JWTAuthentication().authenticate(request)
+    if result is None:
+        raise AuthenticationFailed('Authentication credentials were not provided.')
+    try:
+        return Driver.objects.get(user=result[0])
+    except Driver.DoesNotExist:
+        raise PermissionDenied
+
+
+def _parse_timeout(value):
+    limit = settings.DRIVER_ASSIGNMENT_POLL_SECONDS
+    if value in (None, ''):
+        return limit
+    try:
+        return min(max(float(value), 0), limit)
+    except ValueError:
+        raise ValidationError({'timeout': 'Expected a number of seconds.'})
+
+
+async def assignment_feed(request):
+    try:
+        driver = await sync_to_async(_authenticate_driver)(request)
+    except AuthenticationFailed as exc:
+        detail = exc.detail if isinstance(exc.detail, dict) else {'detail': exc.detail}
+        return JsonResponse(detail, status=401)
+    except PermissionDenied as exc:
+        return JsonResponse({'detail': exc.detail}, status=403)
+
+    try:
+        since = parse_watermark(request.GET.get('since'))
+        timeout = _parse_timeout(request.GET.get('timeout'))
+    except ValidationError as exc:
+        return JsonResponse(exc.detail, status=400)
+
+    watermark = timezone.now()
+    if since is None:
+        return JsonResponse({'results': [], 'watermark': watermark}, encoder=JSONEncoder)
+
+    # Subscribed before the first read, so an assignment cannot fall in between
+    subscription = subscribe(driver_channel(driver.pk))
+    results = await sync_to_async(assignments_since)(driver, since)
+    if results or not timeout:
+        subscription.close()
+        return JsonResponse({'results': results, 'watermark': watermark}, encoder=JSONEncoder)
+
+    # The wait happens while the body is streamed: views run inside the sync
+    # middleware's thread, which a held response would otherwise keep busy
+    response = StreamingHttpResponse(
+        _wait_for_assignment(subscription, driver, since, timeout, watermark),
+        content_type='application/json',
+    )
+    response['Cache-Control'] = 'no-cache'
+    return response
+
+
+async def _wait_for_assignment(subscription, driver, since, timeout, watermark):
+    try:
+        results = []
+        event = await subscription.get(timeout)
+        if event is not None:
+            watermark = timezone.now()
+            results = await sync_to_async(assignments_since)(driver, since, [event['data']['shipment_id']])
+    finally:
+        subscription.close()
+    yield json.dumps({'results': results, 'watermark': watermark}, cls=JSONEncoder)
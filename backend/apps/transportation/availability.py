@@ -0,0 +1,166 @@
+# apps/transportation/availability.py
+"""
+When drivers and vehicles are booked, and who is free.
+
+Every shipment books its driver and vehicle from ``booked_from`` to
+``booked_until``, kept on the row by ``Shipment.save``:
+
+- from ``estimated_departure``, or else the job's ``requested_pickup_date``
+- until ``estimated_arrival``, or else ``BOOKING_DEFAULT_HOURS`` later
+
+and for at most ``BOOKING_MAX_HOURS``, so a booking that overlaps T starts
+after T minus that.
+
+Delivered and failed shipments no longer book anything.
+
+Assigning a driver or vehicle (``ShipmentSerializer.validate``,
+``consolidation.assign_trip``) is refused when it overlaps another of their
+bookings, with the driver or vehicle row locked so concurrent assignments
+are checked one after the other. Bookings written any other way (older
+data, admin edits, a moved pickup date) are not checked, so one resource's
+bookings may still overlap each other; every check here looks for any
+overlapping booking rather than relying on them being disjoint.
+``conflicting_shipment`` is a range seek on the (driver, booked_from) or
+(vehicle, booked_from) index, bounded on both sides by the longest booking
+rather than running back through the resource's whole history.
+
+``free_drivers``/``free_vehicles`` answer "who is free from T1 to T2" with a
+range query on booked_from; ``Calendar`` is the in-memory equivalent for
+planning many assignments at once (dispatch.py).
+
+    GET /api/v1/transportation/vehicles/available/?start=...&end=...
+    GET /api/v1/transportation/drivers/available/?start=...&end=...
+"""
+
+from bisect import bisect_left
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Case, F, Value, When
+
+from .models import Driver, Shipment, Vehicle
+
+# Statuses that no longer hold a driver or vehicle
+FINISHED = [Shipment.ShipmentStatus.DELIVERED, Shipment.ShipmentStatus.FAILED]
+
+
+def max_booking():
+    return timedelta(hours=settings.BOOKING_MAX_HOURS)
+
+
+def booking_interval(pickup, departure=None, arrival=None):
+    """``(start, end)`` a shipment books its driver and vehicle for."""
+    start = departure or pickup
+    if arrival is not None and arrival > start:
+        return start, min(arrival, start + max_booking())
+    return start, start + timedelta(hours=settings.BOOKING_DEFAULT_HOURS)
+
+
+def rebook_job(job):
+    """
+    Move the bookings that follow the job's pickup date (no
+    ``estimated_departure``) after it changed; one UPDATE.
+    """
+    pickup = job.requested_pickup_date
+    Shipment.objects.filter(job=job, estimated_departure=None).update(
+        booked_from=pickup,
+        booked_until=Case(
+            When(estimated_arrival__gt=pickup + max_booking(), then=Value(pickup + max_booking())),
+            When(estimated_arrival__gt=pickup, then=F('estimated_arrival')),
+            default=Value(booking_interval(pickup)[1]),
+        ),
+    )
+
+
+def bookings():
+    """Shipments still holding their driver and vehicle."""
+    return Shipment.objects.exclude(status__in=FINISHED).exclude(booked_from=None)
+
+
+def overlapping(start, end):
+    return bookings().filter(booked_from__lt=end, booked_from__gt=start - max_booking(), booked_until__gt=start)
+
+
+def conflicting_shipment(field, resource_id, start, end, exclude=None, trip=None):
+    """
+    The first shipment booking driver or vehicle (``field``)
+    ``resource_id`` during [start, end), or None. Shipment ``exclude`` and
+    the members of ``trip`` (which share their driver and vehicle) are not
+    conflicts.
+    """
+    conflicts = overlapping(start, end).filter(**{field: resource_id})
+    if exclude is not None:
+        conflicts = conflicts.exclude(pk=exclude)
+    if trip is not None:
+        conflicts = conflicts.exclude(trip=trip)
+    return conflicts.select_related('job').order_by('booked_from').first()
+
+
+def lock_resource(field, resource_id):
+    """
+    Lock the driver or vehicle row until the transaction ends, so that
+    checking its bookings and saving a new one cannot interleave with
+    another assignment of it. Call inside ``transaction.atomic``.
+    """
+    lock_resources(field, [resource_id])
+
+
+def lock_resources(field, resource_ids):
+    """
+    ``lock_resource`` for many drivers or vehicles at once, taken in pk
+    order. Callers locking both lock drivers first, like a manual
+    assignment does.
+    """
+    model = Driver if field == 'driver' else Vehicle
+    list(
+        model.objects.select_for_update().filter(pk__in=set(resource_ids))
+        .order_by('pk').values_list('pk', flat=True)
+    )
+
+
+def free_vehicles(start, end):
+    """Vehicles not in maintenance and not booked during [start, end)."""
+    busy = overlapping(start, end).exclude(vehicle=None).values('vehicle_id')
+    return Vehicle.objects.exclude(status=Vehicle.VehicleStatus.MAINTENANCE).exclude(pk__in=busy)
+
+
+def free_drivers(start, end):
+    """Active drivers not booked during [start, end)."""
+    busy = overlapping(start, end).exclude(driver=None).values('driver_id')
+    return Driver.objects.filter(user__is_active=True).exclude(pk__in=busy)
+
+
+class Calendar:
+    """
+    Bookings per driver or vehicle held in memory, as sorted starts, their
+    ends, and the latest end among each prefix, for checking many candidate
+    intervals without queries. Bookings of one key may overlap.
+    """
+
+    def __init__(self):
+        self._starts = {}
+        self._ends = {}
+        self._reach = {}
+
+    def add(self, key, start, end):
+        starts = self._starts.setdefault(key, [])
+        ends = self._ends.setdefault(key, [])
+        reach = self._reach.setdefault(key, [])
+        index = bisect_left(starts, start)
+        starts.insert(index, start)
+        ends.insert(index, end)
+        reach.insert(index, end)
+        for position in range(index, len(reach)):
+            previous = reach[position - 1] if position else None
+            reach[position] = ends[position] if previous is None or previous < ends[position] else previous
+
+    def count(self, key):
+        return len(self._starts.get(key, ()))
+
+    def is_free(self, key, start, end):
+        starts = self._starts.get(key)
+        if not starts:
+            return True
+        # Only bookings starting before ``end`` can overlap; free unless one of them ends after ``start``
+        index = bisect_left(starts, end)
+        return not index or self._reach[key][index - 1] <= start
@@ -0,0 +1,371 @@
+# apps/transportation/consolidation.py
+"""
+Load consolidation: commercial jobs on the same lane go out together on
+one vehicle as a Trip instead of a truck each.
+
+    POST /api/v1/transportation/trips/consolidate/
+         {"start": "2026-03-02", "end": "2026-03-03", "dry_run": true}
+    python manage.py consolidate_loads --start 2026-03-02 [--dry-run]
+
+Pending, unassigned COMMERCIAL shipments picked up in the window are
+bucketed by lane (pickup city, delivery city, as the gazetteer in
+apps/core/geo.py names them) and pickup day, then packed
+first-fit decreasing by weight (``job_weight_kg``) into loads no heavier
+than the largest available vehicle. Each load of two or more shipments
+gets the smallest vehicle that holds it and is free for the whole bucket
+(availability.py) and becomes a Trip; single shipments are left to
+dispatch as before.
+
+Members share the trip's vehicle and its span (``departs_at`` to
+``arrives_at``), written as their estimated departure and arrival so they
+book the vehicle together. Assigning a driver to the trip (``assign_trip``)
+assigns every member, and moving the trip on (``set_trip_status``)
+updates every member shipment, its job's timeline and tracking, in one
+transaction with bulk writes.
+"""
+
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from apps.core.geo import place_key
+from apps.orders.models import Job, JobTimeline
+from apps.orders.signals import refresh_tracking_on_commit
+
+from .assignments import notify_assignment_on_commit, stamp_assigned_on_commit
+from .availability import Calendar, booking_interval, conflicting_shipment, lock_resource, lock_resources, overlapping
+from .dispatch import job_weight_kg
+from .models import DriverJobTombstone, Shipment, Trip, Vehicle
+
+# Trip status -> (shipment status, timeline status, description)
+PROPAGATED = {
+    Trip.TripStatus.IN_TRANSIT: (
+        Shipment.ShipmentStatus.IN_TRANSIT, JobTimeline.Status.IN_TRANSIT, 'In transit on a consolidated load',
+    ),
+    Trip.TripStatus.DELIVERED: (
+        Shipment.ShipmentStatus.DELIVERED, JobTimeline.Status.DELIVERED, 'Delivered from a consolidated load',
+    ),
+}
+NEXT_STATUS = {
+    Trip.TripStatus.PLANNED: Trip.TripStatus.IN_TRANSIT,
+    Trip.TripStatus.IN_TRANSIT: Trip.TripStatus.DELIVERED,
+}
+
+
+def lane_key(city):
+    # "Toronto", "toronto, ON" and "Toronto ON M5V 2T6" are one lane end
+    return place_key(city)
+
+
+@dataclass
+class Load:
+    pickup_city: str
+    delivery_city: str
+    departs_at: datetime
+    arrives_at: datetime
+    shipments: list = field(default_factory=list)
+    load_kg: object = 0
+    vehicle: Vehicle = None
+
+
+@dataclass
+class ConsolidationPlan:
+    start: datetime
+    end: datetime
+    loads: list = field(default_factory=list)
+    # Shipments that share a lane but no load could take
+    unplaced: list = field(default_factory=list)
+
+    def as_dict(self):
+        return {
+            'start': self.start,
+            'end': self.end,
+            'trips': [
+                {
+                    'pickup_city': load.pickup_city,
+                    'delivery_city': load.delivery_city,
+                    'departs_at': load.departs_at,
+                    'arrives_at': load.arrives_at,
+                    'vehicle_id': load.vehicle.pk,
+                    'vehicle_plate': load.vehicle.license_plate,
+                    'capacity_kg': load.vehicle.capacity_kg,
+                    'load_kg': round(load.load_kg, 2),
+                    'job_numbers': [shipment.job.job_number for shipment in load.shipments],
+                }
+                for load in self.loads
+            ],
+            'unplaced': [shipment.job.job_number for shipment in self.unplaced],
+        }
+
+
+def _eligible():
+    return Shipment.objects.filter(
+        status=Shipment.ShipmentStatus.PENDING,
+        driver__isnull=True,
+        vehicle__isnull=True,
+        trip__isnull=True,
+        job__job_type=Job.JobType.COMMERCIAL,
+    )
+
+
+def _buckets(shipments):
+    buckets = {}
+    for shipment in shipments:
+        job = shipment.job
+        key = (lane_key(job.pickup_city), lane_key(job.delivery_city), timezone.localdate(job.requested_pickup_date))
+        buckets.setdefault(key, []).append(shipment)
+    return [bucket for bucket in buckets.values() if len(bucket) > 1]
+
+
+def _pack(shipments, limit):
+    """First-fit decreasing: ``[[(weight, shipment), ...], ...]`` and what did not fit."""
+    bins, unplaced = [], []
+    for weight, shipment in sorted(
+        ((job_weight_kg(shipment.job), shipment) for shipment in shipments), key=lambda item: -item[0]
+    ):
+        if weight > limit:
+            unplaced.append(shipment)
+            continue
+        for contents in bins:
+            if sum(w for w, _ in contents) + weight <= limit:
+                contents.append((weight, shipment))
+                break
+        else:
+            bins.append([(weight, shipment)])
+    return bins, unplaced
+
+
+def plan_consolidation(start, end):
+    """Work out trips for the pending commercial shipments picked up in [start, end)."""
+    plan = ConsolidationPlan(start, end)
+    buckets = _buckets(
+        _eligible().filter(job__requested_pickup_date__gte=start, job__requested_pickup_date__lt=end)
+        .select_related('job').order_by('job__requested_pickup_date', 'job__job_number')
+    )
+    if not buckets:
+        return plan
+
+    vehicles = list(
+        Vehicle.objects.exclude(status=Vehicle.VehicleStatus.MAINTENANCE).order_by('capacity_kg', 'license_plate')
+    )
+    spans = []
+    for bucket in buckets:
+        # Held to the longest booking, like each member's own
+        departs_at, arrives_at = booking_interval(
+            None, min(s.booked_from for s in bucket), max(s.booked_until for s in bucket)
+        )
+        spans.append((departs_at, arrives_at, bucket))
+    calendar = Calendar()
+    booked = overlapping(min(span[0] for span in spans), max(span[1] for span in spans))
+    for vehicle_id, booked_from, booked_until in booked.exclude(vehicle=None).values_list(
+        'vehicle_id', 'booked_from', 'booked_until'
+    ):
+        calendar.add(vehicle_id, booked_from, booked_until)
+
+    for departs_at, arrives_at, bucket in spans:
+        free = [vehicle for vehicle in vehicles if calendar.is_free(vehicle.pk, departs_at, arrives_at)]
+        if not free:
+            plan.unplaced.extend(bucket)
+            continue
+        bins, unplaced = _pack(bucket, free[-1].capacity_kg)
+        plan.unplaced.extend(unplaced)
+        # Heaviest loads pick their vehicle first
+        for contents in sorted(bins, key=lambda contents: -sum(w for w, _ in contents)):
+            if len(contents) < 2:
+                continue
+            load_kg = sum(w for w, _ in contents)
+            vehicle = next((v for v in free if v.capacity_kg >= load_kg and calendar.is_free(v.pk, departs_at, arrives_at)), None)
+            if vehicle is None:
+                plan.unplaced.extend(shipment for _, shipment in contents)
+                continue
+            calendar.add(vehicle.pk, departs_at, arrives_at)
+            first = contents[0][1].job
+            plan.loads.append(Load(
+                pickup_city=first.pickup_city,
+                delivery_city=first.delivery_city,
+                departs_at=departs_at,
+                arrives_at=arrives_at,
+                shipments=sorted((shipment for _, shipment in contents), key=lambda s: s.job.job_number),
+                load_kg=load_kg,
+                vehicle=vehicle,
+            ))
+    return plan
+
+
+def apply_consolidation(plan):
+    """
+    Create the plan's trips in one transaction. Members assigned or
+    grouped since it was planned are dropped, and loads left with fewer
+    than two shipments are not created; loads whose vehicle was booked
+    since move to ``unplaced``. Returns the plan.
+    """
+    if not plan.loads:
+        return plan
+    with transaction.atomic():
+        still_eligible = set(
+            _eligible().select_for_update()
+            .filter(pk__in=[shipment.pk for load in plan.loads for shipment in load.shipments])
+            .values_list('pk', flat=True)
+        )
+        # Vehicles booked since planning are checked again, with them locked
+        lock_resources('vehicle', [load.vehicle.pk for load in plan.loads])
+        loads = []
+        for load in plan.loads:
+            load.shipments = [shipment for shipment in load.shipments if shipment.pk in still_eligible]
+            if len(load.shipments) < 2:
+                continue
+            if conflicting_shipment('vehicle', load.vehicle.pk, load.departs_at, load.arrives_at) is not None:
+                plan.unplaced.extend(load.shipments)
+                continue
+            load.load_kg = sum(job_weight_kg(shipment.job) for shipment in load.shipments)
+            loads.append(load)
+
+        trips = Trip.objects.bulk_create([
+            Trip(
+                pickup_city=load.pickup_city,
+                delivery_city=load.delivery_city,
+                vehicle=load.vehicle,
+                departs_at=load.departs_at,
+                arrives_at=load.arrives_at,
+                load_kg=round(load.load_kg, 2),
+            )
+            for load in loads
+        ])
+        now = timezone.now()
+        members = []
+        for trip, load in zip(trips, loads):
+            for shipment in load.shipments:
+                shipment.trip, shipment.vehicle = trip, load.vehicle
+                # bulk_update skips Shipment.save: the booking is set here too
+                shipment.estimated_departure = shipment.booked_from = trip.departs_at
+                shipment.estimated_arrival = shipment.booked_until = trip.arrives_at
+                shipment.updated_at = now
+                members.append(shipment)
+        Shipment.objects.bulk_update(
+            members,
+            ['trip', 'vehicle', 'estimated_departure', 'estimated_arrival', 'booked_from', 'booked_until', 'updated_at'],
+            batch_size=500,
+        )
+        for shipment in members:
+            refresh_tracking_on_commit(shipment.job_id)
+    plan.loads = loads
+    return plan
+
+
+def run_consolidation(start, end, dry_run=False):
+    plan = plan_consolidation(start, end)
+    return plan if dry_run else apply_consolidation(plan)
+
+
+def assign_trip(trip, driver, vehicle):
+    """
+    Put ``driver`` and ``vehicle`` on the trip and every member shipment.
+    Raises ValidationError if the trip is no longer planned or either is
+    booked elsewhere during the trip. Returns the trip as saved.
+    """
+    if vehicle is not None and vehicle.status == Vehicle.VehicleStatus.MAINTENANCE:
+        raise ValidationError({'vehicle_id': 'Selected vehicle is in maintenance'})
+
+    with transaction.atomic():
+        # Checked against the row as it is now, with concurrent changes to it waiting
+        trip = Trip.objects.select_for_update().get(pk=trip.pk)
+        if trip.status != Trip.TripStatus.PLANNED:
+            raise ValidationError({'status': "Only planned trips can be reassigned."})
+        for name, resource in (('driver', driver), ('vehicle', vehicle)):
+            if resource is None:
+                continue
+            lock_resource(name, resource.pk)
+            conflict = conflicting_shipment(name, resource.pk, trip.departs_at, trip.arrives_at, trip=trip.pk)
+            if conflict is not None:
+                raise ValidationError({
+                    f'{name}_id': f'Selected {name} is already booked for Job #{conflict.job.job_number} at the time'
+                })
+
+        trip.driver, trip.vehicle = driver, vehicle
+        trip.save(update_fields=['driver', 'vehicle', 'updated_at'])
+
+        now = timezone.now()
+        members = list(trip.shipments.select_related('job', 'driver'))
+        tombstones, newly_assigned = [], []
+        for shipment in members:
+            if shipment.driver_id is not None and shipment.driver_id != getattr(driver, 'pk', None):
+                tombstones.append(DriverJobTombstone(
+                    driver_id=shipment.driver_id, job_id=shipment.job_id, job_number=shipment.job.job_number
+                ))
+            if driver is not None and shipment.driver_id != driver.pk:
+                shipment.assigned_at = now
+                newly_assigned.append(shipment)
+            shipment.driver, shipment.vehicle = driver, vehicle
+            # Same status rules as a manual assignment (ShipmentSerializer.update)
+            if driver and vehicle and shipment.status == Shipment.ShipmentStatus.PENDING:
+                shipment.status = 'ASSIGNED'
+            elif not (driver and vehicle) and shipment.status == 'ASSIGNED':
+                shipment.status = Shipment.ShipmentStatus.PENDING
+            shipment.updated_at = now
+        Shipment.objects.bulk_update(members, ['driver', 'vehicle', 'status', 'assigned_at', 'updated_at'])
+        DriverJobTombstone.objects.bulk_create(tombstones)
+        for shipment in members:
+            refresh_tracking_on_commit(shipment.job_id)
+        if newly_assigned:
+            stamp_assigned_on_commit(shipment.pk for shipment in newly_assigned)
+        for shipment in newly_assigned:
+            notify_assignment_on_commit(shipment)
+    return trip
+
+
+def set_trip_status(trip, status, location='', description=''):
+    """
+    Move the trip on to ``status`` and every unfinished member with it:
+    shipment status and times, a timeline entry and the job's current
+    status. Raises ValidationError for an out-of-order status. Returns the
+    trip as saved.
+    """
+    shipment_status, timeline_status, default_description = PROPAGATED[status]
+
+    with transaction.atomic():
+        # Checked against the row as it is now, with concurrent changes to it waiting
+        trip = Trip.objects.select_for_update().get(pk=trip.pk)
+        if NEXT_STATUS.get(trip.status) != status:
+            raise ValidationError({'status': f'Cannot move a {trip.status} trip to {status}.'})
+        if status == Trip.TripStatus.IN_TRANSIT and (trip.driver_id is None or trip.vehicle_id is None):
+            raise ValidationError({'status': 'Assign a driver and a vehicle before the trip leaves.'})
+        trip.status = status
+        trip.save(update_fields=['status', 'updated_at'])
+
+        now = timezone.now()
+        members = list(
+            trip.shipments.exclude(status__in=[Shipment.ShipmentStatus.DELIVERED, Shipment.ShipmentStatus.FAILED])
+            .select_related('job')
+        )
+        jobs = [shipment.job for shipment in members]
+        for shipment in members:
+            shipment.status = shipment_status
+            if status == Trip.TripStatus.IN_TRANSIT:
+                shipment.actual_departure = now
+            else:
+                shipment.actual_arrival = now
+            shipment.updated_at = now
+        for job in jobs:
+            job.current_status, job.current_status_at, job.updated_at = timeline_status, now, now
+
+        JobTimeline.objects.filter(job__in=jobs, is_current=True).update(is_current=False)
+        JobTimeline.objects.bulk_create([
+            JobTimeline(
+                job=job,
+                status=timeline_status,
+                location=location or (job.pickup_city if status == Trip.TripStatus.IN_TRANSIT else job.delivery_city),
+                description=description or default_description,
+                timestamp=now,
+                is_current=True,
+            )
+            for job in jobs
+        ])
+        Job.objects.bulk_update(jobs, ['current_status', 'current_status_at', 'updated_at'])
+        Shipment.objects.bulk_update(members, ['status', 'actual_departure', 'actual_arrival', 'updated_at'])
+        # Bulk writes skip the model signals that keep tracking current
+        for job in jobs:
+            refresh_tracking_on_commit(job.pk)
+    return trip
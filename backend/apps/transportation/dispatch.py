@@ -0,0 +1,223 @@
+# apps/transportation/dispatch.py
+"""
+Batch dispatch: assign every pending shipment picked up in a window to a
+driver and a vehicle in one go, instead of one PATCH per shipment.
+
+    POST /api/v1/transportation/shipments/dispatch/
+         {"start": "2026-03-02", "end": "2026-03-03", "dry_run": true}
+    python manage.py dispatch --start 2026-03-02 --end 2026-03-03 [--dry-run]
+
+Shipments are taken in pickup order. Each goes to:
+
+- the smallest AVAILABLE vehicle whose ``capacity_kg`` holds the job
+  (``weight_lbs``, or ``pallet_count`` at ``DISPATCH_PALLET_WEIGHT_LBS``
+  each when no weight was given)
+- the active driver with the fewest jobs in the window
+
+where neither is already booked while the shipment is (availability.py;
+assignments made earlier, by hand or by dispatch, count).
+A shipment records one driver, so residential jobs needing a larger crew
+are left for a dispatcher, as are shipments nothing fits; the plan says
+why for each.
+
+The plan is worked out in memory from four queries, then applied in one
+transaction with a bulk UPDATE. Shipments assigned by hand in the meantime
+are skipped, and so are assignments whose driver or vehicle was booked in
+the meantime (checked again with their rows locked). Assigned drivers are notified like a manual assignment
+(assignments.py). A dry run returns the same plan without applying it.
+"""
+
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from apps.orders.signals import refresh_tracking_on_commit
+
+from .assignments import notify_assignment_on_commit, stamp_assigned_on_commit
+from .availability import Calendar, booking_interval, conflicting_shipment, lock_resources, overlapping
+from .models import Driver, Shipment, Vehicle
+
+KG_PER_LB = Decimal('0.45359237')
+
+
+@dataclass
+class DispatchPlan:
+    start: datetime
+    end: datetime
+    # [(shipment, driver, vehicle), ...]
+    assignments: list = field(default_factory=list)
+    # [(shipment, reason), ...]
+    unassigned: list = field(default_factory=list)
+
+    def as_dict(self):
+        return {
+            'start': self.start,
+            'end': self.end,
+            'assigned': [
+                {
+                    'shipment_id': shipment.pk,
+                    'job_number': shipment.job.job_number,
+                    'requested_pickup_date': shipment.job.requested_pickup_date,
+                    'driver_id': driver.pk,
+                    'driver_name': driver.user.get_full_name() or driver.user.username,
+                    'vehicle_id': vehicle.pk,
+                    'vehicle_plate': vehicle.license_plate,
+                }
+                for shipment, driver, vehicle in self.assignments
+            ],
+            'unassigned': [
+                {'shipment_id': shipment.pk, 'job_number': shipment.job.job_number, 'reason': reason}
+                for shipment, reason in self.unassigned
+            ],
+        }
+
+
+def dispatch_window(start_date, end_date=None):
+    """Aware datetimes covering ``start_date`` through ``end_date`` (inclusive)."""
+    end_date = end_date or start_date
+    start = timezone.make_aware(datetime.combine(start_date, time.min))
+    end = timezone.make_aware(datetime.combine(end_date + timedelta(days=1), time.min))
+    return start, end
+
+
+def job_weight_kg(job):
+    """The job's weight in kg, estimated from its pallets when not given."""
+    if job.weight_lbs:
+        return job.weight_lbs * KG_PER_LB
+    if job.pallet_count:
+        return job.pallet_count * settings.DISPATCH_PALLET_WEIGHT_LBS * KG_PER_LB
+    return Decimal(0)
+
+
+def plan_dispatch(start, end):
+    """Work out assignments for the pending shipments picked up in [start, end)."""
+    plan = DispatchPlan(start, end)
+
+    pending = list(
+        Shipment.objects.filter(
+            status=Shipment.ShipmentStatus.PENDING,
+            driver__isnull=True,
+            # Consolidated loads are assigned as a whole (consolidation.py)
+            trip__isnull=True,
+            job__requested_pickup_date__gte=start,
+            job__requested_pickup_date__lt=end,
+        ).select_related('job').order_by('job__requested_pickup_date', 'job__job_number')
+    )
+    if not pending:
+        return plan
+
+    vehicles = list(Vehicle.objects.filter(status=Vehicle.VehicleStatus.AVAILABLE).order_by('capacity_kg', 'license_plate'))
+    capacities = [vehicle.capacity_kg for vehicle in vehicles]
+    drivers = list(Driver.objects.filter(user__is_active=True).select_related('user').order_by('user__username'))
+
+    intervals = {
+        shipment.pk: booking_interval(
+            shipment.job.requested_pickup_date, shipment.estimated_departure, shipment.estimated_arrival
+        )
+        for shipment in pending
+    }
+    # What is already booked around the window keeps its driver and vehicle busy
+    calendar = Calendar()
+    booked = overlapping(min(s for s, _ in intervals.values()), max(e for _, e in intervals.values()))
+    for driver_id, vehicle_id, booked_from, booked_until in booked.values_list(
+        'driver_id', 'vehicle_id', 'booked_from', 'booked_until'
+    ):
+        if driver_id:
+            calendar.add(('driver', driver_id), booked_from, booked_until)
+        if vehicle_id:
+            calendar.add(('vehicle', vehicle_id), booked_from, booked_until)
+
+    for shipment in pending:
+        job = shipment.job
+        booking = intervals[shipment.pk]
+        if (job.crew_size or 1) > 1:
+            plan.unassigned.append((shipment, f'Needs a crew of {job.crew_size}.'))
+            continue
+
+        weight = job_weight_kg(job)
+        fitting = vehicles[bisect_left(capacities, weight):]
+        if not fitting:
+            plan.unassigned.append((shipment, f'No available vehicle carries {weight:.0f} kg.'))
+            continue
+        vehicle = next((v for v in fitting if calendar.is_free(('vehicle', v.pk), *booking)), None)
+        if vehicle is None:
+            plan.unassigned.append((shipment, 'Every vehicle large enough is booked at the time.'))
+            continue
+        free_drivers = [d for d in drivers if calendar.is_free(('driver', d.pk), *booking)]
+        if not free_drivers:
+            plan.unassigned.append((shipment, 'No driver is free at the time.'))
+            continue
+        driver = min(free_drivers, key=lambda d: calendar.count(('driver', d.pk)))
+
+        calendar.add(('driver', driver.pk), *booking)
+        calendar.add(('vehicle', vehicle.pk), *booking)
+        plan.assignments.append((shipment, driver, vehicle))
+    return plan
+
+
+def apply_plan(plan):
+    """
+    Save the plan's assignments in one transaction. Shipments assigned
+    since it was planned move to ``plan.unassigned``. Returns the plan.
+    """
+    if not plan.assignments:
+        return plan
+    with transaction.atomic():
+        still_pending = set(
+            Shipment.objects.select_for_update()
+            .filter(
+                pk__in=[shipment.pk for shipment, _, _ in plan.assignments],
+                status=Shipment.ShipmentStatus.PENDING,
+                driver__isnull=True,
+                trip__isnull=True,
+            ).values_list('pk', flat=True)
+        )
+        # Assignments committed since planning may have booked the same
+        # drivers or vehicles; with them locked, check again
+        lock_resources('driver', [driver.pk for _, driver, _ in plan.assignments])
+        lock_resources('vehicle', [vehicle.pk for _, _, vehicle in plan.assignments])
+        now = timezone.now()
+        applied = []
+        for shipment, driver, vehicle in plan.assignments:
+            if shipment.pk not in still_pending:
+                plan.unassigned.append((shipment, 'Assigned by someone else while dispatching.'))
+                continue
+            booking = booking_interval(
+                shipment.job.requested_pickup_date, shipment.estimated_departure, shipment.estimated_arrival
+            )
+            if (
+                conflicting_shipment('driver', driver.pk, *booking, exclude=shipment.pk) is not None
+                or conflicting_shipment('vehicle', vehicle.pk, *booking, exclude=shipment.pk) is not None
+            ):
+                plan.unassigned.append((shipment, 'Driver or vehicle booked by someone else while dispatching.'))
+                continue
+            shipment.driver, shipment.vehicle = driver, vehicle
+            # Same status a manual assignment of both gives (ShipmentSerializer.update)
+            shipment.status = 'ASSIGNED'
+            # bulk_update skips Shipment.save and auto_now
+            shipment.assigned_at = shipment.updated_at = now
+            shipment._loaded_driver_id = driver.pk
+            applied.append((shipment, driver, vehicle))
+
+        Shipment.objects.bulk_update(
+            [shipment for shipment, _, _ in applied],
+            ['driver', 'vehicle', 'status', 'assigned_at', 'updated_at'],
+            batch_size=500,
+        )
+        stamp_assigned_on_commit(shipment.pk for shipment, _, _ in applied)
+        for shipment, _, _ in applied:
+            refresh_tracking_on_commit(shipment.job_id)
+            notify_assignment_on_commit(shipment)
+    plan.assignments = applied
+    return plan
+
+
+def run_dispatch(start, end, dry_run=False):
+    """Plan the window's assignments and, unless ``dry_run``, apply them."""
+    plan = plan_dispatch(start, end)
+    return plan if dry_run else apply_plan(plan)
@@ -0,0 +1,108 @@
+# apps/transportation/images.py
+"""
+Normalization and thumbnails for proof-of-delivery photos.
+
+Phone photos arrive at full resolution (several MB, often rotated through
+EXIF only). Before a photo is stored (by the upload workers in media.py)
+it is:
+
+- rotated upright from its EXIF orientation, with the metadata dropped
+- scaled down to ``MEDIA_IMAGE_MAX_DIMENSION`` on the longest edge
+- re-encoded as a progressive JPEG at ``MEDIA_IMAGE_QUALITY``
+
+and the ``VARIANTS`` below are rendered once and stored next to it, their
+names kept on the row (``ShipmentPhoto.variants``,
+``Shipment.proof_of_delivery_variants``). Lists and the admin show those
+instead of downloading originals. ``generate_image_variants`` backfills
+images stored before this existed.
+
+Signatures are small line drawings and are stored untouched.
+"""
+
+import logging
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+# Variant name -> longest edge in pixels
+VARIANTS = {
+    'thumb': 200,
+    'preview': 800,
+}
+
+
+def _open(source):
+    image = Image.open(source)
+    # Lets the JPEG decoder skip detail the output will not keep
+    image.draft('RGB', (settings.MEDIA_IMAGE_MAX_DIMENSION, settings.MEDIA_IMAGE_MAX_DIMENSION))
+    image = ImageOps.exif_transpose(image)
+    if image.mode in ('RGBA', 'LA', 'P'):
+        # JPEG has no transparency: flatten onto white
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, 'white')
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+def _encode(image, size):
+    if max(image.size) > size:
+        image = image.copy()
+        image.thumbnail((size, size), Image.Resampling.LANCZOS)
+    buffer = BytesIO()
+    image.save(buffer, 'JPEG', quality=settings.MEDIA_IMAGE_QUALITY, optimize=True, progressive=True)
+    return ContentFile(buffer.getvalue())
+
+
+def normalize_image(source, name):
+    """
+    ``(name, content, {variant: content})`` for an uploaded image. Files
+    Pillow cannot read are returned unchanged, without variants.
+    """
+    try:
+        image = _open(source)
+    except Exception as exc:
+        logger.warning('Storing %s as uploaded; not a readable image: %s', name, exc)
+        source.seek(0)
+        return name, File(source, name=name), {}
+    name = f'{os.path.splitext(name)[0]}.jpg'
+    # Scaled once here; the variants are rendered from the smaller copy
+    limit = settings.MEDIA_IMAGE_MAX_DIMENSION
+    image.thumbnail((limit, limit), Image.Resampling.LANCZOS)
+    return name, _encode(image, limit), {variant: _encode(image, size) for variant, size in VARIANTS.items()}
+
+
+def render_variants(field_file):
+    """The VARIANTS of an already stored image, or {} if it is unreadable."""
+    try:
+        with field_file.open('rb') as stored:
+            image = _open(stored)
+    except Exception as exc:
+        logger.warning('No variants for %s: %s', field_file.name, exc)
+        return {}
+    return {variant: _encode(image, size) for variant, size in VARIANTS.items()}
+
+
+def store_variants(field_file, variants):
+    """Save rendered variants next to ``field_file``; returns ``{variant: stored name}``."""
+    root = os.path.splitext(field_file.name)[0]
+    return {
+        variant: field_file.storage.save(f'{root}_{variant}.jpg', content)
+        for variant, content in variants.items()
+    }
+
+
+def variant_urls(field_file, variants, request=None):
+    """``{variant: url}`` for the stored variants, absolute when ``request`` is given."""
+    if not field_file or not variants:
+        return {}
+    urls = {variant: field_file.storage.url(name) for variant, name in variants.items()}
+    if request is not None:
+        urls = {variant: request.build_absolute_uri(url) for variant, url in urls.items()}
+    return urls
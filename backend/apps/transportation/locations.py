@@ -0,0 +1,216 @@
+# apps/transportation/locations.py
+"""
+Driver GPS ping ingestion.
+
+    POST /api/v1/driver/location/
+    {"fixes": [{"lat": 43.65, "lng": -79.38, "speed": 12.5,
+                "timestamp": "2026-01-01T12:00:00Z"}, ...]}
+
+A request never writes a row per fix:
+
+- The latest position per driver lives in the cache (one get and one set
+  per request), so "where is driver X" is a single key lookup.
+- History goes into a per-process buffer that is written to
+  DriverLocation with one bulk INSERT when it holds
+  ``LOCATION_FLUSH_SIZE`` fixes, or when its oldest fix has waited
+  ``LOCATION_FLUSH_SECONDS`` (a background thread covers quiet periods).
+
+If a worker dies, the history still in its buffer is lost (at most one
+flush interval); latest positions are unaffected.
+"""
+
+import atexit
+import logging
+import threading
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import ValidationError
+
+from .models import DriverLocation
+
+logger = logging.getLogger(__name__)
+
+MAX_FIXES_PER_REQUEST = 500
+# Device clocks drift; fixes further in the future than this are rejected
+MAX_CLOCK_SKEW = timedelta(minutes=5)
+CACHE_PREFIX = 'driver-location:v1'
+
+
+def _latest_key(driver_id):
+    return f'{CACHE_PREFIX}:{str(driver_id).lower()}'
+
+
+# ---------------------------------------------------------------------------
+# Parsing
+# ---------------------------------------------------------------------------
+
+def _parse_timestamp(value):
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        # Epoch milliseconds, as sent by JavaScript's Date.now()
+        return datetime.fromtimestamp(value / 1000, tz=dt_timezone.utc)
+    recorded_at = parse_datetime(value) if isinstance(value, str) else None
+    if recorded_at is None:
+        raise ValueError('timestamp must be an ISO 8601 datetime or epoch milliseconds')
+    if timezone.is_naive(recorded_at):
+        recorded_at = timezone.make_aware(recorded_at, dt_timezone.utc)
+    return recorded_at
+
+
+def _parse_number(fix, name, low, high, required=True):
+    value = fix.get(name)
+    if value is None and not required:
+        return None
+    if not isinstance(value, (int, float)) or isinstance(value, bool) or not low <= value <= high:
+        raise ValueError(f'{name} must be a number between {low} and {high}')
+    return float(value)
+
+
+def parse_fixes(data):
+    """
+    ``[(recorded_at, lat, lng, speed), ...]`` from a request body: either
+    ``{"fixes": [...]}`` or a single fix. Raises ValidationError.
+    """
+    fixes = data.get('fixes') if isinstance(data, dict) and 'fixes' in data else [data]
+    if not isinstance(fixes, list) or not fixes:
+        raise ValidationError({'fixes': 'Expected a non-empty list of fixes.'})
+    if len(fixes) > MAX_FIXES_PER_REQUEST:
+        raise ValidationError({'fixes': f'At most {MAX_FIXES_PER_REQUEST} fixes per request.'})
+
+    latest_allowed = timezone.now() + MAX_CLOCK_SKEW
+    parsed, errors = [], {}
+    for index, fix in enumerate(fixes):
+        try:
+            if not isinstance(fix, dict):
+                raise ValueError('Expected an object')
+            recorded_at = _parse_timestamp(fix.get('timestamp'))
+            if recorded_at > latest_allowed:
+                raise ValueError('timestamp is in the future')
+            parsed.append((
+                recorded_at,
+                _parse_number(fix, 'lat', -90, 90),
+                _parse_number(fix, 'lng', -180, 180),
+                _parse_number(fix, 'speed', 0, 1000, required=False),
+            ))
+        except ValueError as exc:
+            errors[str(index)] = str(exc)
+    if errors:
+        raise ValidationError({'fixes': errors})
+    return parsed
+
+
+# ---------------------------------------------------------------------------
+# Latest position
+# ---------------------------------------------------------------------------
+
+def _position(recorded_at, lat, lng, speed):
+    return {'lat': lat, 'lng': lng, 'speed': speed, 'timestamp': recorded_at.isoformat()}
+
+
+def update_latest_position(driver_id, fixes):
+    """Store the newest of ``fixes`` unless the cache already has a newer one."""
+    newest = max(fixes, key=lambda fix: fix[0])
+    key = _latest_key(driver_id)
+    current = cache.get(key)
+    # Batches can arrive out of order after the app was offline
+    if current is not None and parse_datetime(current['timestamp']) >= newest[0]:
+        return current
+    position = _position(*newest)
+    cache.set(key, position, settings.LOCATION_LATEST_TTL)
+    return position
+
+
+def latest_position(driver_id):
+    return cache.get(_latest_key(driver_id))
+
+
+def latest_positions(driver_ids):
+    """``{driver_id: position}`` for the drivers that have reported one."""
+    keys = {_latest_key(driver_id): driver_id for driver_id in driver_ids}
+    return {keys[key]: position for key, position in cache.get_many(list(keys)).items()}
+
+
+# ---------------------------------------------------------------------------
+# History buffer
+# ---------------------------------------------------------------------------
+
+class LocationBuffer:
+    """Thread-safe buffer of DriverLocation rows, written in bulk."""
+
+    def __init__(self):
+        self._rows = []
+        self._oldest = None
+        self._lock = threading.Lock()
+        self._flusher = None
+
+    def __len__(self):
+        return len(self._rows)
+
+    def add(self, driver_id, fixes):
+        rows = [
+            DriverLocation(driver_id=driver_id, recorded_at=recorded_at, latitude=lat, longitude=lng, speed=speed)
+            for recorded_at, lat, lng, speed in fixes
+        ]
+        with self._lock:
+            if not self._rows:
+                self._oldest = time.monotonic()
+            self._rows.extend(rows)
+            due = len(self._rows) >= settings.LOCATION_FLUSH_SIZE or self._is_stale()
+        if due:
+            self.flush()
+        else:
+            self._start_flusher()
+
+    def _is_stale(self):
+        interval = settings.LOCATION_FLUSH_SECONDS
+        return bool(interval) and self._oldest is not None and time.monotonic() - self._oldest >= interval
+
+    def clear(self):
+        with self._lock:
+            self._rows, self._oldest = [], None
+
+    def flush(self):
+        """Write everything buffered so far; returns the number of rows."""
+        with self._lock:
+            rows, self._rows, self._oldest = self._rows, [], None
+        if not rows:
+            return 0
+        try:
+            DriverLocation.objects.bulk_create(rows, batch_size=settings.LOCATION_FLUSH_SIZE)
+        except Exception:
+            logger.exception('Dropped %d driver locations that could not be written', len(rows))
+            return 0
+        return len(rows)
+
+    def _start_flusher(self):
+        # 0 disables the timer: the buffer is then flushed by size only
+        if not settings.LOCATION_FLUSH_SECONDS or self._flusher is not None:
+            return
+        with self._lock:
+            if self._flusher is None:
+                self._flusher = threading.Thread(target=self._flush_periodically, name='location-flush', daemon=True)
+                self._flusher.start()
+
+    def _flush_periodically(self):
+        while True:
+            time.sleep(settings.LOCATION_FLUSH_SECONDS)
+            with self._lock:
+                stale = self._is_stale()
+            if stale:
+                close_old_connections()
+                self.flush()
+
+
+location_buffer = LocationBuffer()
+atexit.register(location_buffer.flush)
+
+
+def record_fixes(driver_id, fixes):
+    """Ingest parsed fixes for a driver; returns the latest known position."""
+    location_buffer.add(driver_id, fixes)
+    return update_latest_position(driver_id, fixes)
@@ -0,0 +1,32 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from apps.transportation.consolidation import run_consolidation
+from apps.transportation.dispatch import dispatch_window
+
+class Command(BaseCommand):
+    help = 'Groups pending commercial shipments sharing a lane and pickup day into trips on one vehicle'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', type=date.fromisoformat, help='First pickup date (default: today)')
+        parser.add_argument('--end', type=date.fromisoformat, help='Last pickup date (default: --start)')
+        parser.add_argument('--dry-run', action='store_true', help='Print the trips without creating them')
+
+    def handle(self, *args, **options):
+        start = options['start'] or timezone.localdate()
+        end = options['end'] or start
+        if end < start:
+            raise CommandError('--end must not be before --start')
+
+        plan = run_consolidation(*dispatch_window(start, end), dry_run=options['dry_run'])
+        for load in plan.loads:
+            jobs = ', '.join(f'#{shipment.job.job_number}' for shipment in load.shipments)
+            self.stdout.write(
+                f'{load.pickup_city} to {load.delivery_city} ({load.departs_at:%Y-%m-%d}): '
+                f'{jobs} on {load.vehicle.license_plate}, {load.load_kg:.0f} of {load.vehicle.capacity_kg:.0f} kg'
+            )
+
+        verb = 'Would create' if options['dry_run'] else 'Created'
+        shipments = sum(len(load.shipments) for load in plan.loads)
+        self.stdout.write(self.style.SUCCESS(f'{verb} {len(plan.loads)} trips carrying {shipments} shipments.'))
@@ -0,0 +1,33 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from apps.transportation.dispatch import dispatch_window, run_dispatch
+
+class Command(BaseCommand):
+    help = 'Assigns pending shipments picked up in a date range to available drivers and vehicles'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', type=date.fromisoformat, help='First pickup date (default: today)')
+        parser.add_argument('--end', type=date.fromisoformat, help='Last pickup date (default: --start)')
+        parser.add_argument('--dry-run', action='store_true', help='Print the plan without assigning anything')
+
+    def handle(self, *args, **options):
+        start = options['start'] or timezone.localdate()
+        end = options['end'] or start
+        if end < start:
+            raise CommandError('--end must not be before --start')
+
+        plan = run_dispatch(*dispatch_window(start, end), dry_run=options['dry_run'])
+        for shipment, driver, vehicle in plan.assignments:
+            self.stdout.write(
+                f'Job #{shipment.job.job_number} ({shipment.job.requested_pickup_date:%Y-%m-%d %H:%M}): '
+                f'{driver} with {vehicle.license_plate}'
+            )
+        for shipment, reason in plan.unassigned:
+            self.stdout.write(self.style.WARNING(f'Job #{shipment.job.job_number} not assigned: {reason}'))
+
+        verb = 'Would assign' if options['dry_run'] else 'Assigned'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {len(plan.assignments)} shipments; {len(plan.unassigned)} left unassigned.'
+        ))
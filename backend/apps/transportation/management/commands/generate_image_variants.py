@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from apps.transportation.images import render_variants, store_variants
+from apps.transportation.models import Shipment, ShipmentPhoto
+
+class Command(BaseCommand):
+    help = 'Stores thumbnail variants for proof-of-delivery images uploaded before they were generated'
+
+    def handle(self, *args, **options):
+        photos = 0
+        for photo in ShipmentPhoto.objects.exclude(image='').filter(variants={}).iterator():
+            variants = render_variants(photo.image)
+            if variants:
+                photo.variants = store_variants(photo.image, variants)
+                ShipmentPhoto.objects.filter(pk=photo.pk).update(variants=photo.variants)
+                photos += 1
+
+        shipments = 0
+        pending = (
+            Shipment.objects.exclude(proof_of_delivery_image='').exclude(proof_of_delivery_image=None)
+            .filter(proof_of_delivery_variants={})
+        )
+        for shipment in pending.iterator():
+            variants = render_variants(shipment.proof_of_delivery_image)
+            if variants:
+                shipment.proof_of_delivery_variants = store_variants(shipment.proof_of_delivery_image, variants)
+                Shipment.objects.filter(pk=shipment.pk).update(proof_of_delivery_variants=shipment.proof_of_delivery_variants)
+                shipments += 1
+
+        self.stdout.write(self.style.SUCCESS(f'Generated variants for {photos} photos and {shipments} POD images.'))
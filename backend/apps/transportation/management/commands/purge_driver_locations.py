@@ -0,0 +1,25 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from apps.transportation.models import DriverLocation
+
+class Command(BaseCommand):
+    help = 'Deletes driver GPS history older than LOCATION_HISTORY_DAYS'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.LOCATION_HISTORY_DAYS)
+        parser.add_argument('--batch-size', type=int, default=10000)
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        old = DriverLocation.objects.filter(recorded_at__lt=cutoff)
+        # In batches, so a large backlog never holds one long transaction
+        deleted = 0
+        while True:
+            ids = list(old.values_list('pk', flat=True)[:options['batch_size']])
+            if not ids:
+                break
+            deleted += DriverLocation.objects.filter(pk__in=ids).delete()[0]
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} driver locations older than {options["days"]} days.'))
@@ -0,0 +1,15 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from apps.transportation.models import DriverJobTombstone
+
+class Command(BaseCommand):
+    help = 'Deletes driver job tombstones older than DRIVER_SYNC_TOMBSTONE_DAYS'
+
+    def handle(self, *args, **kwargs):
+        # Clients with older watermarks get a full sync, so these are no longer read
+        cutoff = timezone.now() - timedelta(days=settings.DRIVER_SYNC_TOMBSTONE_DAYS)
+        deleted, _ = DriverJobTombstone.objects.filter(removed_at__lt=cutoff).delete()
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} driver job tombstones.'))
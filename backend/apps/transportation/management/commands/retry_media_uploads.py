@@ -0,0 +1,25 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from apps.transportation.media import remove_orphaned_files, retry_uploads
+from apps.transportation.uploads import purge_sessions
+
+class Command(BaseCommand):
+    help = (
+        'Re-queues failed or abandoned proof-of-delivery uploads, removes orphaned spool files '
+        'and expired resumable upload sessions'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--stale-minutes', type=int, default=15,
+            help='Pending uploads untouched this long are treated as abandoned',
+        )
+
+    def handle(self, *args, **options):
+        queued = retry_uploads(stale_after=timedelta(minutes=options['stale_minutes']))
+        removed = remove_orphaned_files()
+        expired = purge_sessions()
+        self.stdout.write(self.style.SUCCESS(
+            f'Queued {queued} uploads; removed {removed} orphaned spool files and {expired} expired sessions.'
+        ))
@@ -0,0 +1,249 @@
+# apps/transportation/media.py
+"""
+Background upload of proof-of-delivery media.
+
+``complete_delivery`` and ``upload_pod`` no longer copy files to storage
+(Cloudinary) inside the request. Instead:
+
+1. ``spool_media`` writes each uploaded file to ``MEDIA_SPOOL_DIR`` and,
+   in the caller's transaction, bulk-creates the pending ShipmentPhoto rows
+   and a MediaUpload row per file, marking the shipment's ``media_status``
+   PENDING. The request is answered as soon as that commits.
+2. On commit the uploads go to a pool of ``MEDIA_UPLOAD_WORKERS`` threads
+   per process, which normalize photos (images.py) and copy each file to
+   storage, retrying up to ``MEDIA_UPLOAD_ATTEMPTS`` times with
+   exponential backoff.
+3. When a shipment has nothing left in flight its ``media_status`` becomes
+   STORED, or FAILED if any file gave up (``retry_media_uploads`` tries
+   those again, and picks up uploads a restarted worker left behind).
+
+The spool directory must be on local disk that survives restarts and is
+shared by the processes of one host.
+"""
+
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from .images import normalize_image, store_variants
+from .models import MediaStatus, MediaUpload, Shipment, ShipmentPhoto
+
+logger = logging.getLogger(__name__)
+
+def spool_path(relative):
+    return os.path.join(settings.MEDIA_SPOOL_DIR, relative)
+
+
+def _spool_file(uploaded):
+    """Write an uploaded file to the spool directory; returns its relative path."""
+    relative = f'{uuid.uuid4().hex}{os.path.splitext(uploaded.name)[1].lower()}'
+    os.makedirs(settings.MEDIA_SPOOL_DIR, exist_ok=True)
+    with open(spool_path(relative), 'wb') as destination:
+        for chunk in uploaded.chunks():
+            destination.write(chunk)
+    return relative
+
+
+def spool_media(shipment, signature=None, pod_image=None, photos=(), photo_type=ShipmentPhoto.PhotoType.POD):
+    """
+    Spool a delivery's files and record them as pending uploads. Must run in
+    a transaction; sets ``shipment.media_status`` without saving it. Returns
+    the MediaUpload rows.
+    """
+    files = [(MediaUpload.Target.PHOTO, photo) for photo in photos]
+    if signature is not None:
+        files.append((MediaUpload.Target.SIGNATURE, signature))
+    if pod_image is not None:
+        files.append((MediaUpload.Target.POD_IMAGE, pod_image))
+    return queue_spooled(
+        shipment,
+        [(target, _spool_file(uploaded), os.path.basename(uploaded.name)) for target, uploaded in files],
+        photo_type,
+    )
+
+
+def queue_spooled(shipment, spooled, photo_type=ShipmentPhoto.PhotoType.POD):
+    """
+    Record files already in the spool directory, as ``[(target, spool path,
+    file name), ...]``, as pending uploads; see spool_media.
+    """
+    if not spooled:
+        return []
+    pending_photos = ShipmentPhoto.objects.bulk_create([
+        ShipmentPhoto(shipment=shipment, photo_type=photo_type, media_status=MediaStatus.PENDING)
+        for target, _, _ in spooled if target == MediaUpload.Target.PHOTO
+    ])
+    photo_rows = iter(pending_photos)
+    uploads = MediaUpload.objects.bulk_create([
+        MediaUpload(
+            shipment=shipment,
+            photo=next(photo_rows) if target == MediaUpload.Target.PHOTO else None,
+            target=target,
+            spool_path=relative,
+            file_name=file_name,
+        )
+        for target, relative, file_name in spooled
+    ])
+    shipment.media_status = MediaStatus.PENDING
+    upload_ids = [upload.pk for upload in uploads]
+    transaction.on_commit(lambda: media_uploader.submit(upload_ids))
+    return uploads
+
+
+def _store(upload):
+    with open(spool_path(upload.spool_path), 'rb') as spooled:
+        if upload.target == MediaUpload.Target.SIGNATURE:
+            shipment = upload.shipment
+            shipment.proof_of_delivery_signature.save(upload.file_name, File(spooled), save=False)
+            shipment.save(update_fields=['proof_of_delivery_signature', 'updated_at'])
+            return
+
+        # Photos are normalized and get thumbnails (see images.py)
+        name, content, variants = normalize_image(spooled, upload.file_name)
+        if upload.target == MediaUpload.Target.PHOTO:
+            photo = upload.photo
+            photo.image.save(name, content, save=False)
+            photo.variants = store_variants(photo.image, variants)
+            photo.media_status = MediaStatus.STORED
+            photo.save(update_fields=['image', 'variants', 'media_status', 'updated_at'])
+        else:
+            shipment = upload.shipment
+            shipment.proof_of_delivery_image.save(name, content, save=False)
+            shipment.proof_of_delivery_variants = store_variants(shipment.proof_of_delivery_image, variants)
+            shipment.save(update_fields=['proof_of_delivery_image', 'proof_of_delivery_variants', 'updated_at'])
+
+
+def _settle_shipment(shipment_id):
+    """Set the shipment's media_status from what is still in flight."""
+    statuses = set(MediaUpload.objects.filter(shipment_id=shipment_id).values_list('status', flat=True))
+    if MediaStatus.PENDING in statuses:
+        return
+    status = MediaStatus.FAILED if statuses else MediaStatus.STORED
+    # updated_at moves so driver delta sync picks the change up
+    Shipment.objects.filter(pk=shipment_id).update(media_status=status, updated_at=timezone.now())
+
+
+def process_upload(upload_id):
+    """Copy one spooled file to storage, retrying with backoff. Returns True once stored."""
+    upload = MediaUpload.objects.select_related('shipment__job', 'photo').filter(pk=upload_id).first()
+    if upload is None:
+        return False
+    now = timezone.now()
+    # Touched so retry_uploads can tell a live upload from an abandoned one
+    MediaUpload.objects.filter(pk=upload.pk).update(status=MediaStatus.PENDING, updated_at=now)
+    if upload.status != MediaStatus.PENDING:
+        # A retry of a failed upload: in flight again
+        if upload.photo_id:
+            ShipmentPhoto.objects.filter(pk=upload.photo_id).update(media_status=MediaStatus.PENDING)
+        Shipment.objects.filter(pk=upload.shipment_id).update(media_status=MediaStatus.PENDING, updated_at=now)
+
+    attempts = settings.MEDIA_UPLOAD_ATTEMPTS
+    for attempt in range(attempts):
+        try:
+            _store(upload)
+        except Exception as exc:
+            logger.warning('Upload %s failed (attempt %d of %d): %s', upload.pk, attempt + 1, attempts, exc)
+            upload.attempts += 1
+            upload.last_error = str(exc)
+            MediaUpload.objects.filter(pk=upload.pk).update(
+                attempts=upload.attempts, last_error=upload.last_error, updated_at=timezone.now()
+            )
+            if attempt + 1 < attempts:
+                time.sleep(settings.MEDIA_UPLOAD_RETRY_SECONDS * 2 ** attempt)
+            continue
+        upload.delete()
+        try:
+            os.remove(spool_path(upload.spool_path))
+        except OSError:
+            pass
+        _settle_shipment(upload.shipment_id)
+        return True
+
+    logger.error('Giving up on upload %s after %d attempts', upload.pk, attempts)
+    MediaUpload.objects.filter(pk=upload.pk).update(status=MediaStatus.FAILED)
+    if upload.photo_id:
+        ShipmentPhoto.objects.filter(pk=upload.photo_id).update(media_status=MediaStatus.FAILED)
+    _settle_shipment(upload.shipment_id)
+    return False
+
+
+class MediaUploader:
+    """Bounded pool of upload threads, started on first use."""
+
+    def __init__(self):
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def submit(self, upload_ids):
+        # 0 workers uploads inline, in the calling thread (tests, development)
+        if not settings.MEDIA_UPLOAD_WORKERS:
+            for upload_id in upload_ids:
+                process_upload(upload_id)
+            return
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=settings.MEDIA_UPLOAD_WORKERS, thread_name_prefix='media-upload'
+                )
+        for upload_id in upload_ids:
+            self._executor.submit(self._run, upload_id)
+
+    def _run(self, upload_id):
+        close_old_connections()
+        try:
+            process_upload(upload_id)
+        except Exception:
+            logger.exception('Upload %s crashed', upload_id)
+        finally:
+            close_old_connections()
+
+
+media_uploader = MediaUploader()
+
+
+def retry_uploads(stale_after=timedelta(minutes=15)):
+    """
+    Queue FAILED uploads, and PENDING ones untouched for ``stale_after``
+    (their worker died), again. Returns how many were queued.
+    """
+    stale = timezone.now() - stale_after
+    upload_ids = list(
+        MediaUpload.objects.filter(status=MediaStatus.FAILED).values_list('pk', flat=True)
+    ) + list(
+        MediaUpload.objects.filter(status=MediaStatus.PENDING, updated_at__lt=stale).values_list('pk', flat=True)
+    )
+    media_uploader.submit(upload_ids)
+    return len(upload_ids)
+
+
+def remove_orphaned_files(older_than=timedelta(days=1)):
+    """
+    Delete spooled files no upload refers to (left by a request whose
+    transaction rolled back). Returns how many were removed.
+    """
+    directory = settings.MEDIA_SPOOL_DIR
+    if not os.path.isdir(directory):
+        return 0
+    cutoff = time.time() - older_than.total_seconds()
+    candidates = [
+        name for name in os.listdir(directory)
+        # Directories hold resumable uploads in progress (uploads.py)
+        if os.path.isfile(os.path.join(directory, name))
+        and os.path.getmtime(os.path.join(directory, name)) < cutoff
+    ]
+    referenced = set(MediaUpload.objects.filter(spool_path__in=candidates).values_list('spool_path', flat=True))
+    removed = 0
+    for name in candidates:
+        if name not in referenced:
+            os.remove(os.path.join(directory, name))
+            removed += 1
+    return removed
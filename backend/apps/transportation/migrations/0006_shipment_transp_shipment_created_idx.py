@@ -0,0 +1,20 @@
+# Generated by Django 5.2.6 on 2026-10-17 07:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("orders", "0012_job_orders_job_created_idx_and_more"),
+        ("transportation", "0005_shipmentphoto_photo_type"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="shipment",
+            index=models.Index(
+                fields=["created_at", "id"], name="transp_shipment_created_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 5.2.6 on 2026-10-17 07:33
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def add_time_index(apps, schema_editor):
+    # Rows arrive in time order, so a BRIN index keeps time range scans and
+    # retention deletes cheap at a fraction of a B-tree's size
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(
+            "CREATE INDEX IF NOT EXISTS transp_driverloc_time_brin"
+            " ON transportation_driverlocation USING brin (recorded_at)"
+        )
+
+
+def remove_time_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute("DROP INDEX IF EXISTS transp_driverloc_time_brin")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("transportation", "0006_shipment_transp_shipment_created_idx"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DriverLocation",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("recorded_at", models.DateTimeField()),
+                ("latitude", models.FloatField()),
+                ("longitude", models.FloatField()),
+                ("speed", models.FloatField(blank=True, null=True)),
+                (
+                    "driver",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="locations",
+                        to="transportation.driver",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["driver", "recorded_at"],
+                        name="transp_driverloc_driver_idx",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(add_time_index, remove_time_index),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.6 on 2026-10-17 07:39
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("orders", "0017_job_orders_job_updated_idx"),
+        ("transportation", "0007_driverlocation"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DriverJobTombstone",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("job_id", models.UUIDField()),
+                ("job_number", models.PositiveIntegerField(blank=True, null=True)),
+                ("removed_at", models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="shipment",
+            index=models.Index(
+                fields=["driver", "updated_at"], name="transp_shipment_driver_upd_idx"
+            ),
+        ),
+        migrations.AddField(
+            model_name="driverjobtombstone",
+            name="driver",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="job_tombstones",
+                to="transportation.driver",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="driverjobtombstone",
+            index=models.Index(
+                fields=["driver", "removed_at"], name="transp_tombstone_driver_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.6 on 2026-10-17 07:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("orders", "0017_job_orders_job_updated_idx"),
+        ("transportation", "0008_driverjobtombstone"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="driver",
+            name="push_token",
+            field=models.CharField(blank=True, default="", max_length=255),
+        ),
+        migrations.AddField(
+            model_name="shipment",
+            name="assigned_at",
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="shipment",
+            index=models.Index(
+                fields=["driver", "assigned_at"], name="transp_shipment_driver_asg_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,110 @@
+# Generated by Django 5.2.6 on 2026-10-17 07:53
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("transportation", "0009_driver_push_token_shipment_assigned_at"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="shipment",
+            name="media_status",
+            field=models.CharField(
+                choices=[
+                    ("PENDING", "Uploading"),
+                    ("STORED", "Stored"),
+                    ("FAILED", "Upload Failed"),
+                ],
+                default="STORED",
+                max_length=10,
+            ),
+        ),
+        migrations.AddField(
+            model_name="shipmentphoto",
+            name="media_status",
+            field=models.CharField(
+                choices=[
+                    ("PENDING", "Uploading"),
+                    ("STORED", "Stored"),
+                    ("FAILED", "Upload Failed"),
+                ],
+                default="STORED",
+                max_length=10,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="shipmentphoto",
+            name="image",
+            field=models.ImageField(blank=True, upload_to="proof_of_delivery/"),
+        ),
+        migrations.CreateModel(
+            name="MediaUpload",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "target",
+                    models.CharField(
+                        choices=[
+                            ("PHOTO", "Shipment Photo"),
+                            ("SIGNATURE", "Signature"),
+                            ("POD_IMAGE", "Proof of Delivery Image"),
+                        ],
+                        max_length=10,
+                    ),
+                ),
+                ("spool_path", models.CharField(max_length=255)),
+                ("file_name", models.CharField(max_length=255)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("PENDING", "Uploading"),
+                            ("STORED", "Stored"),
+                            ("FAILED", "Upload Failed"),
+                        ],
+                        default="PENDING",
+                        max_length=10,
+                    ),
+                ),
+                ("attempts", models.PositiveSmallIntegerField(default=0)),
+                ("last_error", models.TextField(blank=True)),
+                (
+                    "photo",
+                    models.OneToOneField(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="upload",
+                        to="transportation.shipmentphoto",
+                    ),
+                ),
+                (
+                    "shipment",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="media_uploads",
+                        to="transportation.shipment",
+                    ),
+                ),
+            ],
+            options={
+                "abstract": False,
+            },
+        ),
+    ]
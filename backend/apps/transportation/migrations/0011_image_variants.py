@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-17 07:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("transportation", "0010_mediaupload"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="shipment",
+            name="proof_of_delivery_variants",
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name="shipmentphoto",
+            name="variants",
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
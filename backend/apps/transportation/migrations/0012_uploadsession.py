@@ -0,0 +1,81 @@
+# Generated by Django 5.2.6 on 2026-10-17 08:01
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("transportation", "0011_image_variants"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="UploadSession",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "target",
+                    models.CharField(
+                        choices=[
+                            ("PHOTO", "Shipment Photo"),
+                            ("SIGNATURE", "Signature"),
+                            ("POD_IMAGE", "Proof of Delivery Image"),
+                        ],
+                        max_length=10,
+                    ),
+                ),
+                (
+                    "photo_type",
+                    models.CharField(
+                        choices=[
+                            ("PRE_MOVE", "Pre-Move Condition"),
+                            ("POST_MOVE", "Post-Move Condition"),
+                            ("POD", "Proof of Delivery"),
+                            ("OTHER", "Other"),
+                        ],
+                        default="POD",
+                        max_length=20,
+                    ),
+                ),
+                ("file_name", models.CharField(max_length=255)),
+                ("size", models.PositiveBigIntegerField()),
+                ("sha256", models.CharField(max_length=64)),
+                ("received", models.PositiveBigIntegerField(default=0)),
+                ("completed_at", models.DateTimeField(blank=True, null=True)),
+                (
+                    "shipment",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="upload_sessions",
+                        to="transportation.shipment",
+                    ),
+                ),
+                (
+                    "uploaded_by",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="upload_sessions",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "abstract": False,
+            },
+        ),
+    ]
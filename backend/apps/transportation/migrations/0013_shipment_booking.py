@@ -0,0 +1,65 @@
+# Generated by Django 5.2.6 on 2026-10-17 08:11
+
+from django.db import migrations, models
+
+from apps.transportation.availability import booking_interval
+
+BATCH_SIZE = 1000
+
+
+def backfill_booking(apps, schema_editor):
+    Shipment = apps.get_model("transportation", "Shipment")
+    batch = []
+    for shipment in Shipment.objects.select_related("job").iterator(chunk_size=BATCH_SIZE):
+        shipment.booked_from, shipment.booked_until = booking_interval(
+            shipment.job.requested_pickup_date,
+            shipment.estimated_departure,
+            shipment.estimated_arrival,
+        )
+        batch.append(shipment)
+        if len(batch) >= BATCH_SIZE:
+            Shipment.objects.bulk_update(batch, ["booked_from", "booked_until"])
+            batch = []
+    if batch:
+        Shipment.objects.bulk_update(batch, ["booked_from", "booked_until"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("orders", "0017_job_orders_job_updated_idx"),
+        ("transportation", "0012_uploadsession"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="shipment",
+            name="booked_from",
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="shipment",
+            name="booked_until",
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_booking, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="shipment",
+            index=models.Index(
+                fields=["driver", "booked_from"], name="transp_shipment_driver_bkg_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="shipment",
+            index=models.Index(
+                fields=["vehicle", "booked_from"], name="transp_shipment_vehicl_bkg_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="shipment",
+            index=models.Index(
+                fields=["booked_from", "booked_until"],
+                name="transp_shipment_booking_idx",
+            ),
+        ),
+    ]
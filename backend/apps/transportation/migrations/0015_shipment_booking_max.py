@@ -0,0 +1,25 @@
+# Generated by Django 5.2.6 on 2026-10-17 14:02
+
+from django.db import migrations
+from django.db.models import F
+
+from apps.transportation.availability import max_booking
+
+
+def clamp_bookings(apps, schema_editor):
+    Shipment = apps.get_model("transportation", "Shipment")
+    longest = max_booking()
+    Shipment.objects.filter(booked_until__gt=F("booked_from") + longest).update(
+        booked_until=F("booked_from") + longest
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("transportation", "0014_trip"),
+    ]
+
+    operations = [
+        migrations.RunPython(clamp_bookings, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,8 @@
 # apps/transportation/models.py
 
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
+from django.utils import timezone
 from apps.core.models import BaseModel
 from apps.orders.models import Job
 
@@ -44,11 +45,54 @@ class Driver(BaseModel):
     )
     license_number = models.CharField(max_length=50, unique=True)
     phone_number = models.CharField(max_length=20, unique=True)
+    # Firebase Cloud Messaging registration token of the driver's app
+    push_token = models.CharField(max_length=255, blank=True, default='')
 
     def __str__(self):
         return self.user.username
 
 
+class MediaStatus(models.TextChoices):
+    """Whether uploaded proof-of-delivery media has reached file storage."""
+    PENDING = 'PENDING', 'Uploading'
+    STORED = 'STORED', 'Stored'
+    FAILED = 'FAILED', 'Upload Failed'
+
+
+class Trip(BaseModel):
+    """
+    Commercial shipments on the same lane carried together by one vehicle
+    (see consolidation.py).
+    """
+
+    class TripStatus(models.TextChoices):
+        PLANNED = 'PLANNED', 'Planned'
+        IN_TRANSIT = 'IN_TRANSIT', 'In Transit'
+        DELIVERED = 'DELIVERED', 'Delivered'
+
+    pickup_city = models.CharField(max_length=100)
+    delivery_city = models.CharField(max_length=100)
+    vehicle = models.ForeignKey(Vehicle, on_delete=models.SET_NULL, null=True, blank=True, related_name='trips')
+    driver = models.ForeignKey(Driver, on_delete=models.SET_NULL, null=True, blank=True, related_name='trips')
+    status = models.CharField(max_length=20, choices=TripStatus.choices, default=TripStatus.PLANNED)
+    # Span booked for every member shipment (their estimated departure/arrival)
+    departs_at = models.DateTimeField()
+    arrives_at = models.DateTimeField()
+    load_kg = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['departs_at'], name='transp_trip_departs_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.pickup_city} to {self.delivery_city} on {self.departs_at:%Y-%m-%d}"
+
+
+# Shipment fields the booked interval is worked out from
+BOOKING_FIELDS = {'job', 'estimated_departure', 'estimated_arrival'}
+
+
 class Shipment(BaseModel):
     """
     Represents the shipment for a specific job.
@@ -79,18 +123,29 @@ class Shipment(BaseModel):
     status = models.CharField(
         max_length=20, choices=ShipmentStatus.choices, default=ShipmentStatus.PENDING
     )
+    # Consolidated load this shipment travels in, if any (consolidation.py)
+    trip = models.ForeignKey(Trip, on_delete=models.SET_NULL, null=True, blank=True, related_name='shipments')
+    # When the current driver was assigned (assignment feed, see assignments.py)
+    assigned_at = models.DateTimeField(null=True, blank=True, editable=False)
 
     estimated_departure = models.DateTimeField(null=True, blank=True)
     actual_departure = models.DateTimeField(null=True, blank=True)
     estimated_arrival = models.DateTimeField(null=True, blank=True)
     actual_arrival = models.DateTimeField(null=True, blank=True)
 
+    # When the driver and vehicle are taken, from the estimates or the job's
+    # pickup date (see availability.py)
+    booked_from = models.DateTimeField(null=True, blank=True, editable=False)
+    booked_until = models.DateTimeField(null=True, blank=True, editable=False)
+
     # Proof of delivery image field (Deprecated in favor of ShipmentPhoto, but kept for legacy)
     proof_of_delivery_image = models.ImageField(
         upload_to='proof_of_delivery/', 
         null=True, 
         blank=True
     )
+    # Stored thumbnail names by variant (see images.py)
+    proof_of_delivery_variants = models.JSONField(default=dict, blank=True)
     
     # New: Signature field
     proof_of_delivery_signature = models.ImageField(
@@ -98,10 +153,86 @@ class Shipment(BaseModel):
         null=True,
         blank=True
     )
+    # Signature, photos and POD image still uploading (see media.py)
+    media_status = models.CharField(max_length=10, choices=MediaStatus.choices, default=MediaStatus.STORED)
+
+    class Meta:
+        indexes = [
+            # Keyset pagination (apps/core/pagination.py)
+            models.Index(fields=['created_at', 'id'], name='transp_shipment_created_idx'),
+            # Driver delta sync (apps/orders/sync.py)
+            models.Index(fields=['driver', 'updated_at'], name='transp_shipment_driver_upd_idx'),
+            # Driver assignment feed (apps/transportation/assignments.py)
+            models.Index(fields=['driver', 'assigned_at'], name='transp_shipment_driver_asg_idx'),
+            # Availability calendar (apps/transportation/availability.py)
+            models.Index(fields=['driver', 'booked_from'], name='transp_shipment_driver_bkg_idx'),
+            models.Index(fields=['vehicle', 'booked_from'], name='transp_shipment_vehicl_bkg_idx'),
+            models.Index(fields=['booked_from', 'booked_until'], name='transp_shipment_booking_idx'),
+        ]
 
     def __str__(self):
         return f"Shipment for Job #{self.job.job_number}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remembered so a reassignment can leave the old driver a tombstone
+        instance._loaded_driver_id = instance.__dict__.get('driver_id')
+        return instance
+
+    def set_booking(self):
+        """Fill in booked_from/booked_until from the estimates and the job."""
+        from .availability import booking_interval
+        self.booked_from, self.booked_until = booking_interval(
+            self.job.requested_pickup_date, self.estimated_departure, self.estimated_arrival
+        )
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or set(update_fields) & BOOKING_FIELDS:
+            self.set_booking()
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'booked_from', 'booked_until'}
+        previous_driver_id = getattr(self, '_loaded_driver_id', None)
+        assigned = self.driver_id is not None and self.driver_id != previous_driver_id
+        if assigned:
+            self.assigned_at = timezone.now()
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None and 'assigned_at' not in update_fields:
+                kwargs['update_fields'] = [*update_fields, 'assigned_at']
+        if previous_driver_id is None or previous_driver_id == self.driver_id:
+            super().save(*args, **kwargs)
+        else:
+            with transaction.atomic():
+                super().save(*args, **kwargs)
+                DriverJobTombstone.objects.create(
+                    driver_id=previous_driver_id, job_id=self.job_id, job_number=self.job.job_number
+                )
+        if assigned:
+            from .assignments import stamp_assigned_on_commit
+            stamp_assigned_on_commit([self.pk])
+        self._loaded_driver_id = self.driver_id
+
+
+class DriverJobTombstone(models.Model):
+    """
+    Records that a job left a driver's list (reassigned, unassigned or
+    deleted), so delta sync can tell the driver app to drop it.
+    """
+    driver = models.ForeignKey(Driver, on_delete=models.CASCADE, related_name='job_tombstones')
+    # Not a foreign key: the job may be gone
+    job_id = models.UUIDField()
+    job_number = models.PositiveIntegerField(null=True, blank=True)
+    removed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['driver', 'removed_at'], name='transp_tombstone_driver_idx'),
+        ]
+
+    def __str__(self):
+        return f"Job #{self.job_number} removed from {self.driver} at {self.removed_at}"
+
 
 class ShipmentPhoto(BaseModel):
     """
@@ -114,14 +245,92 @@ class ShipmentPhoto(BaseModel):
         OTHER = 'OTHER', 'Other'
 
     shipment = models.ForeignKey(Shipment, on_delete=models.CASCADE, related_name='photos')
-    image = models.ImageField(upload_to='proof_of_delivery/')
+    # Empty until the background upload stores it (media_status)
+    image = models.ImageField(upload_to='proof_of_delivery/', blank=True)
     photo_type = models.CharField(max_length=20, choices=PhotoType.choices, default=PhotoType.POD)
+    media_status = models.CharField(max_length=10, choices=MediaStatus.choices, default=MediaStatus.STORED)
+    # Stored thumbnail names by variant (see images.py)
+    variants = models.JSONField(default=dict, blank=True)
     uploaded_at = models.DateTimeField(auto_now_add=True)
     
     def __str__(self):
         return f"Photo for Shipment {self.shipment.id} at {self.uploaded_at}"
 
 
+class MediaUpload(BaseModel):
+    """
+    A proof-of-delivery file spooled to local disk, waiting to be copied to
+    file storage by the upload workers (apps/transportation/media.py).
+    Deleted once stored; kept as FAILED when every attempt failed.
+    """
+    class Target(models.TextChoices):
+        PHOTO = 'PHOTO', 'Shipment Photo'
+        SIGNATURE = 'SIGNATURE', 'Signature'
+        POD_IMAGE = 'POD_IMAGE', 'Proof of Delivery Image'
+
+    shipment = models.ForeignKey(Shipment, on_delete=models.CASCADE, related_name='media_uploads')
+    photo = models.OneToOneField(
+        ShipmentPhoto, on_delete=models.CASCADE, null=True, blank=True, related_name='upload'
+    )
+    target = models.CharField(max_length=10, choices=Target.choices)
+    # Relative to MEDIA_SPOOL_DIR
+    spool_path = models.CharField(max_length=255)
+    file_name = models.CharField(max_length=255)
+    status = models.CharField(max_length=10, choices=MediaStatus.choices, default=MediaStatus.PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+
+    def __str__(self):
+        return f"{self.get_target_display()} upload for {self.shipment_id} ({self.status})"
+
+
+class UploadSession(BaseModel):
+    """
+    A resumable upload of one proof-of-delivery file, sent in chunks and
+    handed to MediaUpload when finalized (apps/transportation/uploads.py).
+    """
+    shipment = models.ForeignKey(Shipment, on_delete=models.CASCADE, related_name='upload_sessions')
+    uploaded_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='upload_sessions'
+    )
+    target = models.CharField(max_length=10, choices=MediaUpload.Target.choices)
+    photo_type = models.CharField(
+        max_length=20, choices=ShipmentPhoto.PhotoType.choices, default=ShipmentPhoto.PhotoType.POD
+    )
+    file_name = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField()
+    # Hex SHA-256 of the whole file, checked on finalize
+    sha256 = models.CharField(max_length=64)
+    received = models.PositiveBigIntegerField(default=0)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Upload of {self.file_name} ({self.received}/{self.size} bytes)"
+
+
+class DriverLocation(models.Model):
+    """
+    GPS fix history reported by the driver app. Kept deliberately narrow
+    (no UUID or audit timestamps): rows arrive in bulk, thousands per
+    second, and are only ever read by driver and time range. Written by
+    apps/transportation/locations.py, never one row at a time.
+    """
+    driver = models.ForeignKey(Driver, on_delete=models.CASCADE, related_name='locations')
+    recorded_at = models.DateTimeField()
+    latitude = models.FloatField()
+    longitude = models.FloatField()
+    # Metres per second, as reported by the device
+    speed = models.FloatField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['driver', 'recorded_at'], name='transp_driverloc_driver_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.driver} at ({self.latitude}, {self.longitude}) {self.recorded_at}"
+
+
 class MaintenanceLog(BaseModel):
     """
     Records maintenance and repair activities for a vehicle.
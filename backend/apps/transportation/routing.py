@@ -0,0 +1,254 @@
+# apps/transportation/routing.py
+"""
+Stop order for a driver's day.
+
+    GET /api/v1/driver/route/?date=2026-03-02
+
+The day's shipments (booked that day, see availability.py, or already in
+transit) become stops: a pickup and a delivery each, or only the delivery
+once picked up. They are ordered to keep the drive short, every pickup
+before its delivery:
+
+1. nearest neighbour from the driver's last reported position (today's
+   route) or else from the earliest scheduled stop
+2. 2-opt (reverse a run of stops) and or-opt (move a run of one to three
+   stops elsewhere) while either shortens the route, for at most
+   ``ROUTE_TIME_BUDGET_MS``
+
+Distances come from the offline gazetteer (apps/core/geo.py), so stops
+in the same city count as adjacent; cities it does not know are taken to
+be ``UNLOCATED_KM`` from everything and listed in ``unlocated_cities``.
+
+A route is cached until the day's assignments change: the key includes a
+digest of the shipments' ids, statuses and last edits. Moving the driver
+does not invalidate it.
+"""
+
+import hashlib
+import time as clock
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.core.geo import locate_city, normalize_place, road_distance_km
+
+from .availability import FINISHED
+from .locations import latest_position
+from .models import Shipment
+
+PICKUP, DELIVERY = 'PICKUP', 'DELIVERY'
+# Assumed distance to or from a city the table does not know
+UNLOCATED_KM = 50.0
+CACHE_PREFIX = 'driver-route:v1'
+
+
+def day_shipments(driver, day):
+    """The driver's unfinished shipments for ``day``, in scheduled order."""
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    end = start + timedelta(days=1)
+    return list(
+        Shipment.objects.filter(driver=driver)
+        .filter(Q(booked_from__gte=start, booked_from__lt=end) | Q(status=Shipment.ShipmentStatus.IN_TRANSIT))
+        .exclude(status__in=FINISHED)
+        .select_related('job')
+        .order_by('booked_from', 'job__job_number')
+    )
+
+
+def build_stops(shipments):
+    """Pickup and delivery stops in scheduled order, and each delivery's pickup index."""
+    stops, pickup_of = [], {}
+    for shipment in shipments:
+        job = shipment.job
+        if shipment.status != Shipment.ShipmentStatus.IN_TRANSIT:
+            stops.append((shipment, PICKUP, job.pickup_city))
+            pickup_of[len(stops)] = len(stops) - 1
+        stops.append((shipment, DELIVERY, job.delivery_city))
+    return stops, pickup_of
+
+
+def distance_matrix(points):
+    """Road km between every pair of ``points`` (``(lat, lng)`` or a city name when unknown)."""
+    size = len(points)
+    matrix = [[0.0] * size for _ in range(size)]
+    for i in range(size):
+        for j in range(i + 1, size):
+            a, b = points[i], points[j]
+            if a == b:
+                continue
+            if isinstance(a, str) or isinstance(b, str):
+                km = UNLOCATED_KM
+            else:
+                km = road_distance_km(a, b)
+            matrix[i][j] = matrix[j][i] = km
+    return matrix
+
+
+class RoutePlanner:
+    """
+    Orders stops ``0..n-1`` over ``matrix``, which may hold the start
+    position as row ``origin``; the route ends at its last stop.
+    ``pickup_of`` maps each delivery to the pickup that must come first.
+    """
+
+    # Route ends, for legs out of the start and into the (open) finish
+    START, END = -1, -2
+
+    def __init__(self, matrix, pickup_of, origin=None, deadline=None):
+        self.matrix = matrix
+        self.pickup_of = pickup_of
+        self.origin = origin
+        self.deadline = deadline
+
+    def distance(self, a, b):
+        if b == self.END or (a == self.START and self.origin is None):
+            return 0.0
+        return self.matrix[self.origin if a == self.START else a][b]
+
+    def cost(self, route):
+        return sum(self.distance(a, b) for a, b in zip([self.START, *route], route))
+
+    def feasible(self, route):
+        position = {stop: index for index, stop in enumerate(route)}
+        return all(position[pickup] < position[delivery] for delivery, pickup in self.pickup_of.items())
+
+    def out_of_time(self):
+        return self.deadline is not None and clock.monotonic() > self.deadline
+
+    def nearest_neighbour(self, stop_count):
+        remaining = set(range(stop_count))
+        waiting = set(self.pickup_of)
+        released = {}
+        for delivery, pickup in self.pickup_of.items():
+            released.setdefault(pickup, []).append(delivery)
+        route, current = [], self.START
+        while remaining:
+            ready = [stop for stop in remaining if stop not in waiting]
+            if current == self.START and self.origin is None:
+                # No known position: begin with the first scheduled stop
+                following = min(ready)
+            else:
+                following = min(ready, key=lambda stop: (self.distance(current, stop), stop))
+            route.append(following)
+            remaining.discard(following)
+            waiting.difference_update(released.get(following, ()))
+            current = following
+        return route
+
+    def two_opt(self, route):
+        """Reverse the first run of stops that shortens the route; True if one was."""
+        ends = [self.START, *route, self.END]
+        for i in range(1, len(ends) - 2):
+            for j in range(i + 1, len(ends) - 1):
+                delta = (
+                    self.distance(ends[i - 1], ends[j]) + self.distance(ends[i], ends[j + 1])
+                    - self.distance(ends[i - 1], ends[i]) - self.distance(ends[j], ends[j + 1])
+                )
+                if delta < -1e-9:
+                    candidate = route[:i - 1] + route[i - 1:j][::-1] + route[j:]
+                    if self.feasible(candidate):
+                        route[:] = candidate
+                        return True
+            if self.out_of_time():
+                break
+        return False
+
+    def or_opt(self, route):
+        """Move the first run of 1-3 stops whose move shortens the route; True if one was."""
+        for length in (1, 2, 3):
+            for i in range(len(route) - length + 1):
+                segment = route[i:i + length]
+                rest = route[:i] + route[i + length:]
+                before = route[i - 1] if i else self.START
+                after = route[i + length] if i + length < len(route) else self.END
+                saved = (
+                    self.distance(before, segment[0]) + self.distance(segment[-1], after)
+                    - self.distance(before, after)
+                )
+                ends = [self.START, *rest, self.END]
+                for k in range(len(ends) - 1):
+                    if k == i:
+                        continue
+                    added = (
+                        self.distance(ends[k], segment[0]) + self.distance(segment[-1], ends[k + 1])
+                        - self.distance(ends[k], ends[k + 1])
+                    )
+                    if added < saved - 1e-9:
+                        candidate = rest[:k] + segment + rest[k:]
+                        if self.feasible(candidate):
+                            route[:] = candidate
+                            return True
+                if self.out_of_time():
+                    return False
+        return False
+
+    def plan(self, stop_count):
+        route = self.nearest_neighbour(stop_count)
+        while not self.out_of_time() and (self.two_opt(route) or self.or_opt(route)):
+            pass
+        return route
+
+
+def _digest(shipments):
+    parts = (
+        f'{shipment.pk}:{shipment.status}:{shipment.updated_at.isoformat()}:{shipment.job.updated_at.isoformat()}'
+        for shipment in shipments
+    )
+    return hashlib.sha1('|'.join(parts).encode()).hexdigest()
+
+
+def plan_route(driver, day):
+    """The driver's stops for ``day`` in driving order, with leg distances."""
+    shipments = day_shipments(driver, day)
+    key = f'{CACHE_PREFIX}:{driver.pk}:{day.isoformat()}:{_digest(shipments)}'
+    route = cache.get(key)
+    if route is None:
+        route = _plan(driver, day, shipments)
+        cache.set(key, route, settings.ROUTE_CACHE_SECONDS)
+    return route
+
+
+def _plan(driver, day, shipments):
+    stops, pickup_of = build_stops(shipments)
+    points = [locate_city(city) or normalize_place(city) for _, _, city in stops]
+    # Where the driver is now only matters for today's route
+    position = latest_position(driver.pk) if day == timezone.localdate() else None
+    origin = None
+    if position is not None:
+        origin = len(points)
+        points.append((position['lat'], position['lng']))
+    matrix = distance_matrix(points)
+
+    deadline = clock.monotonic() + settings.ROUTE_TIME_BUDGET_MS / 1000
+    planner = RoutePlanner(matrix, pickup_of, origin, deadline)
+    order = planner.plan(len(stops))
+
+    result, previous = [], RoutePlanner.START
+    for index in order:
+        shipment, kind, city = stops[index]
+        job = shipment.job
+        pickup = kind == PICKUP
+        result.append({
+            'job_id': job.job_number,
+            'shipment_id': str(shipment.pk),
+            'type': kind,
+            'address': job.pickup_address if pickup else job.delivery_address,
+            'city': city,
+            'contact_person': job.pickup_contact_person if pickup else job.delivery_contact_person,
+            'contact_phone': job.pickup_contact_phone if pickup else job.delivery_contact_phone,
+            'requested_pickup_date': job.requested_pickup_date.isoformat(),
+            'leg_km': round(planner.distance(previous, index), 1),
+        })
+        previous = index
+    return {
+        'date': day.isoformat(),
+        'stops': result,
+        'distance_km': round(planner.cost(order), 1),
+        # The same stops in the order they were scheduled, for comparison
+        'scheduled_distance_km': round(planner.cost(list(range(len(stops)))), 1),
+        'unlocated_cities': sorted({city for _, _, city in stops if locate_city(city) is None}),
+        'planned_at': timezone.now().isoformat(),
+    }
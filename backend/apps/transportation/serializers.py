@@ -1,11 +1,18 @@
 # apps/transportation/serializers.py
 
+import os
+import re
+
+from django.conf import settings
 from rest_framework import serializers
 from django.core.exceptions import ObjectDoesNotExist
-from .models import Vehicle, Driver, Shipment
+from .availability import booking_interval, conflicting_shipment, lock_resource
+from .images import variant_urls
+from .models import Vehicle, Driver, Shipment, ShipmentPhoto, Trip, UploadSession
 from apps.users.models import User
 from apps.users.serializers import UserSerializer
-from apps.orders.serializers import JobSerializer
+from apps.orders.serializers import JobSerializer, JobListSerializer
+from apps.core.fieldsets import SparseFieldsetMixin
 
 class VehicleSerializer(serializers.ModelSerializer):
     class Meta:
@@ -24,14 +31,28 @@ class DriverSerializer(serializers.ModelSerializer):
         model = Driver
         fields = ['id', 'user', 'user_id', 'license_number', 'phone_number']
 
-class ShipmentSerializer(serializers.ModelSerializer):
+class ShipmentPhotoSerializer(serializers.ModelSerializer):
+    """A delivery photo with URLs of its thumbnail variants."""
+    variants = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ShipmentPhoto
+        fields = ['id', 'photo_type', 'image', 'variants', 'media_status', 'uploaded_at']
+
+    def get_variants(self, obj):
+        return variant_urls(obj.image, obj.variants, self.context.get('request'))
+
+
+class ShipmentSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """
     A detailed serializer for viewing a single shipment, used for the manager's
-    Job Detail page.
+    Job Detail page. Supports ?fields= / ?expand= (see apps/core/fieldsets.py).
     """
     job = JobSerializer(read_only=True)
     driver = DriverSerializer(read_only=True)
     vehicle = VehicleSerializer(read_only=True)
+    photos = ShipmentPhotoSerializer(many=True, read_only=True)
+    proof_of_delivery_image_variants = serializers.SerializerMethodField()
 
     driver_id = serializers.PrimaryKeyRelatedField(
         queryset=Driver.objects.all(),
@@ -54,7 +75,7 @@ class ShipmentSerializer(serializers.ModelSerializer):
             'id', 'job', 'vehicle', 'vehicle_id', 'driver', 'driver_id',
             'status', 'estimated_departure', 'actual_departure',
             'estimated_arrival', 'actual_arrival',
-            'proof_of_delivery_image'
+            'proof_of_delivery_image', 'proof_of_delivery_image_variants', 'photos', 'media_status'
         ]
         extra_kwargs = {
             'status': {'required': False},
@@ -63,7 +84,12 @@ class ShipmentSerializer(serializers.ModelSerializer):
             'estimated_arrival': {'required': False},
             'actual_arrival': {'required': False},
             'proof_of_delivery_image': {'required': False},
+            'media_status': {'read_only': True},
         }
+        expandable_fields = ['job', 'driver', 'vehicle', 'photos']
+
+    def get_proof_of_delivery_image_variants(self, obj):
+        return variant_urls(obj.proof_of_delivery_image, obj.proof_of_delivery_variants, self.context.get('request'))
 
     def validate(self, attrs):
         """
@@ -115,11 +141,12 @@ class ShipmentSerializer(serializers.ModelSerializer):
                     print(f"🔧 VALIDATION: Vehicle found: {vehicle_obj}")
                     print(f"🔧 VALIDATION: Vehicle status: {vehicle_obj.status}")
                     
-                    # Check if vehicle is available (only if it's being assigned, not cleared)
-                    if vehicle_obj.status != 'AVAILABLE' and vehicle is not None:
-                        print(f"❌ VALIDATION: Vehicle is not available. Current status: {vehicle_obj.status}")
+                    # A vehicle in use now can still take later work (overlaps
+                    # are checked below); one in maintenance cannot
+                    if vehicle_obj.status == Vehicle.VehicleStatus.MAINTENANCE:
+                        print("❌ VALIDATION: Vehicle is in maintenance")
                         raise serializers.ValidationError({
-                            'vehicle_id': f'Selected vehicle is not available (current status: {vehicle_obj.status})'
+                            'vehicle_id': 'Selected vehicle is in maintenance'
                         })
                     print("🔧 VALIDATION: Vehicle is available and valid")
                         
@@ -128,6 +155,8 @@ class ShipmentSerializer(serializers.ModelSerializer):
                     raise serializers.ValidationError({
                         'vehicle_id': 'Selected vehicle does not exist'
                     })
+
+        self.validate_availability(attrs)
         
         # Validate status transitions if status is being updated
         if 'status' in attrs:
@@ -149,6 +178,35 @@ class ShipmentSerializer(serializers.ModelSerializer):
         print("🔧 VALIDATION: ===== ALL VALIDATIONS PASSED =====")
         return attrs
 
+    def validate_availability(self, attrs):
+        """
+        Refuse a driver or vehicle already booked for another shipment at the
+        same time (see apps/transportation/availability.py). The resource is
+        locked until the update commits (ShipmentViewSet.update is atomic).
+        """
+        instance = self.instance
+        if instance is None:
+            return
+        times_changed = bool({'estimated_departure', 'estimated_arrival'} & attrs.keys())
+        start, end = booking_interval(
+            instance.job.requested_pickup_date,
+            attrs.get('estimated_departure', instance.estimated_departure),
+            attrs.get('estimated_arrival', instance.estimated_arrival),
+        )
+        for field in ('driver', 'vehicle'):
+            resource = attrs[field] if field in attrs else getattr(instance, field)
+            if resource is None or not (field in attrs or times_changed):
+                continue
+            lock_resource(field, resource.pk)
+            conflict = conflicting_shipment(field, resource.pk, start, end, exclude=instance.pk, trip=instance.trip_id)
+            if conflict is not None:
+                raise serializers.ValidationError({
+                    f'{field}_id': (
+                        f'Selected {field} is already booked for Job #{conflict.job.job_number} '
+                        f'from {conflict.booked_from:%Y-%m-%d %H:%M} to {conflict.booked_until:%Y-%m-%d %H:%M}'
+                    )
+                })
+
     def update(self, instance, validated_data):
         """
         Enhanced update with automatic status management and comprehensive logging
@@ -167,6 +225,8 @@ class ShipmentSerializer(serializers.ModelSerializer):
         print(f"🔧 UPDATE: New driver: {new_driver}")
         print(f"🔧 UPDATE: New vehicle: {new_vehicle}")
         
+        previous_driver_id = instance.driver_id
+
         # Automatic status management
         current_status = instance.status
         
@@ -208,6 +268,11 @@ class ShipmentSerializer(serializers.ModelSerializer):
         try:
             # Perform the update
             result = super().update(instance, validated_data)
+
+            # Wake the new driver's assignment feed once this commits
+            if result.driver_id is not None and result.driver_id != previous_driver_id:
+                from .assignments import notify_assignment_on_commit
+                notify_assignment_on_commit(result)
             
             # Refresh from database to get the actual updated state
             result.refresh_from_db()
@@ -229,6 +294,45 @@ class ShipmentSerializer(serializers.ModelSerializer):
             })
 
 
+class ShipmentListSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    """
+    Compact, flat shipment representation for list endpoints using
+    ?fields= / ?expand=. The job, driver and vehicle are only nested when
+    expanded (the job in its compact list form).
+    """
+    job = JobListSerializer(read_only=True)
+    driver = DriverSerializer(read_only=True)
+    vehicle = VehicleSerializer(read_only=True)
+
+    job_id = serializers.UUIDField(read_only=True)
+    job_number = serializers.IntegerField(source='job.job_number', read_only=True)
+    pickup_city = serializers.CharField(source='job.pickup_city', read_only=True)
+    delivery_city = serializers.CharField(source='job.delivery_city', read_only=True)
+    requested_pickup_date = serializers.DateTimeField(source='job.requested_pickup_date', read_only=True)
+    driver_id = serializers.UUIDField(read_only=True)
+    driver_name = serializers.CharField(source='driver.user.get_full_name', read_only=True, default=None)
+    vehicle_id = serializers.UUIDField(read_only=True)
+    vehicle_plate = serializers.CharField(source='vehicle.license_plate', read_only=True, default=None)
+    proof_of_delivery_image_variants = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Shipment
+        fields = [
+            'id', 'status',
+            'job_id', 'job_number', 'pickup_city', 'delivery_city', 'requested_pickup_date', 'job',
+            'driver_id', 'driver_name', 'driver',
+            'vehicle_id', 'vehicle_plate', 'vehicle',
+            'estimated_departure', 'actual_departure',
+            'estimated_arrival', 'actual_arrival',
+            'proof_of_delivery_image', 'proof_of_delivery_image_variants', 'media_status',
+            'created_at', 'updated_at',
+        ]
+        expandable_fields = ['job', 'driver', 'vehicle']
+
+    def get_proof_of_delivery_image_variants(self, obj):
+        return variant_urls(obj.proof_of_delivery_image, obj.proof_of_delivery_variants, self.context.get('request'))
+
+
 class MyJobsShipmentSerializer(serializers.ModelSerializer):
     """
     A lightweight, "flat" serializer for the 'My Assigned Jobs' list.
@@ -254,5 +358,118 @@ class MyJobsShipmentSerializer(serializers.ModelSerializer):
             'delivery_address',
             'delivery_city',
             'requested_pickup_date',
-            'proof_of_delivery_image'
-        ]
\ No newline at end of file
+            'proof_of_delivery_image',
+            'media_status',
+        ]
+
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    """
+    Starts a resumable upload for one of the driver's jobs and reports its
+    progress (see apps/transportation/uploads.py).
+    """
+    job_number = serializers.IntegerField(write_only=True)
+
+    class Meta:
+        model = UploadSession
+        fields = [
+            'id', 'job_number', 'target', 'photo_type', 'file_name',
+            'size', 'sha256', 'received', 'completed_at',
+        ]
+        read_only_fields = ['received', 'completed_at']
+
+    def validate_file_name(self, value):
+        name = os.path.basename(value.replace('\\', '/'))
+        if not name:
+            raise serializers.ValidationError("A file name is required.")
+        return name
+
+    def validate_size(self, value):
+        if not 0 < value <= settings.UPLOAD_MAX_BYTES:
+            raise serializers.ValidationError(f"Files must be 1 to {settings.UPLOAD_MAX_BYTES} bytes.")
+        return value
+
+    def validate_sha256(self, value):
+        if not re.fullmatch(r'[0-9a-fA-F]{64}', value):
+            raise serializers.ValidationError("Expected the hex SHA-256 digest of the file.")
+        return value.lower()
+
+
+class DispatchSerializer(serializers.Serializer):
+    """
+    The pickup dates a dispatch or consolidation run covers (see
+    apps/transportation/dispatch.py and consolidation.py).
+    """
+    start = serializers.DateField()
+    end = serializers.DateField(required=False)
+    dry_run = serializers.BooleanField(default=False)
+
+    def validate(self, attrs):
+        end = attrs.setdefault('end', attrs['start'])
+        if end < attrs['start']:
+            raise serializers.ValidationError({'end': "Must not be before start."})
+        if (end - attrs['start']).days >= settings.DISPATCH_MAX_DAYS:
+            raise serializers.ValidationError({'end': f"Dispatch at most {settings.DISPATCH_MAX_DAYS} days at once."})
+        return attrs
+
+
+class AvailabilityQuerySerializer(serializers.Serializer):
+    """The ?start=&end= of an availability lookup."""
+    start = serializers.DateTimeField()
+    end = serializers.DateTimeField()
+
+    def validate(self, attrs):
+        if attrs['end'] <= attrs['start']:
+            raise serializers.ValidationError({'end': "Must be after start."})
+        return attrs
+
+
+class RouteQuerySerializer(serializers.Serializer):
+    """The ?date= of a driver's route."""
+    date = serializers.DateField(required=False)
+
+
+class TripSerializer(serializers.ModelSerializer):
+    """
+    A consolidated load (see apps/transportation/consolidation.py). Only the
+    driver and vehicle are writable; they are passed on to every member.
+    """
+    driver = DriverSerializer(read_only=True)
+    vehicle = VehicleSerializer(read_only=True)
+    driver_id = serializers.PrimaryKeyRelatedField(
+        queryset=Driver.objects.all(), source='driver', write_only=True, required=False, allow_null=True
+    )
+    vehicle_id = serializers.PrimaryKeyRelatedField(
+        queryset=Vehicle.objects.all(), source='vehicle', write_only=True, required=False, allow_null=True
+    )
+    job_numbers = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Trip
+        fields = [
+            'id', 'pickup_city', 'delivery_city', 'status', 'departs_at', 'arrives_at',
+            'load_kg', 'driver', 'driver_id', 'vehicle', 'vehicle_id', 'job_numbers',
+        ]
+        read_only_fields = ['pickup_city', 'delivery_city', 'status', 'departs_at', 'arrives_at', 'load_kg']
+
+    def get_job_numbers(self, obj):
+        return sorted(shipment.job.job_number for shipment in obj.shipments.all())
+
+    def validate_driver_id(self, value):
+        if value is not None and not value.user.is_active:
+            raise serializers.ValidationError("Selected driver is not active")
+        return value
+
+    def update(self, instance, validated_data):
+        from .consolidation import assign_trip
+        return assign_trip(
+            instance,
+            validated_data.get('driver', instance.driver),
+            validated_data.get('vehicle', instance.vehicle),
+        )
+
+
+class TripStatusSerializer(serializers.Serializer):
+    status = serializers.ChoiceField(choices=[Trip.TripStatus.IN_TRANSIT, Trip.TripStatus.DELIVERED])
+    location = serializers.CharField(max_length=255, required=False, default='')
+    description = serializers.CharField(required=False, default='')
@@ -0,0 +1,855 @@
+import asyncio
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime, time, timedelta
+from io import BytesIO, StringIO
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import transaction
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+from rest_framework.exceptions import ValidationError
+from rest_framework.test import APIClient, APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from apps.core.live import hub
+from apps.orders.services import create_job
+
+from .assignments import driver_channel
+from .availability import Calendar, conflicting_shipment
+from .consolidation import apply_consolidation, assign_trip, plan_consolidation, set_trip_status
+from .dispatch import apply_plan, dispatch_window, plan_dispatch
+from .locations import location_buffer
+from .models import (
+    Driver, DriverLocation, MediaStatus, MediaUpload, Shipment, ShipmentPhoto, Trip, UploadSession, Vehicle,
+)
+
+User = get_user_model()
+
+
+def make_job(customer, **fields):
+    return create_job(**{
+        'customer': customer,
+        'service_type': 'PALLET_DELIVERY',
+        'cargo_description': 'Two pallets of tiles',
+        'pickup_address': '1 King St',
+        'pickup_city': 'Toronto',
+        'pickup_contact_person': 'Sam',
+        'pickup_contact_phone': '555-0100',
+        'delivery_address': '2 Queen St',
+        'delivery_city': 'Ottawa',
+        'delivery_contact_person': 'Alex',
+        'delivery_contact_phone': '555-0101',
+        'requested_pickup_date': timezone.now() + timedelta(days=2),
+        **fields,
+    })
+
+
+@override_settings(LOCATION_FLUSH_SIZE=5, LOCATION_FLUSH_SECONDS=0)
+class DriverLocationTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(location_buffer.clear)
+        self.user = User.objects.create_user(
+            username='driver', email='driver@example.com', password='pw', role='DRIVER'
+        )
+        self.driver = Driver.objects.create(user=self.user, license_number='D-1', phone_number='555-0199')
+        self.manager = User.objects.create_user(
+            username='manager', email='manager@example.com', password='pw', role='MANAGER'
+        )
+        self.url = reverse('api:driver-location')
+        self.client.force_authenticate(user=self.user)
+
+    def fixes(self, count, start=None):
+        start = start or timezone.now() - timedelta(minutes=10)
+        return [
+            {'lat': 43.6 + i / 1000, 'lng': -79.4, 'speed': 10.0, 'timestamp': (start + timedelta(seconds=i)).isoformat()}
+            for i in range(count)
+        ]
+
+    def test_batch_is_buffered_then_written_in_bulk(self):
+        response = self.client.post(self.url, {'fixes': self.fixes(3)}, format='json')
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data['accepted'], 3)
+        self.assertEqual(DriverLocation.objects.count(), 0)
+
+        # Crossing LOCATION_FLUSH_SIZE writes the whole buffer at once
+        self.client.post(self.url, {'fixes': self.fixes(3)}, format='json')
+        self.assertEqual(DriverLocation.objects.filter(driver=self.driver).count(), 6)
+        self.assertEqual(len(location_buffer), 0)
+
+    def test_latest_position_is_served_from_cache(self):
+        self.client.post(self.url, {'fixes': self.fixes(3)}, format='json')
+        # An older batch arriving late does not move the driver back
+        self.client.post(self.url, {'fixes': self.fixes(1, start=timezone.now() - timedelta(hours=1))}, format='json')
+
+        with self.assertNumQueries(0):
+            latest = self.client.get(self.url)
+        self.assertAlmostEqual(latest.data['lat'], 43.602)
+
+        self.client.force_authenticate(user=self.manager)
+        by_id = self.client.get(reverse('api:driver-location', kwargs={'pk': self.driver.pk}))
+        all_drivers = self.client.get(reverse('api:driver-locations'))
+        self.assertEqual(by_id.data, latest.data)
+        self.assertEqual(all_drivers.data, {str(self.driver.pk): latest.data})
+
+    def test_invalid_fixes_are_rejected(self):
+        bad = self.fixes(2)
+        bad[1]['lat'] = 123
+        future = self.fixes(1, start=timezone.now() + timedelta(hours=1))
+
+        self.assertEqual(self.client.post(self.url, {'fixes': bad}, format='json').status_code, 400)
+        self.assertEqual(self.client.post(self.url, {'fixes': future}, format='json').status_code, 400)
+        self.assertEqual(self.client.post(self.url, {'fixes': []}, format='json').status_code, 400)
+        self.assertEqual(len(location_buffer), 0)
+
+    def test_only_drivers_can_report(self):
+        self.client.force_authenticate(user=self.manager)
+        response = self.client.post(self.url, {'fixes': self.fixes(1)}, format='json')
+        self.assertEqual(response.status_code, 403)
+
+    def test_purge_removes_old_history(self):
+        now = timezone.now()
+        DriverLocation.objects.bulk_create([
+            DriverLocation(driver=self.driver, recorded_at=now - timedelta(days=100), latitude=0, longitude=0),
+            DriverLocation(driver=self.driver, recorded_at=now, latitude=0, longitude=0),
+        ])
+
+        call_command('purge_driver_locations', days=90, stdout=StringIO())
+
+        self.assertEqual(list(DriverLocation.objects.values_list('recorded_at', flat=True)), [now])
+
+
+class AssignmentFeedTests(TransactionTestCase):
+    # The held poll reads from its own thread and connection, so it has to
+    # see committed data
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='driver', email='driver@example.com', password='pw', role='DRIVER'
+        )
+        self.driver = Driver.objects.create(user=self.user, license_number='D-1', phone_number='555-0199')
+        self.manager = User.objects.create_user(
+            username='manager', email='manager@example.com', password='pw', role='MANAGER'
+        )
+        customer = User.objects.create_user(username='shipper', email='shipper@example.com', password='pw')
+        self.job = make_job(customer)
+        self.url = reverse('api:driver-assignments')
+        self.headers = {'Authorization': f'Bearer {RefreshToken.for_user(self.user).access_token}'}
+
+    def assign(self):
+        """Assign the job the way the dispatch screen does."""
+        client = APIClient()
+        client.force_authenticate(user=self.manager)
+        response = client.patch(
+            reverse('api:shipment-detail', kwargs={'pk': self.job.shipment.pk}),
+            {'driver_id': str(self.driver.pk)}, format='json',
+        )
+        self.assertEqual(response.status_code, 200)
+
+    async def read(self, response):
+        return json.loads(b''.join([chunk async for chunk in response.streaming_content]))
+
+    async def test_poll_is_answered_when_a_job_is_assigned(self):
+        since = timezone.now().isoformat()
+        response = await self.async_client.get(self.url, {'since': since, 'timeout': 10}, headers=self.headers)
+        body = asyncio.ensure_future(self.read(response))
+        await asyncio.sleep(0.1)
+        self.assertFalse(body.done())
+        self.assertEqual(hub.subscriber_count(driver_channel(self.driver.pk)), 1)
+
+        await sync_to_async(self.assign)()
+
+        body = await asyncio.wait_for(body, 5)
+        self.assertEqual([item['job_id'] for item in body['results']], [self.job.job_number])
+        self.assertGreater(body['watermark'], since)
+
+    async def test_poll_times_out_empty(self):
+        since = timezone.now().isoformat()
+        response = await self.async_client.get(self.url, {'since': since, 'timeout': 0.1}, headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((await self.read(response))['results'], [])
+
+    def test_assignment_missed_between_polls_is_returned_at_once(self):
+        since = timezone.now().isoformat()
+        self.assign()
+
+        response = self.client.get(self.url, {'since': since, 'timeout': 10}, headers=self.headers)
+
+        self.assertEqual([item['job_id'] for item in response.json()['results']], [self.job.job_number])
+        self.assertIsNotNone(Shipment.objects.get(pk=self.job.shipment.pk).assigned_at)
+
+    def test_assignment_committed_after_a_poll_answered_is_not_missed(self):
+        with transaction.atomic():
+            shipment = Shipment.objects.get(pk=self.job.shipment.pk)
+            shipment.driver = self.driver
+            shipment.save()
+            # A poll answered now cannot see the assignment yet
+            watermark = timezone.now()
+
+        self.assertGreater(Shipment.objects.get(pk=shipment.pk).assigned_at, watermark)
+        response = self.client.get(self.url, {'since': watermark.isoformat(), 'timeout': 0}, headers=self.headers)
+        self.assertEqual([item['job_id'] for item in response.json()['results']], [self.job.job_number])
+
+    def test_feed_is_for_drivers_only(self):
+        manager = {'Authorization': f'Bearer {RefreshToken.for_user(self.manager).access_token}'}
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+        self.assertEqual(self.client.get(self.url, headers=manager).status_code, 403)
+
+    def test_assignment_is_pushed_to_registered_app(self):
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        client.put(reverse('api:driver-push-token'), {'token': 'fcm-token'}, format='json')
+
+        with mock.patch('apps.transportation.assignments.send_push') as send_push:
+            self.assign()
+
+        send_push.assert_called_once()
+        self.assertEqual(send_push.call_args.args[0], 'fcm-token')
+        self.assertEqual(send_push.call_args.kwargs['data']['job_number'], self.job.job_number)
+
+
+class PodMediaTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        spool, media = tempfile.mkdtemp(), tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, spool)
+        self.addCleanup(shutil.rmtree, media)
+        overrides = self.settings(
+            MEDIA_SPOOL_DIR=spool, MEDIA_ROOT=media, MEDIA_UPLOAD_WORKERS=0, MEDIA_UPLOAD_RETRY_SECONDS=0,
+        )
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        self.spool = spool
+
+        self.user = User.objects.create_user(
+            username='driver', email='driver@example.com', password='pw', role='DRIVER'
+        )
+        driver = Driver.objects.create(user=self.user, license_number='D-1', phone_number='555-0199')
+        customer = User.objects.create_user(username='shipper', email='shipper@example.com', password='pw')
+        self.job = make_job(customer)
+        self.shipment = self.job.shipment
+        self.shipment.driver = driver
+        self.shipment.save()
+        self.client.force_authenticate(user=self.user)
+
+    def image(self, name, size=(40, 20), orientation=None):
+        image = Image.new('RGB', size, 'red')
+        exif = Image.Exif()
+        if orientation:
+            exif[0x0112] = orientation
+        buffer = BytesIO()
+        image.save(buffer, 'JPEG', exif=exif)
+        return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/jpeg')
+
+
+class PodMediaTests(PodMediaTestCase):
+    def complete_delivery(self):
+        return self.client.post(
+            reverse('api:driver-job-complete-delivery', kwargs={'job_number': self.job.job_number}),
+            {
+                'proof_of_delivery_signature': self.image('signature.png'),
+                'photos': [self.image('photo_0.jpg'), self.image('photo_1.jpg')],
+            },
+            format='multipart',
+        )
+
+    def test_delivery_is_acknowledged_before_media_is_stored(self):
+        response = self.complete_delivery()
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data['media_status'], MediaStatus.PENDING)
+        self.shipment.refresh_from_db()
+        self.assertEqual(self.shipment.status, Shipment.ShipmentStatus.DELIVERED)
+        self.assertEqual(self.shipment.media_status, MediaStatus.PENDING)
+        self.assertFalse(self.shipment.proof_of_delivery_signature)
+        self.assertEqual(
+            list(self.shipment.photos.values_list('media_status', flat=True)), [MediaStatus.PENDING] * 2
+        )
+        self.assertEqual(len(os.listdir(self.spool)), 3)
+
+    def test_background_upload_stores_media(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.complete_delivery()
+
+        self.shipment.refresh_from_db()
+        self.assertEqual(self.shipment.media_status, MediaStatus.STORED)
+        self.assertTrue(self.shipment.proof_of_delivery_signature.name.startswith('signatures/'))
+        photos = list(self.shipment.photos.all())
+        self.assertEqual(len(photos), 2)
+        self.assertTrue(all(photo.image and photo.media_status == MediaStatus.STORED for photo in photos))
+        self.assertFalse(MediaUpload.objects.exists())
+        self.assertEqual(os.listdir(self.spool), [])
+
+    def test_failed_upload_is_retried_later(self):
+        with mock.patch('apps.transportation.media._store', side_effect=OSError('storage unavailable')):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.complete_delivery()
+
+        self.shipment.refresh_from_db()
+        self.assertEqual(self.shipment.media_status, MediaStatus.FAILED)
+        upload = MediaUpload.objects.first()
+        self.assertEqual(upload.attempts, settings.MEDIA_UPLOAD_ATTEMPTS)
+        self.assertEqual(upload.last_error, 'storage unavailable')
+
+        call_command('retry_media_uploads', stdout=StringIO())
+
+        self.shipment.refresh_from_db()
+        self.assertEqual(self.shipment.media_status, MediaStatus.STORED)
+        self.assertFalse(MediaUpload.objects.exists())
+
+    def test_shipment_pod_upload_is_stored_in_background(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse('api:shipment-upload-pod', kwargs={'pk': self.shipment.pk}),
+                {'proof_of_delivery_image': self.image('pod.png')},
+                format='multipart',
+            )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['media_status'], MediaStatus.PENDING)
+        self.shipment.refresh_from_db()
+        self.assertEqual(self.shipment.media_status, MediaStatus.STORED)
+        self.assertTrue(self.shipment.proof_of_delivery_image.name.startswith('proof_of_delivery/'))
+
+    @override_settings(MEDIA_IMAGE_MAX_DIMENSION=600)
+    def test_photos_are_normalized_with_thumbnails(self):
+        # A landscape sensor image the phone marked as rotated 90 degrees
+        photo = self.image('photo_0.jpg', size=(1200, 900), orientation=6)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                reverse('api:driver-job-complete-delivery', kwargs={'job_number': self.job.job_number}),
+                {'photos': [photo]}, format='multipart',
+            )
+
+        stored = self.shipment.photos.get()
+        with stored.image.open('rb') as image_file, Image.open(image_file) as image:
+            self.assertEqual(image.size, (450, 600))
+            self.assertNotIn(0x0112, image.getexif())
+        self.assertEqual(set(stored.variants), {'thumb', 'preview'})
+        with stored.image.storage.open(stored.variants['thumb']) as thumb_file, Image.open(thumb_file) as thumb:
+            self.assertEqual(max(thumb.size), 200)
+
+        detail = self.client.get(reverse('api:shipment-detail', kwargs={'pk': self.shipment.pk}))
+        urls = detail.data['photos'][0]['variants']
+        self.assertTrue(urls['thumb'].startswith('http://testserver/'))
+        self.assertTrue(urls['thumb'].endswith('_thumb.jpg'))
+
+    def test_variants_are_backfilled_for_older_images(self):
+        photo = ShipmentPhoto.objects.create(shipment=self.shipment, image=self.image('old.jpg'))
+        self.assertEqual(photo.variants, {})
+
+        call_command('generate_image_variants', stdout=StringIO())
+
+        photo.refresh_from_db()
+        self.assertEqual(set(photo.variants), {'thumb', 'preview'})
+
+
+class ResumableUploadTests(PodMediaTestCase):
+    def start(self, content, **fields):
+        response = self.client.post(reverse('api:driver-upload-list'), {
+            'job_number': self.job.job_number,
+            'target': 'PHOTO',
+            'file_name': 'photo_0.jpg',
+            'size': len(content),
+            'sha256': hashlib.sha256(content).hexdigest(),
+            **fields,
+        }, format='json')
+        return response
+
+    def put(self, session_id, chunk, offset, **headers):
+        return self.client.put(
+            reverse('api:driver-upload-detail', kwargs={'pk': session_id}), chunk,
+            content_type='application/octet-stream', headers={'Upload-Offset': str(offset), **headers},
+        )
+
+    def test_upload_resumes_and_attaches_photo_on_finalize(self):
+        content = self.image('photo_0.jpg', size=(300, 200)).read()
+        half = len(content) // 2
+        session = self.start(content).data
+        self.assertEqual(session['received'], 0)
+
+        self.assertEqual(self.put(session['id'], content[:half], 0).data['received'], half)
+        # A retry of a chunk that already arrived is refused with the real offset
+        stale = self.put(session['id'], content[:half], 0)
+        self.assertEqual(stale.status_code, 409)
+        self.assertEqual(stale['Upload-Offset'], str(half))
+
+        progress = self.client.get(reverse('api:driver-upload-detail', kwargs={'pk': session['id']}))
+        self.assertEqual(progress.data['received'], half)
+        self.put(session['id'], content[half:], half)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            finalized = self.client.post(reverse('api:driver-upload-finalize', kwargs={'pk': session['id']}))
+
+        self.assertEqual(finalized.status_code, 202)
+        self.assertEqual(finalized.data['media_status'], MediaStatus.PENDING)
+        photo = self.shipment.photos.get()
+        self.assertEqual(photo.media_status, MediaStatus.STORED)
+        self.assertTrue(photo.image)
+        self.assertEqual(os.listdir(os.path.join(self.spool, 'partial')), [])
+
+    def test_corrupted_chunks_are_rejected(self):
+        content = b'x' * 100
+        session = self.start(content).data
+
+        bad_chunk = self.put(session['id'], content, 0, **{'Upload-Checksum': 'sha256 ' + '0' * 64})
+        self.assertEqual(bad_chunk.status_code, 400)
+        self.assertEqual(UploadSession.objects.get(pk=session['id']).received, 0)
+
+        self.put(session['id'], b'y' * 100, 0)
+        finalized = self.client.post(reverse('api:driver-upload-finalize', kwargs={'pk': session['id']}))
+        self.assertEqual(finalized.status_code, 400)
+        # Starts over
+        self.assertEqual(UploadSession.objects.get(pk=session['id']).received, 0)
+        self.assertFalse(MediaUpload.objects.exists())
+
+    @override_settings(UPLOAD_CHUNK_MAX_BYTES=10)
+    def test_oversized_chunk_and_incomplete_finalize_are_refused(self):
+        session = self.start(b'z' * 20).data
+
+        self.assertEqual(self.put(session['id'], b'z' * 11, 0).status_code, 400)
+        self.put(session['id'], b'z' * 10, 0)
+        finalized = self.client.post(reverse('api:driver-upload-finalize', kwargs={'pk': session['id']}))
+        self.assertEqual(finalized.status_code, 400)
+
+    def test_only_own_jobs_accept_uploads(self):
+        customer = User.objects.get(username='shipper')
+        other_job = make_job(customer)
+        response = self.start(b'data', job_number=other_job.job_number)
+        self.assertEqual(response.status_code, 404)
+
+
+class DispatchTests(APITestCase):
+    def setUp(self):
+        self.customer = User.objects.create_user(
+            username='customer', email='customer@example.com', password='pw', role='CUSTOMER'
+        )
+        self.manager = User.objects.create_user(
+            username='manager', email='manager@example.com', password='pw', role='MANAGER'
+        )
+        self.drivers = [
+            Driver.objects.create(
+                user=User.objects.create_user(
+                    username=f'driver{i}', email=f'driver{i}@example.com', password='pw', role='DRIVER'
+                ),
+                license_number=f'D-{i}',
+                phone_number=f'555-020{i}',
+            )
+            for i in range(2)
+        ]
+        self.van = Vehicle.objects.create(license_plate='VAN-1', make='Ford', model='Transit', year=2022, capacity_kg=1000)
+        self.truck = Vehicle.objects.create(license_plate='TRK-1', make='Isuzu', model='NPR', year=2021, capacity_kg=5000)
+        self.day = timezone.localdate() + timedelta(days=3)
+        self.url = reverse('api:shipment-dispatch')
+        self.client.force_authenticate(user=self.manager)
+
+    def at(self, hour):
+        return timezone.make_aware(datetime.combine(self.day, time(hour)))
+
+    def test_dry_run_previews_without_assigning(self):
+        make_job(self.customer, requested_pickup_date=self.at(9), weight_lbs=500)
+
+        response = self.client.post(self.url, {'start': self.day, 'dry_run': True}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data['dry_run'])
+        self.assertEqual(len(response.data['assigned']), 1)
+        self.assertEqual(response.data['assigned'][0]['vehicle_plate'], 'VAN-1')
+        self.assertFalse(Shipment.objects.exclude(driver=None).exists())
+
+    def test_assigns_by_capacity_and_pickup_time(self):
+        light = make_job(self.customer, requested_pickup_date=self.at(9), weight_lbs=500)
+        heavy = make_job(self.customer, requested_pickup_date=self.at(9), pallet_count=4)
+        # A third job at the same time finds both drivers busy
+        clash = make_job(self.customer, requested_pickup_date=self.at(10), weight_lbs=100)
+        later = make_job(self.customer, requested_pickup_date=self.at(15), weight_lbs=100)
+        crew = make_job(self.customer, requested_pickup_date=self.at(16), job_type='RESIDENTIAL', crew_size=3)
+        too_heavy = make_job(self.customer, requested_pickup_date=self.at(17), weight_lbs=20000)
+        outside = make_job(self.customer, requested_pickup_date=self.at(9) + timedelta(days=1))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(self.url, {'start': self.day}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        shipments = {s.job_id: s for s in Shipment.objects.all()}
+        self.assertEqual(shipments[light.pk].vehicle, self.van)
+        # 4 pallets at 1000 lb are about 1814 kg: only the truck carries them
+        self.assertEqual(shipments[heavy.pk].vehicle, self.truck)
+        self.assertNotEqual(shipments[light.pk].driver, shipments[heavy.pk].driver)
+        self.assertEqual(shipments[light.pk].status, 'ASSIGNED')
+        self.assertIsNotNone(shipments[light.pk].assigned_at)
+        self.assertEqual(shipments[later.pk].vehicle, self.van)
+        for job in (clash, crew, too_heavy, outside):
+            self.assertIsNone(shipments[job.pk].driver_id)
+        reasons = {entry['job_number']: entry['reason'] for entry in response.data['unassigned']}
+        self.assertEqual(set(reasons), {clash.job_number, crew.job_number, too_heavy.job_number})
+        self.assertEqual(reasons[crew.job_number], 'Needs a crew of 3.')
+
+        # Running again leaves what is assigned alone
+        second = self.client.post(self.url, {'start': self.day}, format='json')
+        self.assertEqual(second.data['assigned'], [])
+
+    def test_manual_assignments_keep_drivers_busy(self):
+        manual = make_job(self.customer, requested_pickup_date=self.at(9)).shipment
+        manual.driver, manual.vehicle = self.drivers[0], self.truck
+        manual.save()
+        job = make_job(self.customer, requested_pickup_date=self.at(11), weight_lbs=100)
+
+        self.client.post(self.url, {'start': self.day}, format='json')
+
+        shipment = Shipment.objects.get(job=job)
+        self.assertEqual(shipment.driver, self.drivers[1])
+        self.assertEqual(shipment.vehicle, self.van)
+
+    def test_bookings_made_after_planning_are_not_overridden(self):
+        job = make_job(self.customer, requested_pickup_date=self.at(9), weight_lbs=100)
+        plan = plan_dispatch(*dispatch_window(self.day))
+        _, driver, vehicle = plan.assignments[0]
+        # Someone books the planned driver by hand before the plan is applied
+        manual = make_job(self.customer, requested_pickup_date=self.at(10)).shipment
+        manual.driver, manual.vehicle = driver, self.truck if vehicle == self.van else self.van
+        manual.save()
+
+        apply_plan(plan)
+
+        self.assertIsNone(Shipment.objects.get(job=job).driver_id)
+        self.assertEqual(plan.assignments, [])
+        self.assertEqual(plan.unassigned[0][1], 'Driver or vehicle booked by someone else while dispatching.')
+
+    def test_command_and_permissions(self):
+        make_job(self.customer, requested_pickup_date=self.at(9), weight_lbs=100)
+        out = StringIO()
+
+        call_command('dispatch', start=self.day, dry_run=True, stdout=out)
+
+        self.assertIn('Would assign 1 shipments', out.getvalue())
+        self.assertFalse(Shipment.objects.exclude(driver=None).exists())
+
+        self.client.force_authenticate(user=self.drivers[0].user)
+        self.assertEqual(self.client.post(self.url, {'start': self.day}, format='json').status_code, 403)
+
+
+class AvailabilityTests(APITestCase):
+    def setUp(self):
+        self.customer = User.objects.create_user(
+            username='customer', email='customer@example.com', password='pw', role='CUSTOMER'
+        )
+        self.manager = User.objects.create_user(
+            username='manager', email='manager@example.com', password='pw', role='MANAGER'
+        )
+        self.driver = Driver.objects.create(
+            user=User.objects.create_user(username='driver', email='driver@example.com', password='pw', role='DRIVER'),
+            license_number='D-1',
+            phone_number='555-0201',
+        )
+        self.van = Vehicle.objects.create(license_plate='VAN-1', make='Ford', model='Transit', year=2022, capacity_kg=1000)
+        self.start = timezone.now().replace(microsecond=0) + timedelta(days=3)
+        self.booked = make_job(self.customer, requested_pickup_date=self.start).shipment
+        self.booked.driver, self.booked.vehicle = self.driver, self.van
+        self.booked.save()
+        self.client.force_authenticate(user=self.manager)
+
+    def assign(self, shipment, **data):
+        url = reverse('api:shipment-detail', kwargs={'pk': shipment.pk})
+        return self.client.patch(url, data, format='json')
+
+    def test_booking_follows_estimates_and_pickup_date(self):
+        self.assertEqual(self.booked.booked_from, self.start)
+        self.assertEqual(self.booked.booked_until, self.start + timedelta(hours=settings.BOOKING_DEFAULT_HOURS))
+
+        job = self.booked.job
+        job.requested_pickup_date = self.start + timedelta(days=1)
+        job.save()
+        self.booked.refresh_from_db()
+        self.assertEqual(self.booked.booked_from, self.start + timedelta(days=1))
+
+        self.booked.estimated_departure = self.start
+        self.booked.estimated_arrival = self.start + timedelta(hours=10)
+        self.booked.save(update_fields=['estimated_departure', 'estimated_arrival'])
+        self.booked.refresh_from_db()
+        self.assertEqual((self.booked.booked_from, self.booked.booked_until), (self.start, self.start + timedelta(hours=10)))
+
+    def test_overlapping_assignment_is_refused(self):
+        overlapping = make_job(self.customer, requested_pickup_date=self.start + timedelta(hours=2)).shipment
+        later = make_job(self.customer, requested_pickup_date=self.start + timedelta(hours=6)).shipment
+
+        refused = self.assign(overlapping, vehicle_id=str(self.van.pk))
+        self.assertEqual(refused.status_code, 400)
+        self.assertIn(f'Job #{self.booked.job.job_number}', str(refused.data['vehicle_id']))
+        self.assertEqual(self.assign(overlapping, driver_id=str(self.driver.pk)).status_code, 400)
+
+        self.assertEqual(self.assign(later, vehicle_id=str(self.van.pk), driver_id=str(self.driver.pk)).status_code, 200)
+        # Stretching it back over the first booking is refused as well
+        stretched = self.assign(later, estimated_departure=(self.start + timedelta(hours=3)).isoformat())
+        self.assertEqual(stretched.status_code, 400)
+
+        # A finished shipment frees its driver and vehicle
+        Shipment.objects.filter(pk=self.booked.pk).update(status=Shipment.ShipmentStatus.DELIVERED)
+        self.assertEqual(self.assign(overlapping, vehicle_id=str(self.van.pk)).status_code, 200)
+
+    def test_overlapping_bookings_already_saved_are_all_seen(self):
+        # A long booking saved without any check under a short one that starts later
+        self.booked.estimated_arrival = self.start + timedelta(hours=12)
+        self.booked.save()
+        short = make_job(self.customer, requested_pickup_date=self.start + timedelta(hours=1)).shipment
+        short.driver = self.driver
+        short.save()
+        other = make_job(self.customer, requested_pickup_date=self.start + timedelta(hours=6)).shipment
+
+        conflict = conflicting_shipment('driver', self.driver.pk, self.start + timedelta(hours=6), self.start + timedelta(hours=7))
+        self.assertEqual(conflict, self.booked)
+        self.assertEqual(self.assign(other, driver_id=str(self.driver.pk)).status_code, 400)
+
+        calendar = Calendar()
+        calendar.add('driver', self.booked.booked_from, self.booked.booked_until)
+        calendar.add('driver', short.booked_from, short.booked_until)
+        self.assertFalse(calendar.is_free('driver', self.start + timedelta(hours=6), self.start + timedelta(hours=7)))
+        self.assertTrue(calendar.is_free('driver', self.start + timedelta(hours=12), self.start + timedelta(hours=13)))
+
+    @override_settings(BOOKING_MAX_HOURS=24)
+    def test_bookings_are_held_to_the_longest_booking(self):
+        self.booked.estimated_arrival = self.start + timedelta(days=5)
+        self.booked.save()
+        self.assertEqual(self.booked.booked_until, self.start + timedelta(hours=24))
+
+        # Still seen from within the day, and no longer after it
+        during = conflicting_shipment('driver', self.driver.pk, self.start + timedelta(hours=23), self.start + timedelta(hours=25))
+        self.assertEqual(during, self.booked)
+        after = conflicting_shipment('driver', self.driver.pk, self.start + timedelta(hours=24), self.start + timedelta(hours=25))
+        self.assertIsNone(after)
+
+    def test_vehicle_in_maintenance_is_refused(self):
+        other = make_job(self.customer, requested_pickup_date=self.start + timedelta(days=2)).shipment
+        truck = Vehicle.objects.create(
+            license_plate='TRK-1', make='Isuzu', model='NPR', year=2021, capacity_kg=5000,
+            status=Vehicle.VehicleStatus.MAINTENANCE,
+        )
+
+        self.assertEqual(self.assign(other, vehicle_id=str(truck.pk)).status_code, 400)
+        # In use today, but free on the day
+        Vehicle.objects.filter(pk=self.van.pk).update(status=Vehicle.VehicleStatus.IN_USE)
+        self.assertEqual(self.assign(other, vehicle_id=str(self.van.pk)).status_code, 200)
+
+    def test_who_is_free(self):
+        truck = Vehicle.objects.create(license_plate='TRK-1', make='Isuzu', model='NPR', year=2021, capacity_kg=5000)
+        params = {'start': (self.start + timedelta(hours=1)).isoformat(), 'end': (self.start + timedelta(hours=2)).isoformat()}
+
+        vehicles = self.client.get(reverse('api:vehicle-available'), params)
+        drivers = self.client.get(reverse('api:driver-available'), params)
+        later = self.client.get(reverse('api:driver-available'), {
+            'start': (self.start + timedelta(hours=4)).isoformat(),
+            'end': (self.start + timedelta(hours=6)).isoformat(),
+        })
+
+        self.assertEqual([v['license_plate'] for v in vehicles.data], [truck.license_plate])
+        self.assertEqual(drivers.data, [])
+        self.assertEqual([d['id'] for d in later.data], [str(self.driver.pk)])
+        self.assertEqual(self.client.get(reverse('api:vehicle-available'), {'start': params['end'], 'end': params['start']}).status_code, 400)
+
+
+class DriverRouteTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.customer = User.objects.create_user(
+            username='customer', email='customer@example.com', password='pw', role='CUSTOMER'
+        )
+        self.user = User.objects.create_user(username='driver', email='driver@example.com', password='pw', role='DRIVER')
+        self.driver = Driver.objects.create(user=self.user, license_number='D-1', phone_number='555-0201')
+        self.day = timezone.localdate() + timedelta(days=1)
+        self.url = reverse('api:driver-route')
+        self.client.force_authenticate(user=self.user)
+
+    def assign(self, hour, pickup_city, delivery_city):
+        job = make_job(
+            self.customer,
+            pickup_city=pickup_city,
+            delivery_city=delivery_city,
+            requested_pickup_date=timezone.make_aware(datetime.combine(self.day, time(hour))),
+        )
+        shipment = job.shipment
+        shipment.driver, shipment.status = self.driver, 'ASSIGNED'
+        shipment.save()
+        return job
+
+    def test_stops_are_reordered_with_pickups_first(self):
+        # Scheduled order goes Toronto -> Ottawa -> Toronto -> Ottawa -> Toronto
+        first = self.assign(8, 'Toronto', 'Ottawa')
+        second = self.assign(9, 'Toronto', 'Mississauga')
+        third = self.assign(10, 'Ottawa', 'Toronto')
+
+        response = self.client.get(self.url, {'date': self.day.isoformat()})
+
+        self.assertEqual(response.status_code, 200)
+        stops = [(stop['job_id'], stop['type']) for stop in response.data['stops']]
+        self.assertEqual(len(stops), 6)
+        for job in (first, second, third):
+            self.assertLess(stops.index((job.job_number, 'PICKUP')), stops.index((job.job_number, 'DELIVERY')))
+        self.assertLess(response.data['distance_km'], response.data['scheduled_distance_km'])
+        self.assertAlmostEqual(response.data['distance_km'], sum(stop['leg_km'] for stop in response.data['stops']), delta=0.5)
+        self.assertEqual(response.data['unlocated_cities'], [])
+
+    def test_route_is_cached_until_assignments_change(self):
+        self.assign(8, 'Toronto', 'Ottawa')
+        first = self.client.get(self.url, {'date': self.day.isoformat()})
+        again = self.client.get(self.url, {'date': self.day.isoformat()})
+        self.assertEqual(again.data['planned_at'], first.data['planned_at'])
+
+        self.assign(9, 'Atlantis', 'Toronto')
+        changed = self.client.get(self.url, {'date': self.day.isoformat()})
+        self.assertEqual(len(changed.data['stops']), 4)
+        self.assertEqual(changed.data['unlocated_cities'], ['Atlantis'])
+
+    def test_only_drivers_get_routes(self):
+        manager = User.objects.create_user(username='manager', email='manager@example.com', password='pw', role='MANAGER')
+        self.client.force_authenticate(user=manager)
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+
+class ConsolidationTests(APITestCase):
+    def setUp(self):
+        self.customer = User.objects.create_user(
+            username='customer', email='customer@example.com', password='pw', role='CUSTOMER'
+        )
+        self.manager = User.objects.create_user(
+            username='manager', email='manager@example.com', password='pw', role='MANAGER'
+        )
+        self.driver = Driver.objects.create(
+            user=User.objects.create_user(username='driver', email='driver@example.com', password='pw', role='DRIVER'),
+            license_number='D-1',
+            phone_number='555-0201',
+        )
+        self.van = Vehicle.objects.create(license_plate='VAN-1', make='Ford', model='Transit', year=2022, capacity_kg=1000)
+        self.truck = Vehicle.objects.create(license_plate='TRK-1', make='Isuzu', model='NPR', year=2021, capacity_kg=5000)
+        self.day = timezone.localdate() + timedelta(days=3)
+        self.client.force_authenticate(user=self.manager)
+
+    def job(self, hour, weight_lbs, delivery_city='Ottawa', **fields):
+        return make_job(
+            self.customer,
+            requested_pickup_date=timezone.make_aware(datetime.combine(self.day, time(hour))),
+            delivery_city=delivery_city,
+            weight_lbs=weight_lbs,
+            **fields,
+        )
+
+    def consolidate(self, **data):
+        return self.client.post(reverse('api:trip-consolidate'), {'start': self.day, **data}, format='json')
+
+    def test_loads_whose_vehicle_was_booked_since_planning_are_not_created(self):
+        lane = [self.job(8, 800), self.job(10, 700)]
+        plan = plan_consolidation(*dispatch_window(self.day))
+        manual = self.job(9, 100, delivery_city='Montreal').shipment
+        manual.driver, manual.vehicle = self.driver, plan.loads[0].vehicle
+        manual.save()
+
+        apply_consolidation(plan)
+
+        self.assertFalse(Trip.objects.exists())
+        self.assertEqual(plan.loads, [])
+        self.assertEqual({shipment.job_id for shipment in plan.unplaced}, {job.pk for job in lane})
+
+    def test_lane_is_packed_onto_the_smallest_vehicle(self):
+        lane = [self.job(8, 800), self.job(10, 700), self.job(13, 600, delivery_city=' ottawa ')]
+        alone = self.job(9, 500, delivery_city='Montreal')
+        residential = self.job(9, 500, job_type='RESIDENTIAL')
+
+        preview = self.consolidate(dry_run=True)
+        self.assertEqual(len(preview.data['trips']), 1)
+        self.assertFalse(Trip.objects.exists())
+
+        response = self.consolidate()
+
+        self.assertEqual(response.status_code, 200)
+        trip = Trip.objects.get()
+        # 2100 lb is about 953 kg: the van carries all three
+        self.assertEqual(trip.vehicle, self.van)
+        self.assertEqual(response.data['trips'][0]['job_numbers'], [job.job_number for job in lane])
+        members = Shipment.objects.filter(trip=trip)
+        self.assertEqual({s.job_id for s in members}, {job.pk for job in lane})
+        self.assertEqual({(s.booked_from, s.booked_until) for s in members}, {(trip.departs_at, trip.arrives_at)})
+        self.assertIsNone(Shipment.objects.get(job=alone).trip_id)
+        self.assertIsNone(Shipment.objects.get(job=residential).trip_id)
+
+        # Dispatch leaves the members to the trip
+        dispatched = self.client.post(reverse('api:shipment-dispatch'), {'start': self.day}, format='json')
+        self.assertNotIn(lane[0].job_number, [entry['job_number'] for entry in dispatched.data['assigned']])
+
+    def test_trip_is_checked_as_saved_not_as_loaded(self):
+        self.job(8, 800)
+        self.job(10, 700)
+        self.consolidate()
+        stale = Trip.objects.get()
+        assign_trip(stale, self.driver, stale.vehicle)
+        set_trip_status(stale, Trip.TripStatus.IN_TRANSIT)
+
+        # The loaded copy still says PLANNED; the row does not
+        with self.assertRaises(ValidationError):
+            set_trip_status(stale, Trip.TripStatus.IN_TRANSIT)
+        with self.assertRaises(ValidationError):
+            assign_trip(stale, None, None)
+        self.assertEqual(Trip.objects.get().driver, self.driver)
+
+    def test_overweight_lane_splits_into_loads(self):
+        self.job(8, 8000)
+        self.job(9, 5000)
+        self.job(10, 4000)
+
+        self.consolidate()
+
+        # 3629 + 2268 + 1814 kg do not fit one 5000 kg truck; the two that
+        # share a load take it, the third is left for dispatch
+        trip = Trip.objects.get()
+        self.assertEqual(trip.vehicle, self.truck)
+        self.assertEqual(trip.shipments.count(), 2)
+
+    def test_driver_and_status_reach_every_member(self):
+        lane = [self.job(8, 800), self.job(10, 700)]
+        self.consolidate()
+        trip = Trip.objects.get()
+        url = reverse('api:trip-detail', kwargs={'pk': trip.pk})
+        status_url = reverse('api:trip-set-status', kwargs={'pk': trip.pk})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            assigned = self.client.patch(url, {'driver_id': str(self.driver.pk)}, format='json')
+        self.assertEqual(assigned.status_code, 200)
+        for shipment in Shipment.objects.filter(trip=trip):
+            self.assertEqual((shipment.driver, shipment.vehicle, shipment.status), (self.driver, self.van, 'ASSIGNED'))
+
+        self.assertEqual(self.client.post(status_url, {'status': 'DELIVERED'}, format='json').status_code, 400)
+        self.client.force_authenticate(user=self.driver.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            moving = self.client.post(status_url, {'status': 'IN_TRANSIT'}, format='json')
+        self.assertEqual(moving.status_code, 200)
+        self.client.post(status_url, {'status': 'DELIVERED', 'location': 'Ottawa dock'}, format='json')
+
+        for job in lane:
+            job.refresh_from_db()
+            self.assertEqual(job.current_status, 'DELIVERED')
+            self.assertEqual(job.shipment.status, 'DELIVERED')
+            self.assertEqual(
+                list(job.timeline.values_list('status', flat=True)), ['ORDER_PLACED', 'IN_TRANSIT', 'DELIVERED']
+            )
+            self.assertEqual(job.timeline.get(is_current=True).location, 'Ottawa dock')
+
+    def test_command_dry_run(self):
+        self.job(8, 800)
+        self.job(10, 700)
+        out = StringIO()
+
+        call_command('consolidate_loads', start=self.day, dry_run=True, stdout=out)
+
+        self.assertIn('Would create 1 trips carrying 2 shipments', out.getvalue())
+        self.assertFalse(Trip.objects.exists())
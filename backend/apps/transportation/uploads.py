@@ -0,0 +1,180 @@
+# apps/transportation/uploads.py
+"""
+Resumable chunked uploads of proof-of-delivery files for the driver app.
+
+    POST /api/v1/driver/uploads/
+         {"job_number": 1042, "target": "PHOTO", "file_name": "photo_0.jpg",
+          "size": 7340032, "sha256": "<hex digest of the whole file>"}
+    PUT  /api/v1/driver/uploads/<id>/     raw bytes, with headers
+         Upload-Offset: <byte offset>     (required)
+         Upload-Checksum: sha256 <hex>    (optional, of this chunk)
+    GET  /api/v1/driver/uploads/<id>/     how much has arrived
+    POST /api/v1/driver/uploads/<id>/finalize/
+
+A dropped connection only loses the chunk in flight: the app asks how much
+arrived (``received``) and continues from there. Chunks are streamed
+straight to a file under ``MEDIA_SPOOL_DIR`` (never held in memory) and
+may be at most ``UPLOAD_CHUNK_MAX_BYTES``, so a request stays small
+whatever the file size. Whatever part of a chunk arrived before a
+disconnect is kept, unless the chunk carried a checksum.
+
+Finalizing checks the size and SHA-256 of the whole file, then hands it to
+the background upload pipeline (media.py) like a file posted to
+``complete_delivery``: the shipment's ``media_status`` turns PENDING until
+it is stored. Finalizing again is harmless.
+
+Unfinished sessions are deleted after ``UPLOAD_SESSION_TTL_HOURS`` by
+``retry_media_uploads``.
+"""
+
+import hashlib
+import os
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from .media import queue_spooled, spool_path
+from .models import UploadSession
+
+# Bytes read from the request (and hashed) at a time
+READ_SIZE = 64 * 1024
+
+
+class OffsetMismatch(Exception):
+    """A chunk did not start where the upload left off."""
+
+    def __init__(self, received):
+        super().__init__(f'Upload is at offset {received}')
+        self.received = received
+
+
+def partial_path(session):
+    return os.path.join(settings.MEDIA_SPOOL_DIR, 'partial', f'{session.pk.hex}.part')
+
+
+def start_session(**fields):
+    """Create an UploadSession and its empty file."""
+    session = UploadSession.objects.create(**fields)
+    path = partial_path(session)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    open(path, 'wb').close()
+    return session
+
+
+def _parse_checksum(header):
+    if not header:
+        return None
+    algorithm, _, digest = header.partition(' ')
+    if algorithm.lower() != 'sha256' or len(digest.strip()) != 64:
+        raise ValidationError({'Upload-Checksum': 'Expected "sha256 <hex digest>".'})
+    return digest.strip().lower()
+
+
+def write_chunk(session, offset, length, stream, checksum_header=None):
+    """
+    Append ``length`` bytes read from ``stream`` at ``offset``; returns the
+    new offset. Raises OffsetMismatch or ValidationError.
+    """
+    if session.completed_at is not None:
+        raise ValidationError({'detail': 'Upload is already finalized.'})
+    if offset != session.received:
+        raise OffsetMismatch(session.received)
+    if not 0 < length <= settings.UPLOAD_CHUNK_MAX_BYTES:
+        raise ValidationError({'detail': f'Chunks must be 1 to {settings.UPLOAD_CHUNK_MAX_BYTES} bytes.'})
+    if offset + length > session.size:
+        raise ValidationError({'detail': 'Chunk runs past the declared file size.'})
+    checksum = _parse_checksum(checksum_header)
+
+    digest = hashlib.sha256()
+    written = 0
+    with open(partial_path(session), 'r+b') as partial:
+        partial.seek(offset)
+        try:
+            while written < length:
+                data = stream.read(min(READ_SIZE, length - written))
+                if not data:
+                    break
+                partial.write(data)
+                digest.update(data)
+                written += len(data)
+        except OSError:
+            # The client went away mid-chunk; keep what arrived
+            pass
+        partial.flush()
+        os.fsync(partial.fileno())
+
+    if checksum is not None and (written != length or digest.hexdigest() != checksum):
+        # Nothing of a chunk that fails its checksum counts
+        raise ValidationError({'Upload-Checksum': 'Chunk checksum does not match; send it again.'})
+    if written:
+        # Conditional, so two requests racing for the same offset cannot both advance it
+        moved = UploadSession.objects.filter(pk=session.pk, received=offset).update(
+            received=offset + written, updated_at=timezone.now()
+        )
+        if not moved:
+            session.refresh_from_db(fields=['received'])
+            raise OffsetMismatch(session.received)
+    session.received = offset + written
+    return session.received
+
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as partial:
+        for data in iter(lambda: partial.read(READ_SIZE), b''):
+            digest.update(data)
+    return digest.hexdigest()
+
+
+def finalize(session_id, user):
+    """
+    Verify a complete upload and queue it for storage; returns the session.
+    Raises UploadSession.DoesNotExist or ValidationError.
+    """
+    with transaction.atomic():
+        session = (
+            UploadSession.objects.select_for_update()
+            .select_related('shipment__job')
+            .get(pk=session_id, uploaded_by=user)
+        )
+        if session.completed_at is not None:
+            return session
+        if session.received != session.size:
+            raise ValidationError({'detail': f'Upload is incomplete: {session.received} of {session.size} bytes.'})
+
+        path = partial_path(session)
+        intact = _file_sha256(path) == session.sha256
+        if intact:
+            relative = f'{uuid.uuid4().hex}{os.path.splitext(session.file_name)[1].lower()}'
+            os.replace(path, spool_path(relative))
+            shipment = session.shipment
+            queue_spooled(shipment, [(session.target, relative, session.file_name)], session.photo_type)
+            shipment.save(update_fields=['media_status', 'updated_at'])
+            session.completed_at = timezone.now()
+            session.save(update_fields=['completed_at', 'updated_at'])
+        else:
+            # Start over rather than guess which chunk was corrupted
+            UploadSession.objects.filter(pk=session.pk).update(received=0, updated_at=timezone.now())
+            open(path, 'wb').close()
+    if not intact:
+        raise ValidationError({'sha256': 'File checksum does not match; upload it again.'})
+    return session
+
+
+def purge_sessions(older_than=None):
+    """Delete sessions untouched for UPLOAD_SESSION_TTL_HOURS, with their files."""
+    older_than = older_than or timedelta(hours=settings.UPLOAD_SESSION_TTL_HOURS)
+    stale = UploadSession.objects.filter(updated_at__lt=timezone.now() - older_than)
+    count = 0
+    for session in stale.iterator():
+        try:
+            os.remove(partial_path(session))
+        except OSError:
+            pass
+        session.delete()
+        count += 1
+    return count
@@ -1,7 +1,7 @@
 # apps/transportation/urls.py
 
 from rest_framework.routers import DefaultRouter
-from .views import VehicleViewSet, DriverViewSet, ShipmentViewSet
+from .views import VehicleViewSet, DriverViewSet, ShipmentViewSet, TripViewSet
 
 # The router automatically handles the URLs for the ViewSets,
 # including the new custom @action on the DriverViewSet.
@@ -9,5 +9,6 @@ router = DefaultRouter()
 router.register(r'vehicles', VehicleViewSet, basename='vehicle')
 router.register(r'drivers', DriverViewSet, basename='driver')
 router.register(r'shipments', ShipmentViewSet, basename='shipment')
+router.register(r'trips', TripViewSet, basename='trip')
 
 urlpatterns = router.urls
\ No newline at end of file
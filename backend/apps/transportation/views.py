@@ -1,6 +1,7 @@
 # apps/transportation/views.py
 
-from rest_framework import viewsets, generics, status
+from rest_framework import mixins, viewsets, generics, status
+from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.decorators import action
 from rest_framework.response import Response
@@ -10,15 +11,33 @@ from django.shortcuts import get_object_or_404
 from django.db import transaction
 from django.utils import timezone
 
-from .models import Vehicle, Driver, Shipment
+from .models import Vehicle, Driver, Shipment, Trip, UploadSession
 from .serializers import (
     VehicleSerializer, 
     DriverSerializer, 
     ShipmentSerializer,
-    MyJobsShipmentSerializer
+    ShipmentListSerializer,
+    MyJobsShipmentSerializer,
+    UploadSessionSerializer,
+    DispatchSerializer,
+    AvailabilityQuerySerializer,
+    RouteQuerySerializer,
+    TripSerializer,
+    TripStatusSerializer
 )
+from .availability import free_drivers, free_vehicles
+from .consolidation import run_consolidation, set_trip_status
+from .dispatch import dispatch_window, run_dispatch
 from .filters import ShipmentFilter 
+from .locations import latest_position, latest_positions, parse_fixes, record_fixes
+from .media import spool_media
+from .routing import plan_route
+from .uploads import OffsetMismatch, finalize, start_session, write_chunk
 from apps.core.permissions import IsDriverUser, IsAdminOrManagerUser
+from apps.users.models import User
+from apps.core.pagination import KeysetPagination
+from apps.core.fieldsets import SparseFieldsetViewMixin
+from apps.orders.sync import delta_sync
 
 
 class VehicleViewSet(viewsets.ModelViewSet):
@@ -32,6 +51,17 @@ class VehicleViewSet(viewsets.ModelViewSet):
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['status']
 
+    @action(detail=False, methods=['get'])
+    def available(self, request):
+        """
+        Vehicles free from ?start= to ?end= (see availability.py).
+        Accessible at /api/v1/transportation/vehicles/available/
+        """
+        query = AvailabilityQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        vehicles = free_vehicles(query.validated_data['start'], query.validated_data['end'])
+        return Response(self.get_serializer(vehicles.order_by('capacity_kg', 'license_plate'), many=True).data)
+
 
 class DriverViewSet(viewsets.ModelViewSet):
     """
@@ -60,6 +90,19 @@ class DriverViewSet(viewsets.ModelViewSet):
             assigned_shipments = Shipment.objects.filter(
                 driver=driver_profile
             ).select_related('job__customer').order_by('job__requested_pickup_date')
+
+            # ?since=<watermark>: only what changed (see apps/orders/sync.py)
+            if 'since' in request.query_params:
+                delta = delta_sync(
+                    driver_profile, request.query_params['since'], assigned_shipments,
+                    job_prefix='job__', shipment_prefix='',
+                )
+                return Response({
+                    'results': MyJobsShipmentSerializer(delta['queryset'], many=True).data,
+                    'removed': delta['removed'],
+                    'watermark': delta['watermark'],
+                    'full': delta['full'],
+                })
             
             # Use the lightweight serializer for the list view
             serializer = MyJobsShipmentSerializer(assigned_shipments, many=True)
@@ -68,16 +111,178 @@ class DriverViewSet(viewsets.ModelViewSet):
             # This will be caught by the IsDriverUser permission, but is a good fallback.
             return Response({"detail": "No driver profile found for this user."}, status=403)
 
+    @action(detail=False, methods=['get'])
+    def available(self, request):
+        """
+        Drivers free from ?start= to ?end= (see availability.py).
+        Accessible at /api/v1/transportation/drivers/available/
+        """
+        query = AvailabilityQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        drivers = free_drivers(query.validated_data['start'], query.validated_data['end'])
+        return Response(self.get_serializer(drivers.select_related('user').order_by('user__first_name'), many=True).data)
+
+    @action(detail=True, methods=['get'])
+    def location(self, request, pk=None):
+        """Latest reported position of a driver (from the cache, no DB hit)."""
+        position = latest_position(pk)
+        if position is None:
+            return Response({'detail': 'No position reported yet.'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(position)
+
+    @action(detail=False, methods=['get'])
+    def locations(self, request):
+        """Latest positions of every driver that has reported one, keyed by driver id."""
+        driver_ids = Driver.objects.values_list('id', flat=True)
+        return Response({str(driver_id): position for driver_id, position in latest_positions(driver_ids).items()})
+
+
+class DriverLocationView(APIView):
+    """
+    GPS fixes from the driver app (see apps/transportation/locations.py).
+    POST /api/v1/driver/location/ - report a batch of fixes
+    GET  /api/v1/driver/location/ - the driver's latest known position
+    """
+    permission_classes = [IsDriverUser]
+
+    def post(self, request):
+        fixes = parse_fixes(request.data)
+        position = record_fixes(request.user.driver_profile.pk, fixes)
+        return Response({'accepted': len(fixes), 'latest': position}, status=status.HTTP_202_ACCEPTED)
+
+    def get(self, request):
+        position = latest_position(request.user.driver_profile.pk)
+        if position is None:
+            return Response({'detail': 'No position reported yet.'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(position)
+
+
+class DriverRouteView(APIView):
+    """
+    The driver's stops for a day in driving order (see
+    apps/transportation/routing.py).
+    GET /api/v1/driver/route/?date=YYYY-MM-DD (default today)
+    """
+    permission_classes = [IsDriverUser]
+
+    def get(self, request):
+        query = RouteQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        day = query.validated_data.get('date') or timezone.localdate()
+        return Response(plan_route(request.user.driver_profile, day))
+
+
+class DriverPushTokenView(APIView):
+    """
+    Registers the driver app's Firebase Cloud Messaging token, used to push
+    new assignments (see apps/transportation/assignments.py).
+    PUT    /api/v1/driver/push-token/ {"token": "..."}
+    DELETE /api/v1/driver/push-token/ - stop pushes (e.g. on logout)
+    """
+    permission_classes = [IsDriverUser]
+
+    def put(self, request):
+        token = request.data.get('token')
+        if not isinstance(token, str) or not token.strip() or len(token) > 255:
+            return Response({'token': 'Expected an FCM registration token.'}, status=status.HTTP_400_BAD_REQUEST)
+        Driver.objects.filter(user=request.user).update(push_token=token.strip())
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    def delete(self, request):
+        Driver.objects.filter(user=request.user).update(push_token='')
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class DriverUploadViewSet(viewsets.ViewSet):
+    """
+    Resumable chunked uploads of proof-of-delivery files
+    (see apps/transportation/uploads.py).
+    POST /api/v1/driver/uploads/                 - start an upload
+    GET  /api/v1/driver/uploads/{id}/            - bytes received so far
+    PUT  /api/v1/driver/uploads/{id}/            - send a chunk (Upload-Offset header)
+    POST /api/v1/driver/uploads/{id}/finalize/   - verify and attach to the shipment
+    """
+    permission_classes = [IsDriverUser]
+
+    def get_session(self, pk):
+        return get_object_or_404(UploadSession, pk=pk, uploaded_by=self.request.user)
+
+    def create(self, request):
+        serializer = UploadSessionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        fields = dict(serializer.validated_data)
+        shipment = Shipment.objects.filter(
+            job__job_number=fields.pop('job_number'), driver__user=request.user
+        ).first()
+        if shipment is None:
+            return Response({'job_number': 'Not one of your jobs.'}, status=status.HTTP_404_NOT_FOUND)
+        session = start_session(shipment=shipment, uploaded_by=request.user, **fields)
+        return Response(UploadSessionSerializer(session).data, status=status.HTTP_201_CREATED)
+
+    def retrieve(self, request, pk=None):
+        return Response(UploadSessionSerializer(self.get_session(pk)).data)
+
+    def update(self, request, pk=None):
+        session = self.get_session(pk)
+        try:
+            offset = int(request.headers['Upload-Offset'])
+            length = int(request.META.get('CONTENT_LENGTH') or 0)
+        except (KeyError, ValueError):
+            return Response(
+                {'detail': 'Upload-Offset and Content-Length headers are required.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            # The body is read from the request stream as it arrives
+            received = write_chunk(session, offset, length, request.stream, request.headers.get('Upload-Checksum'))
+        except OffsetMismatch as exc:
+            response = Response(
+                {'detail': 'Upload-Offset does not match the bytes received.', 'received': exc.received},
+                status=status.HTTP_409_CONFLICT
+            )
+            response['Upload-Offset'] = str(exc.received)
+            return response
+        response = Response({'received': received})
+        response['Upload-Offset'] = str(received)
+        return response
+
+    @action(detail=True, methods=['post'])
+    def finalize(self, request, pk=None):
+        try:
+            session = finalize(pk, request.user)
+        except UploadSession.DoesNotExist:
+            return Response({'detail': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
+        data = UploadSessionSerializer(session).data
+        data['media_status'] = Shipment.objects.values_list('media_status', flat=True).get(pk=session.shipment_id)
+        return Response(data, status=status.HTTP_202_ACCEPTED)
 
-class ShipmentViewSet(viewsets.ModelViewSet):
+
+class ShipmentViewSet(SparseFieldsetViewMixin, viewsets.ModelViewSet):
     """
     A ViewSet for viewing and editing Shipments.
     Publicly readable (for tracking), but only editable by Managers/Admins.
     """
     queryset = Shipment.objects.all().select_related(
         'job__customer', 'vehicle', 'driver__user'
-    )
+    ).prefetch_related('photos').order_by('-created_at', '-id')
     serializer_class = ShipmentSerializer
+    pagination_class = KeysetPagination
+
+    # ?fields= / ?expand= on the list (apps/core/fieldsets.py)
+    list_serializer_class = ShipmentListSerializer
+    field_select_related = {
+        'job': ['job'],
+        'job.customer': ['job__customer'],
+        'job_number': ['job'],
+        'pickup_city': ['job'],
+        'delivery_city': ['job'],
+        'requested_pickup_date': ['job'],
+        'driver': ['driver__user'],
+        'driver_name': ['driver__user'],
+        'vehicle': ['vehicle'],
+        'vehicle_plate': ['vehicle'],
+    }
+    field_prefetch_related = {'job.timeline': ['job__timeline']}
     
     def get_permissions(self):
         """
@@ -261,14 +466,16 @@ class ShipmentViewSet(viewsets.ModelViewSet):
             print(f"⚠️ DEBUG: Image file is not a standard file object, proceeding anyway")
 
         try:
-            # Update the proof of delivery image and status
-            shipment.proof_of_delivery_image = image_file
-            shipment.status = 'DELIVERED'
-            shipment.actual_arrival = timezone.now()  # Record arrival time
-            shipment.save()
+            # Update the status; the image is spooled and uploaded to
+            # storage in the background (see media.py)
+            with transaction.atomic():
+                spool_media(shipment, pod_image=image_file)
+                shipment.status = 'DELIVERED'
+                shipment.actual_arrival = timezone.now()  # Record arrival time
+                shipment.save()
 
             print(f"🎉 DEBUG: Successfully updated shipment {shipment.id} to DELIVERED")
-            print(f"🎉 DEBUG: Proof of delivery image saved: {shipment.proof_of_delivery_image}")
+            print(f"🎉 DEBUG: Proof of delivery image queued for upload: {image_file.name}")
 
             # Re-serialize the object
             serializer = self.get_serializer(shipment)
@@ -297,6 +504,30 @@ class ShipmentViewSet(viewsets.ModelViewSet):
         print(f"📦 MARK DELIVERED: Request received for shipment {pk}")
         return self.update_status(request, pk, 'DELIVERED')
     
+    @action(
+        detail=False,
+        methods=['post'],
+        url_path='dispatch',
+        url_name='dispatch',
+        permission_classes=[IsAdminOrManagerUser]
+    )
+    def dispatch_shipments(self, request):
+        """
+        Assign the pending shipments picked up from ``start`` to ``end`` to
+        drivers and vehicles; ``dry_run`` previews the plan without saving it.
+        Accessible at /api/v1/transportation/shipments/dispatch/
+        """
+        serializer = DispatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        options = serializer.validated_data
+        plan = run_dispatch(*dispatch_window(options['start'], options['end']), dry_run=options['dry_run'])
+        return Response({**plan.as_dict(), 'dry_run': options['dry_run']})
+
+    def update(self, request, *args, **kwargs):
+        # Availability is checked with the driver and vehicle locked until the save commits
+        with transaction.atomic():
+            return super().update(request, *args, **kwargs)
+
     def partial_update(self, request, *args, **kwargs):
         """
         Handle PATCH requests with debugging and security checks
@@ -343,19 +574,18 @@ class ShipmentViewSet(viewsets.ModelViewSet):
             
             print("🔧 VIEWSET: About to validate serializer...")
             
-            # Manually call is_valid to see what happens
-            is_valid = serializer.is_valid()
-            print(f"🔧 VIEWSET: Serializer is_valid() returned: {is_valid}")
-            
-            if not is_valid:
-                print("❌ VIEWSET: Serializer validation failed!")
-                print(f"❌ VIEWSET: Validation errors: {serializer.errors}")
-                return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-            
-            print("🔧 VIEWSET: Serializer is valid, proceeding with update...")
-            
-            # Perform the update within a transaction
+            # Validate and save in one transaction: the availability check
+            # locks the driver and vehicle until the update commits
             with transaction.atomic():
+                is_valid = serializer.is_valid()
+                print(f"🔧 VIEWSET: Serializer is_valid() returned: {is_valid}")
+                
+                if not is_valid:
+                    print("❌ VIEWSET: Serializer validation failed!")
+                    print(f"❌ VIEWSET: Validation errors: {serializer.errors}")
+                    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+                
+                print("🔧 VIEWSET: Serializer is valid, proceeding with update...")
                 updated_instance = serializer.save()
                 print(f"✅ VIEWSET: Update completed successfully for shipment {updated_instance.id}")
                 
@@ -369,4 +599,51 @@ class ShipmentViewSet(viewsets.ModelViewSet):
             return Response(
                 {"detail": f"An unexpected error occurred: {str(e)}"},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
\ No newline at end of file
+            )
+
+class TripViewSet(
+    mixins.ListModelMixin, mixins.RetrieveModelMixin, mixins.UpdateModelMixin, viewsets.GenericViewSet
+):
+    """
+    Consolidated loads (see apps/transportation/consolidation.py).
+    Managers and Admins list them, assign their driver and vehicle (PATCH)
+    and create them with ``consolidate``; the trip's driver can also move
+    it on with ``status``.
+    """
+    queryset = Trip.objects.select_related('driver__user', 'vehicle').prefetch_related(
+        'shipments__job'
+    ).order_by('-departs_at', '-id')
+    serializer_class = TripSerializer
+    permission_classes = [IsAdminOrManagerUser]
+    filter_backends = [DjangoFilterBackend]
+    filterset_fields = ['status']
+
+    @action(detail=False, methods=['post'])
+    def consolidate(self, request):
+        """
+        Group the pending commercial shipments picked up from ``start`` to
+        ``end`` into trips; ``dry_run`` previews them without saving.
+        Accessible at /api/v1/transportation/trips/consolidate/
+        """
+        serializer = DispatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        options = serializer.validated_data
+        plan = run_consolidation(*dispatch_window(options['start'], options['end']), dry_run=options['dry_run'])
+        return Response({**plan.as_dict(), 'dry_run': options['dry_run']})
+
+    @action(detail=True, methods=['post'], url_path='status', permission_classes=[IsAuthenticated])
+    def set_status(self, request, pk=None):
+        """
+        Move the trip and all its shipments on (IN_TRANSIT, then DELIVERED).
+        Accessible at /api/v1/transportation/trips/{pk}/status/
+        """
+        trip = self.get_object()
+        is_manager = request.user.role in [User.Role.ADMIN, User.Role.MANAGER]
+        if not is_manager and (trip.driver is None or trip.driver.user != request.user):
+            return Response(
+                {'detail': 'You do not have permission to perform this action.'}, status=status.HTTP_403_FORBIDDEN
+            )
+        serializer = TripStatusSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        trip = set_trip_status(trip, **serializer.validated_data)
+        return Response(self.get_serializer(trip).data)
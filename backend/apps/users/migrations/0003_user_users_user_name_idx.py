@@ -0,0 +1,20 @@
+# Generated by Django 5.2.6 on 2026-10-17 07:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("auth", "0012_alter_user_first_name_max_length"),
+        ("users", "0002_customeraddress"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="user",
+            index=models.Index(
+                fields=["first_name", "last_name", "id"], name="users_user_name_idx"
+            ),
+        ),
+    ]
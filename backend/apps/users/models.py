@@ -25,6 +25,12 @@ class User(AbstractUser):
         default=CustomerType.ONE_TIME
     )
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # Keyset pagination of the user list (apps/core/pagination.py)
+            models.Index(fields=['first_name', 'last_name', 'id'], name='users_user_name_idx'),
+        ]
+
     def __str__(self):
         return self.username
 
@@ -16,6 +16,7 @@ from rest_framework_simplejwt.views import TokenObtainPairView
 from .models import User
 from .serializers import UserSerializer, FirebaseTokenSerializer, EmailTokenObtainPairSerializer
 from apps.core.permissions import IsAdminOrManagerUser
+from apps.core.pagination import KeysetPagination
 
 # Get an instance of a logger
 logger = logging.getLogger(__name__)
@@ -25,9 +26,11 @@ class UserListView(generics.ListAPIView):
     """
     API view to retrieve a list of users, filterable by role.
     """
-    queryset = User.objects.all().order_by('first_name', 'last_name')
+    queryset = User.objects.all().order_by('first_name', 'last_name', 'id')
     serializer_class = UserSerializer
     permission_classes = [IsAdminOrManagerUser]
+    pagination_class = KeysetPagination
+    keyset_ordering = ('first_name', 'last_name', 'id')
     filterset_fields = ['role']
 
 
@@ -14,6 +14,14 @@ def on_starting(server):
     """
     server.log.info("Gunicorn master process is starting.")
 
+    # Cache invalidations must reach every worker (see apps/core/checks.py)
+    from apps.core.checks import uses_process_local_cache
+    if server.cfg.workers > 1 and uses_process_local_cache():
+        raise RuntimeError(
+            f"{server.cfg.workers} workers need a shared cache: set CACHE_URL "
+            "(e.g. rediscache://redis:6379/1) or run a single worker."
+        )
+
 def post_fork(server, worker):
     """
     Worker process hook, runs in each worker after it has been forked.
@@ -2,6 +2,8 @@
 ASGI config for logipro_backend project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+This is the entry point in production: the live update streams
+(apps/core/live.py) are async views that only stay cheap under ASGI.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
@@ -11,6 +11,37 @@ env = environ.Env(
     # Add file upload size limits as environment variables
     FILE_UPLOAD_MAX_MEMORY_SIZE=(int, 5242880),  # 5MB default
     DATA_UPLOAD_MAX_MEMORY_SIZE=(int, 5242880),  # 5MB default
+    JOB_NUMBER_BLOCK_SIZE=(int, 20),
+    IDEMPOTENCY_KEY_TTL_HOURS=(int, 24),
+    IDEMPOTENCY_CACHE_SIZE=(int, 1024),
+    IDEMPOTENCY_WAIT_SECONDS=(float, 10.0),
+    TRACKING_CACHE_TTL=(int, 300),
+    LIVE_EVENTS_BROKER=(str, 'apps.core.live.InMemoryBroker'),
+    LIVE_STREAM_HEARTBEAT_SECONDS=(int, 15),
+    LIVE_STREAM_MAX_SECONDS=(int, 300),
+    LOCATION_FLUSH_SIZE=(int, 1000),
+    LOCATION_FLUSH_SECONDS=(float, 5.0),
+    LOCATION_LATEST_TTL=(int, 86400),
+    LOCATION_HISTORY_DAYS=(int, 90),
+    DRIVER_SYNC_TOMBSTONE_DAYS=(int, 30),
+    DRIVER_ASSIGNMENT_POLL_SECONDS=(int, 25),
+    MEDIA_UPLOAD_WORKERS=(int, 4),
+    MEDIA_UPLOAD_ATTEMPTS=(int, 5),
+    MEDIA_UPLOAD_RETRY_SECONDS=(float, 2.0),
+    MEDIA_IMAGE_MAX_DIMENSION=(int, 2048),
+    MEDIA_IMAGE_QUALITY=(int, 82),
+    UPLOAD_CHUNK_MAX_BYTES=(int, 4194304),
+    UPLOAD_MAX_BYTES=(int, 104857600),
+    UPLOAD_SESSION_TTL_HOURS=(int, 24),
+    BOOKING_DEFAULT_HOURS=(float, 4.0),
+    BOOKING_MAX_HOURS=(float, 168.0),
+    DISPATCH_PALLET_WEIGHT_LBS=(int, 1000),
+    DISPATCH_MAX_DAYS=(int, 14),
+    ROUTE_TIME_BUDGET_MS=(int, 200),
+    ROUTE_CACHE_SECONDS=(int, 86400),
+    DB_CONN_MAX_AGE=(int, 0),
+    TRANSIT_KM_PER_DAY=(int, 800),
+    QUOTE_UNLOCATED_MILES=(int, 500),
 )
 BASE_DIR = Path(__file__).resolve().parent.parent
 # Read the .env file from the backend root
@@ -84,13 +115,18 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = "logipro_backend.wsgi.application"
+ASGI_APPLICATION = "logipro_backend.asgi.application"
 
 import dj_database_url
 
+# Production serves ASGI (Procfile, Dockerfile), where sync views and ORM
+# calls run in sync_to_async threads that never reuse a persistent
+# connection, so connections are closed after each request unless
+# DB_CONN_MAX_AGE says otherwise (only worth it under WSGI).
 DATABASES = {
     "default": dj_database_url.config(
         default=f"sqlite:///{BASE_DIR / 'db.sqlite3'}",
-        conn_max_age=600,
+        conn_max_age=env('DB_CONN_MAX_AGE'),
         conn_health_checks=True,
     )
 }
@@ -141,6 +177,97 @@ AUTHENTICATION_BACKENDS = [
     'django.contrib.auth.backends.ModelBackend',
 ]
 
+# Cache backend, e.g. CACHE_URL=rediscache://redis:6379/1 in production;
+# per-process memory by default, which only suits a single worker
+# (gunicorn.conf.py refuses more; see apps/core/checks.py)
+CACHES = {
+    'default': env.cache('CACHE_URL', default='locmemcache://'),
+}
+
+# Seconds a public tracking response may be served from cache. Status and
+# shipment changes invalidate it immediately (see apps/orders/tracking.py);
+# this is only the backstop.
+TRACKING_CACHE_TTL = env('TRACKING_CACHE_TTL')
+
+# Server-Sent Event streams (apps/core/live.py). With more than one worker
+# use apps.core.live.PostgresBroker so every worker sees every event.
+LIVE_EVENTS_BROKER = env('LIVE_EVENTS_BROKER')
+LIVE_STREAM_HEARTBEAT_SECONDS = env('LIVE_STREAM_HEARTBEAT_SECONDS')
+LIVE_STREAM_MAX_SECONDS = env('LIVE_STREAM_MAX_SECONDS')
+
+# Driver GPS pings (apps/transportation/locations.py): history is written in
+# bulk once a process has buffered LOCATION_FLUSH_SIZE fixes or held one for
+# LOCATION_FLUSH_SECONDS (0 = size only); latest positions stay cached for
+# LOCATION_LATEST_TTL seconds; purge_driver_locations keeps
+# LOCATION_HISTORY_DAYS of history.
+LOCATION_FLUSH_SIZE = env('LOCATION_FLUSH_SIZE')
+LOCATION_FLUSH_SECONDS = env('LOCATION_FLUSH_SECONDS')
+LOCATION_LATEST_TTL = env('LOCATION_LATEST_TTL')
+LOCATION_HISTORY_DAYS = env('LOCATION_HISTORY_DAYS')
+
+# How long removed jobs are remembered for driver delta sync
+# (apps/orders/sync.py); older watermarks get a full job list
+DRIVER_SYNC_TOMBSTONE_DAYS = env('DRIVER_SYNC_TOMBSTONE_DAYS')
+
+# Longest a driver's assignment feed long poll is held
+# (apps/transportation/assignments.py); keep it under proxy idle timeouts
+DRIVER_ASSIGNMENT_POLL_SECONDS = env('DRIVER_ASSIGNMENT_POLL_SECONDS')
+
+# Proof-of-delivery uploads (apps/transportation/media.py): files are spooled
+# to MEDIA_SPOOL_DIR and copied to storage by MEDIA_UPLOAD_WORKERS threads
+# per process (0 = inline after commit), with MEDIA_UPLOAD_ATTEMPTS tries
+# backing off from MEDIA_UPLOAD_RETRY_SECONDS
+MEDIA_SPOOL_DIR = env('MEDIA_SPOOL_DIR', default=os.path.join(BASE_DIR, 'media_spool'))
+MEDIA_UPLOAD_WORKERS = env('MEDIA_UPLOAD_WORKERS')
+MEDIA_UPLOAD_ATTEMPTS = env('MEDIA_UPLOAD_ATTEMPTS')
+MEDIA_UPLOAD_RETRY_SECONDS = env('MEDIA_UPLOAD_RETRY_SECONDS')
+
+# Photos are stored as JPEGs at most MEDIA_IMAGE_MAX_DIMENSION pixels on the
+# longest edge, at MEDIA_IMAGE_QUALITY (apps/transportation/images.py)
+MEDIA_IMAGE_MAX_DIMENSION = env('MEDIA_IMAGE_MAX_DIMENSION')
+MEDIA_IMAGE_QUALITY = env('MEDIA_IMAGE_QUALITY')
+
+# Resumable uploads (apps/transportation/uploads.py): chunks are streamed to
+# disk, so these bound request size and disk use, not memory
+UPLOAD_CHUNK_MAX_BYTES = env('UPLOAD_CHUNK_MAX_BYTES')  # 4MB default
+UPLOAD_MAX_BYTES = env('UPLOAD_MAX_BYTES')  # 100MB default
+UPLOAD_SESSION_TTL_HOURS = env('UPLOAD_SESSION_TTL_HOURS')
+
+# A shipment without an estimated arrival books its driver and vehicle for
+# BOOKING_DEFAULT_HOURS, and none for longer than BOOKING_MAX_HOURS (a week
+# by default), which bounds how far back conflict checks look
+# (apps/transportation/availability.py)
+BOOKING_DEFAULT_HOURS = env('BOOKING_DEFAULT_HOURS')
+BOOKING_MAX_HOURS = env('BOOKING_MAX_HOURS')
+
+# Batch dispatch (apps/transportation/dispatch.py): jobs with only a pallet
+# count are taken to weigh DISPATCH_PALLET_WEIGHT_LBS per pallet. One run
+# covers at most DISPATCH_MAX_DAYS days of pickups
+DISPATCH_PALLET_WEIGHT_LBS = env('DISPATCH_PALLET_WEIGHT_LBS')
+DISPATCH_MAX_DAYS = env('DISPATCH_MAX_DAYS')
+
+# Driver route planning (apps/transportation/routing.py): time spent
+# improving a route, and how long one is kept (a changed assignment
+# replaces it sooner)
+ROUTE_TIME_BUDGET_MS = env('ROUTE_TIME_BUDGET_MS')
+ROUTE_CACHE_SECONDS = env('ROUTE_CACHE_SECONDS')
+
+# Distances from the offline gazetteer (apps/core/geo.py): road km driven
+# per day of transit in delivery estimates, and the distance quoted for
+# a lane it cannot place
+TRANSIT_KM_PER_DAY = env('TRANSIT_KM_PER_DAY')
+QUOTE_UNLOCATED_MILES = env('QUOTE_UNLOCATED_MILES')
+
+# Job numbers reserved per database round trip (see apps/orders/numbering.py)
+JOB_NUMBER_BLOCK_SIZE = env('JOB_NUMBER_BLOCK_SIZE')
+
+# Idempotency-Key support on create endpoints (apps/core/idempotency.py):
+# how long responses are kept, how many stay in each process's memory, and
+# how long a retry waits for the original request to finish.
+IDEMPOTENCY_KEY_TTL_HOURS = env('IDEMPOTENCY_KEY_TTL_HOURS')
+IDEMPOTENCY_CACHE_SIZE = env('IDEMPOTENCY_CACHE_SIZE')
+IDEMPOTENCY_WAIT_SECONDS = env('IDEMPOTENCY_WAIT_SECONDS')
+
 # Django REST Framework
 REST_FRAMEWORK = {
     "DEFAULT_PERMISSION_CLASSES": [ 
@@ -157,8 +284,9 @@ REST_FRAMEWORK = {
         'rest_framework.parsers.MultiPartParser',  # Important for file uploads
         'rest_framework.parsers.FormParser',
     ],
-    # Optional: Add pagination
-    "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
+    # Page numbers by default; large list views opt into keyset paging
+    # (see apps/core/pagination.py)
+    "DEFAULT_PAGINATION_CLASS": "apps.core.pagination.StandardPagination",
     "PAGE_SIZE": 20,
 }
 
@@ -186,11 +314,15 @@ CORS_ALLOW_HEADERS = [
     'authorization',
     'content-type',
     'dnt',
+    'idempotency-key',
     'origin',
+    'upload-checksum',
+    'upload-offset',
     'user-agent',
     'x-csrftoken',
     'x-requested-with',
 ]
+CORS_EXPOSE_HEADERS = ['idempotent-replayed', 'upload-offset']
 
 # Firebase, Stripe, Twilio
 GOOGLE_APPLICATION_CREDENTIALS = env("GOOGLE_APPLICATION_CREDENTIALS")
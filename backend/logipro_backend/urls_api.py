@@ -14,6 +14,7 @@ from apps.users.views import (
     EmailTokenObtainPairView
 )
 from apps.orders.customer_views import TrackingViewSet
+from apps.orders.live import jobs_stream, tracking_stream
 
 app_name = "api"
 
@@ -56,7 +57,11 @@ urlpatterns = [
     # Public tracking endpoint (no auth required)
     path("tracking/", include([
         path('<uuid:id>/', TrackingViewSet.as_view({'get': 'retrieve'}), name='tracking-detail'),
+        path('<str:tracking_id>/stream/', tracking_stream, name='tracking-stream'),
     ])),
+
+    # Live job updates for the dashboard (Server-Sent Events)
+    path("live/jobs/", jobs_stream, name="live-jobs"),
     
     # Driver App APIs
     path("driver/", include("apps.orders.driver_urls")),
@@ -50,6 +50,18 @@ export default function TrackingPage() {
         }
     }, [trackingId]);
 
+    // Live updates: the backend pushes a fresh snapshot on every status change
+    useEffect(() => {
+        if (!trackingId || typeof EventSource === 'undefined') return;
+
+        const source = new EventSource(`${apiClient.defaults.baseURL}/tracking/${trackingId}/stream/`);
+        source.addEventListener('tracking', (event) => {
+            const update = JSON.parse((event as MessageEvent).data);
+            setData((current) => (current ? { ...current, ...update } : update));
+        });
+        return () => source.close();
+    }, [trackingId]);
+
     const containerVariants = {
         hidden: { opacity: 0, y: 20 },
         visible: { opacity: 1, y: 0, transition: { duration: 0.4 } }
@@ -256,15 +268,11 @@ export default function TrackingPage() {
                                     <div className="absolute -left-[9px] top-0 w-4 h-4 rounded-full border-2 border-green-500 bg-white dark:bg-slate-900"></div>
                                     <p className="text-xs text-muted-foreground uppercase tracking-wider font-semibold mb-1">Pickup</p>
                                     <p className="font-medium text-gray-900 dark:text-white">{data.pickup_city}</p>
-                                    <p className="text-sm text-gray-500">{data.pickup_address}</p>
-                                    <p className="text-xs text-gray-400 mt-1">{data.pickup_contact_person}</p>
                                 </div>
                                 <div className="relative pl-6 border-l-2 border-blue-500">
                                     <div className="absolute -left-[9px] top-0 w-4 h-4 rounded-full border-2 border-blue-500 bg-white dark:bg-slate-900"></div>
                                     <p className="text-xs text-muted-foreground uppercase tracking-wider font-semibold mb-1">Delivery</p>
                                     <p className="font-medium text-gray-900 dark:text-white">{data.delivery_city}</p>
-                                    <p className="text-sm text-gray-500">{data.delivery_address}</p>
-                                    <p className="text-xs text-gray-400 mt-1">{data.delivery_contact_person}</p>
                                 </div>
                             </div>
                         </PremiumCard>